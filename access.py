@@ -0,0 +1,35 @@
+"""Login manager and role-based access decorators shared by the blueprints"""
+from functools import wraps
+
+from flask import abort
+from flask_login import LoginManager, current_user
+
+from models import db, User
+
+login_manager = LoginManager()
+login_manager.login_view = 'auth.login'
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    return db.session.get(User, int(user_id))
+
+
+# ==================== ROLE-BASED ACCESS DECORATORS ====================
+def admin_required(f):
+    """Decorator to require admin role"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated or current_user.role != 'admin':
+            abort(403)
+        return f(*args, **kwargs)
+    return decorated_function
+
+def organization_required(f):
+    """Decorator to require organization role"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated or current_user.role != 'organization':
+            abort(403)
+        return f(*args, **kwargs)
+    return decorated_function
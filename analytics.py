@@ -0,0 +1,347 @@
+"""Daily activity rollups for analytics charts.
+
+``daily_activity`` holds one row per (day, organization, category) with the
+bookings made, bookings completed, hours completed and unique volunteers
+active that day, so a chart over any range is a single scan of the
+``(day, ...)`` primary key (or the ``(organization_id, day)`` index when
+filtered to one organization) instead of an aggregate over booking history.
+
+Rows are maintained incrementally: a flush listener turns new, completed,
+reverted and deleted bookings into deltas, and set-based UPDATEs that bypass
+the ORM call ``apply_activity`` themselves (as they do ``ledger.apply_deltas``).
+Unique volunteers cannot be summed, so the first activity of a user in a
+bucket is remembered in ``daily_activity_volunteers`` and only that bumps the
+count.
+
+``compact()`` (``flask compact-rollups``, run nightly from cron) recomputes
+the last few days exactly from bookings (archived ones included), correcting any drift from writes
+that skipped the listener, and prunes the volunteer membership rows of days
+that can no longer receive activity, leaving one row per bucket.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event, inspect, select, union
+from sqlalchemy.orm import Session
+
+from models import db, Booking, Opportunity, Organization, DailyActivity, DailyActivityVolunteer
+from ledger import _previous
+from archive import booking_history
+
+activity_table = DailyActivity.__table__
+members_table = DailyActivityVolunteer.__table__
+
+METRICS = ('bookings', 'completions', 'hours', 'volunteers')
+INTERVALS = ('day', 'week', 'month')
+MAX_DAYS = 3 * 366
+# Activity is stamped with the current time, so only today's and yesterday's
+# buckets (a booking flushed just before midnight) still need membership rows
+MEMBERSHIP_DAYS = 2
+
+
+def _day(value):
+    return value.date() if value else datetime.utcnow().date()
+
+
+def apply_activity(connection, deltas, members=()):
+    """Add ``{(day, organization_id, category): [bookings, completions, hours]}`` deltas.
+
+    ``members`` is an iterable of ``(day, organization_id, category, user_id)``;
+    each one not seen before adds a unique volunteer to its bucket. Uses
+    update-then-insert so it runs on any backend, inside the caller's
+    transaction.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0, 0], {key: list(value) + [0] for key, value in deltas.items()})
+    for day, organization_id, category, user_id in set(members):
+        if _insert_member(connection, day, organization_id, category, user_id):
+            deltas[(day, organization_id, category)][3] += 1
+
+    for (day, organization_id, category), (bookings, completions, hours, volunteers) in deltas.items():
+        if not (bookings or completions or hours or volunteers):
+            continue
+        key = ((activity_table.c.day == day) & (activity_table.c.organization_id == organization_id)
+               & (activity_table.c.category == category))
+        updated = connection.execute(activity_table.update().where(key).values(
+            bookings=activity_table.c.bookings + bookings,
+            completions=activity_table.c.completions + completions,
+            hours=activity_table.c.hours + hours,
+            volunteers=activity_table.c.volunteers + volunteers,
+        ))
+        if updated.rowcount == 0:
+            connection.execute(activity_table.insert().values(
+                day=day, organization_id=organization_id, category=category,
+                bookings=bookings, completions=completions, hours=hours, volunteers=volunteers
+            ))
+
+
+def _insert_member(connection, day, organization_id, category, user_id):
+    """Remember a volunteer in a bucket; True if they were not there yet"""
+    key = ((members_table.c.day == day) & (members_table.c.organization_id == organization_id)
+           & (members_table.c.category == category) & (members_table.c.user_id == user_id))
+    if connection.execute(select(members_table.c.user_id).where(key)).first():
+        return False
+    connection.execute(members_table.insert().values(
+        day=day, organization_id=organization_id, category=category, user_id=user_id
+    ))
+    return True
+
+
+def _state(booking, state, old):
+    """(status, user_id, opportunity_id, created_at, completed_at, hours) before or after the flush"""
+    attrs = ('status', 'user_id', 'opportunity_id', 'created_at', 'completed_at', 'hours')
+    if old:
+        return tuple(_previous(state, attr) for attr in attrs)
+    return tuple(getattr(booking, attr) for attr in attrs)
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_activity(session, flush_context):
+    """Turn new, completed, reverted and deleted bookings in this flush into rollup deltas"""
+    changes = []  # (sign, counts booking?, counts completion?, state)
+    for booking in session.new:
+        if isinstance(booking, Booking):
+            new = _state(booking, inspect(booking), old=False)
+            changes.append((1, True, new[0] == 'completed', new))
+    for booking in session.dirty:
+        if isinstance(booking, Booking):
+            state = inspect(booking)
+            if not any(state.attrs[a].history.has_changes() for a in ('status', 'hours', 'completed_at')):
+                continue
+            old, new = _state(booking, state, old=True), _state(booking, state, old=False)
+            if old[0] == 'completed':
+                changes.append((-1, False, True, old))
+            if new[0] == 'completed':
+                changes.append((1, False, True, new))
+    for booking in session.deleted:
+        if isinstance(booking, Booking):
+            old = _state(booking, inspect(booking), old=True)
+            changes.append((-1, True, old[0] == 'completed', old))
+    if not changes:
+        return
+
+    connection = session.connection()
+    opportunity_ids = {state[2] for _, _, _, state in changes}
+    buckets = {row.id: (row.organization_id or 0, row.category or '') for row in connection.execute(
+        select(Opportunity.id, Opportunity.organization_id, Opportunity.category).where(
+            Opportunity.id.in_(opportunity_ids))
+    )}
+
+    deltas = defaultdict(lambda: [0, 0, 0])
+    members = []
+    for sign, booked, completed, (_, user_id, opportunity_id, created_at, completed_at, hours) in changes:
+        organization_id, category = buckets.get(opportunity_id, (0, ''))
+        if booked:
+            day = _day(created_at)
+            deltas[(day, organization_id, category)][0] += sign
+            if sign > 0:
+                members.append((day, organization_id, category, user_id))
+        if completed:
+            day = _day(completed_at)
+            delta = deltas[(day, organization_id, category)]
+            delta[1] += sign
+            delta[2] += sign * (hours or 0)
+            if sign > 0:
+                members.append((day, organization_id, category, user_id))
+    apply_activity(connection, deltas, members)
+
+
+# ---------- compaction ----------
+
+def rebuild_days(start, end):
+    """Recompute rollup rows for ``start <= day <= end`` from live and archived bookings; returns the bucket count"""
+    start_at = datetime.combine(start, datetime.min.time())
+    end_at = datetime.combine(end + timedelta(days=1), datetime.min.time())
+    history = booking_history()
+    organization_id = db.func.coalesce(history.c.organization_id, 0)
+    category = db.func.coalesce(history.c.category, '')
+
+    buckets = defaultdict(lambda: [0, 0, 0, 0])
+    booked_day = db.func.date(history.c.created_at)
+    for day, org, cat, count in db.session.query(
+        booked_day, organization_id, category, db.func.count(history.c.id)
+    ).filter(
+        history.c.created_at >= start_at, history.c.created_at < end_at
+    ).group_by(booked_day, organization_id, category):
+        buckets[(_as_date(day), org, cat)][0] = count
+
+    completed_day = db.func.date(history.c.completed_at)
+    for day, org, cat, count, hours in db.session.query(
+        completed_day, organization_id, category, db.func.count(history.c.id), db.func.sum(history.c.hours)
+    ).filter(
+        history.c.status == 'completed', history.c.completed_at >= start_at, history.c.completed_at < end_at
+    ).group_by(completed_day, organization_id, category):
+        bucket = buckets[(_as_date(day), org, cat)]
+        bucket[1], bucket[2] = count, hours or 0
+
+    # A volunteer who both booked and completed in a bucket is counted once
+    active = union(
+        select(booked_day.label('day'), organization_id.label('org'), category.label('cat'),
+               history.c.user_id.label('user_id')).where(
+            history.c.created_at >= start_at, history.c.created_at < end_at
+        ),
+        select(completed_day, organization_id, category, history.c.user_id).where(
+            history.c.status == 'completed', history.c.completed_at >= start_at, history.c.completed_at < end_at
+        ),
+    ).subquery()
+    for day, org, cat, count in db.session.query(
+        active.c.day, active.c.org, active.c.cat, db.func.count(active.c.user_id)
+    ).group_by(active.c.day, active.c.org, active.c.cat):
+        buckets[(_as_date(day), org, cat)][3] = count
+
+    db.session.execute(activity_table.delete().where(activity_table.c.day.between(start, end)))
+    rows = [dict(day=day, organization_id=org, category=cat, bookings=b, completions=c, hours=h, volunteers=v)
+            for (day, org, cat), (b, c, h, v) in buckets.items()]
+    if rows:
+        db.session.execute(activity_table.insert(), rows)
+    return len(rows)
+
+
+def compact(days=MEMBERSHIP_DAYS, today=None):
+    """Nightly maintenance: re-derive the last ``days`` days exactly and prune old membership rows.
+
+    Returns ``(buckets rebuilt, membership rows pruned)``.
+    """
+    today = today or datetime.utcnow().date()
+    buckets = rebuild_days(today - timedelta(days=days - 1), today)
+    keep_from = today - timedelta(days=MEMBERSHIP_DAYS - 1)
+    pruned = db.session.execute(members_table.delete().where(members_table.c.day < keep_from)).rowcount
+    _reseed_members(keep_from)
+    db.session.commit()
+    return buckets, pruned
+
+
+def rebuild_all():
+    """Recompute every rollup row from booking history"""
+    db.create_all()
+    history = booking_history()
+    first = min(filter(None, (db.session.query(db.func.min(column)).scalar()
+                              for column in (history.c.created_at, history.c.completed_at))), default=None)
+    today = datetime.utcnow().date()
+    db.session.execute(activity_table.delete())
+    db.session.execute(members_table.delete())
+    buckets = rebuild_days(_as_date(first), today) if first else 0
+    _reseed_members(today - timedelta(days=MEMBERSHIP_DAYS - 1))
+    db.session.commit()
+    return buckets
+
+
+def _reseed_members(start):
+    """Rewrite membership rows from ``start`` on to match the recomputed volunteer counts"""
+    history = booking_history()
+    organization_id = db.func.coalesce(history.c.organization_id, 0)
+    category = db.func.coalesce(history.c.category, '')
+    start_at = datetime.combine(start, datetime.min.time())
+    members = set()
+    for column in (history.c.created_at, history.c.completed_at):
+        query = db.session.query(db.func.date(column), organization_id, category, history.c.user_id).filter(
+            column >= start_at
+        )
+        if column is history.c.completed_at:
+            query = query.filter(history.c.status == 'completed')
+        members.update((_as_date(day), org, cat, user_id) for day, org, cat, user_id in query)
+    db.session.execute(members_table.delete().where(members_table.c.day >= start))
+    if members:
+        db.session.execute(members_table.insert(), [
+            dict(day=day, organization_id=org, category=cat, user_id=user_id) for day, org, cat, user_id in members
+        ])
+
+
+def _as_date(value):
+    """DATE() comes back as a string on SQLite and a date elsewhere"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value[:10], '%Y-%m-%d').date()
+
+
+# ---------- reads ----------
+
+def parse_range(args, default_days=30):
+    """(start, end, interval) from ``from``/``to`` (YYYY-MM-DD) and ``interval``; ValueError if invalid"""
+    end = datetime.strptime(args['to'], '%Y-%m-%d').date() if args.get('to') else datetime.utcnow().date()
+    start = (datetime.strptime(args['from'], '%Y-%m-%d').date() if args.get('from')
+             else end - timedelta(days=default_days - 1))
+    if start > end:
+        raise ValueError('from must not be after to')
+    if (end - start).days >= MAX_DAYS:
+        raise ValueError(f'range is limited to {MAX_DAYS} days')
+    interval = args.get('interval', 'day')
+    if interval not in INTERVALS:
+        raise ValueError(f'interval must be one of {", ".join(INTERVALS)}')
+    return start, end, interval
+
+
+def _bucket(day, interval):
+    if interval == 'week':
+        return day - timedelta(days=day.weekday())
+    if interval == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _labels(start, end, interval):
+    labels, day = [], _bucket(start, interval)
+    while day <= end:
+        labels.append(day)
+        if interval == 'month':
+            day = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            day += timedelta(days=7 if interval == 'week' else 1)
+    return labels
+
+
+def series_args(args, organization_id=None):
+    """``series()`` for a request's query string: from, to, interval, category, group_by"""
+    start, end, interval = parse_range(args)
+    return series(start, end, interval, organization_id=organization_id,
+                  category=args.get('category') or None, group_by=args.get('group_by') or None)
+
+
+def series(start, end, interval='day', organization_id=None, category=None, group_by=None):
+    """Chart-ready series for a date range, zero-filled.
+
+    Returns ``{'labels': [...], 'series': {metric: [...]}}``, or with
+    ``group_by='category'``/``'organization'`` one such dict of metrics per
+    group under ``'groups'``. Volunteers in week/month buckets are the sum of
+    daily unique volunteers (volunteer-days).
+    """
+    if group_by not in (None, 'category', 'organization'):
+        raise ValueError('group_by must be category or organization')
+    dimension = {'category': DailyActivity.category, 'organization': DailyActivity.organization_id}.get(group_by)
+    columns = [DailyActivity.day] + ([dimension] if dimension is not None else [])
+    query = db.session.query(*columns, *(db.func.sum(getattr(DailyActivity, m)) for m in METRICS)).filter(
+        DailyActivity.day.between(start, end)
+    )
+    if organization_id is not None:
+        query = query.filter(DailyActivity.organization_id == organization_id)
+    if category:
+        query = query.filter(DailyActivity.category == category)
+    rows = query.group_by(*columns).all()
+
+    labels = _labels(start, end, interval)
+    position = {label: i for i, label in enumerate(labels)}
+    groups = defaultdict(lambda: {metric: [0] * len(labels) for metric in METRICS})
+    for row in rows:
+        day, group = row[0], (row[1] if dimension is not None else None)
+        values = row[len(columns):]
+        target = groups[group]
+        i = position[_bucket(_as_date(day), interval)]
+        for metric, value in zip(METRICS, values):
+            target[metric][i] += value or 0
+
+    result = {'labels': [label.isoformat() for label in labels], 'interval': interval}
+    if dimension is None:
+        result['series'] = groups[None] if None in groups else {metric: [0] * len(labels) for metric in METRICS}
+    else:
+        names = {}
+        if group_by == 'organization':
+            names = dict(db.session.query(Organization.id, Organization.name).filter(
+                Organization.id.in_([key for key in groups if key])
+            ).all())
+        result['groups'] = [
+            {'key': key, 'label': names.get(key, key) if group_by == 'organization' else key or 'Uncategorized',
+             'series': values}
+            for key, values in sorted(groups.items(), key=lambda item: -sum(item[1]['hours']))
+        ]
+    return result
@@ -0,0 +1,123 @@
+"""Archival of past opportunities.
+
+Opportunities whose date is more than ``ARCHIVE_AFTER_DAYS`` days past, and
+which have no bookings still ``confirmed``, are moved with their time slots,
+bookings and interest tags into the ``archived_*`` tables, so listings,
+dashboards and the booking-completion job only scan current rows. Each chunk
+is one short transaction: ``INSERT ... SELECT`` into the archive, then
+``DELETE`` from the live tables. Rows keep their ids, so a chunk is either
+moved whole or not at all and re-running is harmless. The live tables are
+``AUTOINCREMENT`` on SQLite, so those ids are never handed out again;
+databases created before that need ``flask upgrade-foreign-keys`` first.
+
+The DELETEs bypass the ORM flush listeners on purpose: archived hours stay in
+the hours ledger and daily rollups. ``booking_history()`` unions live and
+archived bookings for the rebuilds, and history views add archived bookings
+with ``archived_bookings_for()`` only when asked (``?archived=1``).
+"""
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import exists, select, union_all
+
+from models import (db, ArchivedBooking, ArchivedOpportunity, ArchivedOpportunityInterest, ArchivedTimeSlot,
+                    Booking, Opportunity, OpportunityInterest, TimeSlot)
+from schema import missing_autoincrement
+import fragment_cache
+import recommendations
+import autocomplete
+
+ARCHIVE_AFTER_DAYS = 90
+
+# (live model, archive model, column linking the row to its opportunity)
+_MOVES = (
+    (Opportunity, ArchivedOpportunity, 'id'),
+    (TimeSlot, ArchivedTimeSlot, 'opportunity_id'),
+    (Booking, ArchivedBooking, 'opportunity_id'),
+    (OpportunityInterest, ArchivedOpportunityInterest, 'opportunity_id'),
+)
+
+
+def archive_past(days=ARCHIVE_AFTER_DAYS, today=None, chunk_size=200, pause=0.0):
+    """Move opportunities more than ``days`` days past into the archive; returns how many were moved"""
+    cutoff = (today or date.today()) - timedelta(days=days)
+    outdated = missing_autoincrement()
+    if outdated:
+        # SQLite would hand an archived row's id to the next new row
+        raise RuntimeError(f'{", ".join(outdated)} may reuse ids; run `flask upgrade-foreign-keys` first')
+    # create_all() does not add indexes to tables that already exist
+    for model in (ArchivedOpportunity, ArchivedTimeSlot, ArchivedBooking):
+        for index in model.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+
+    moved = 0
+    last_id = 0
+    while True:
+        # Skip opportunities whose bookings the completion job has not finished with
+        ids = [row[0] for row in db.session.query(Opportunity.id).filter(
+            Opportunity.date < cutoff,
+            Opportunity.id > last_id,
+            ~exists().where(Booking.opportunity_id == Opportunity.id, Booking.status == 'confirmed')
+        ).order_by(Opportunity.id).limit(chunk_size)]
+        if not ids:
+            db.session.rollback()
+            break
+        last_id = ids[-1]
+
+        moved += _move(ids)
+        db.session.commit()
+        if pause:
+            time.sleep(pause)
+    return moved
+
+
+def _move(ids):
+    """Copy opportunities ``ids`` with their slots, bookings and tags into the archive and delete them"""
+    now = datetime.utcnow()
+    for live, archived, link in _MOVES:
+        columns = [column.name for column in live.__table__.columns]
+        source = select(*live.__table__.columns).where(getattr(live, link).in_(ids))
+        if archived is ArchivedOpportunity:
+            columns.append('archived_at')
+            source = source.add_columns(db.literal(now))
+        db.session.execute(archived.__table__.insert().from_select(columns, source))
+
+    # Children first, so this works whether or not the foreign keys cascade
+    for model in (Booking, TimeSlot, OpportunityInterest):
+        db.session.execute(model.__table__.delete().where(model.opportunity_id.in_(ids)))
+    result = db.session.execute(Opportunity.__table__.delete().where(Opportunity.id.in_(ids)))
+    fragment_cache.mark_changed(db.session, ids)
+    recommendations.mark_changed(db.session, ids)
+    autocomplete.mark_changed(db.session, ids)
+    return result.rowcount
+
+
+def booking_history():
+    """Live and archived bookings with their opportunity's organization and category, as one subquery"""
+    def rows(booking, opportunity):
+        return select(
+            booking.c.id, booking.c.user_id, booking.c.status, booking.c.hours,
+            booking.c.created_at, booking.c.completed_at,
+            opportunity.c.organization_id, opportunity.c.category
+        ).join(opportunity, opportunity.c.id == booking.c.opportunity_id)
+
+    return union_all(
+        rows(Booking.__table__, Opportunity.__table__),
+        rows(ArchivedBooking.__table__, ArchivedOpportunity.__table__),
+    ).subquery('booking_history')
+
+
+def include_archived(args):
+    """True when a history view was asked to add archived bookings (``?archived=1``)"""
+    return args.get('archived') == '1'
+
+
+def archived_bookings_for(user_id, status=None):
+    """A user's archived bookings with their opportunities and slots, most recent first"""
+    query = ArchivedBooking.query.filter_by(user_id=user_id).options(
+        db.joinedload(ArchivedBooking.opportunity).joinedload(ArchivedOpportunity.organization),
+        db.joinedload(ArchivedBooking.time_slot)
+    )
+    if status is not None:
+        query = query.filter(ArchivedBooking.status == status)
+    return query.order_by(ArchivedBooking.booking_time.desc()).all()
@@ -0,0 +1,316 @@
+"""Fingerprinted, precompressed static assets.
+
+At startup (or ahead of time with ``flask build-assets``) every file under
+``static/`` is copied to ``static/dist/`` with a content hash in its name,
+e.g. ``css/style.css`` -> ``dist/css/style.3b0c9e51a2f4.css``, next to
+``.gz`` and ``.br`` variants. Templates keep calling
+``url_for('static', filename='css/style.css')``; a URL default rewrites the
+filename to the fingerprinted one, and the static view serves those files
+with ``Cache-Control: immutable`` and the best encoding the client accepts.
+Browsers therefore never re-request an asset until its content changes.
+
+Page styles live in ``styles/<portal>/<template>.css`` rather than inline
+``<style>`` blocks. They are concatenated into one bundle per portal
+(``static/css/bundles/admin.css``, ...) before fingerprinting, with each
+page's rules scoped under its ``page-<template>`` body class so pages that
+share a bundle keep their own definitions of common selectors. ``base.html``
+links the bundle for the template being rendered.
+
+Brotli variants are only written when the optional ``brotli`` package is
+installed.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+from mimetypes import guess_type
+
+from flask import before_render_template, current_app, request, send_file, url_for
+
+try:
+    import brotli
+except ImportError:  # optional: serve gzip only
+    brotli = None
+
+DIST = 'dist'
+BUNDLES = 'css/bundles'
+HASH_LENGTH = 12
+ONE_YEAR = 365 * 24 * 3600
+# Text formats worth precompressing; images and fonts are already compressed
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.ico'}
+
+
+def minify_css(css):
+    """Strip comments and redundant whitespace from a stylesheet"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    # Only the space after a colon: before one it can be a descendant combinator (`.a :hover`)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+
+def page_class(page):
+    """Body class for a template: ``admin_users`` -> ``page-admin-users``"""
+    return 'page-' + page.replace('_', '-')
+
+
+def _split_selectors(prelude):
+    selectors, depth, start = [], 0, 0
+    for i, ch in enumerate(prelude):
+        if ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            selectors.append(prelude[start:i])
+            start = i + 1
+    selectors.append(prelude[start:])
+    return [' '.join(s.split()) for s in selectors if s.strip()]
+
+
+def _scope_selector(selector, scope):
+    if re.match(r'(html|:root)\b', selector):
+        return selector
+    if re.match(r'body\b', selector):
+        return f'body.{scope}' + selector[4:]
+    return f'.{scope} {selector}'
+
+
+def scope_css(css, scope):
+    """Prefix every selector with ``.scope``; @media/@supports are scoped inside, other at-rules kept"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    out, pos = [], 0
+    while True:
+        brace = css.find('{', pos)
+        if brace == -1:
+            break
+        prelude = css[pos:brace].strip()
+        depth, end = 1, brace + 1
+        while depth and end < len(css):
+            depth += {'{': 1, '}': -1}.get(css[end], 0)
+            end += 1
+        # A rule left open at the end of a page's <style> was closed by </style>; close it here
+        # so it cannot swallow the next page in the bundle
+        body = css[brace + 1:end - 1] if depth == 0 else css[brace + 1:] + '}' * (depth - 1)
+        if prelude.startswith(('@media', '@supports')):
+            out.append(f'{prelude} {{\n{scope_css(body, scope)}}}\n')
+        elif prelude.startswith('@'):
+            out.append(f'{prelude} {{{body}}}\n')
+        else:
+            selectors = ', '.join(_scope_selector(s, scope) for s in _split_selectors(prelude))
+            out.append(f'{selectors} {{{body}}}\n')
+        pos = end
+    return ''.join(out)
+
+
+class AssetPipeline:
+    """Builds the fingerprinted asset set and serves it"""
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self.manifest = {}  # source path -> fingerprinted path (both relative to static/)
+        self.fingerprinted = set()
+        self.static_folder = None
+        self.styles_folder = None
+        self.page_stylesheets = {}  # template name -> bundle path (relative to static/)
+        self.enabled = True
+        self.debug = False
+        self._mtimes = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Build (or load) bundles and the manifest, and hook url_for('static') and the static view"""
+        self.static_folder = app.static_folder
+        self.styles_folder = app.config.get('ASSETS_STYLES_FOLDER') or os.path.join(app.root_path, 'styles')
+        self.enabled = app.config.get('ASSETS_FINGERPRINT', True)
+        self.debug = app.debug
+        app.extensions['assets'] = self
+        before_render_template.connect(self._inject_page, app)
+
+        build = app.config.get('ASSETS_BUILD_ON_STARTUP', True)
+        if build or not os.path.isdir(os.path.join(self.static_folder, *BUNDLES.split('/'))):
+            self.build_bundles()
+        else:
+            self.page_stylesheets = {page: bundle for page, bundle, _ in self._styles()}
+        if not self.enabled:
+            return
+        if build or not self.load_manifest():
+            self.build()
+        app.url_defaults(self._fingerprint_url)
+        app.view_functions['static'] = self.send_static
+        app.jinja_env.globals['asset_url'] = self.url
+
+    # ---------- style bundles ----------
+
+    def _styles(self):
+        if not self.styles_folder or not os.path.isdir(self.styles_folder):
+            return
+        for portal in sorted(os.listdir(self.styles_folder)):
+            folder = os.path.join(self.styles_folder, portal)
+            if not os.path.isdir(folder):
+                continue
+            for name in sorted(os.listdir(folder)):
+                if name.endswith('.css'):
+                    yield name[:-4], f'{BUNDLES}/{portal}.css', os.path.join(folder, name)
+
+    def build_bundles(self):
+        """Concatenate styles/<portal>/*.css into one scoped stylesheet per portal"""
+        bundles, pages = {}, {}
+        for page, bundle, path in self._styles():
+            with open(path, encoding='utf-8') as f:
+                css = scope_css(f.read(), page_class(page))
+            bundles.setdefault(bundle, []).append(f'/* {page} */\n{css}')
+            pages[page] = bundle
+            self._mtimes[path] = os.path.getmtime(path)
+        for bundle, parts in bundles.items():
+            out = os.path.join(self.static_folder, *bundle.split('/'))
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+            _write(out, '\n'.join(parts).encode('utf-8'))
+        self.page_stylesheets = pages
+        return pages
+
+    def _styles_changed(self):
+        return any(self._mtimes.get(path) != os.path.getmtime(path) for _, _, path in self._styles())
+
+    def _inject_page(self, sender, template, context, **extra):
+        page = os.path.splitext(os.path.basename(template.name or ''))[0]
+        if self.debug and self._styles_changed():
+            self.build_bundles()
+        context.setdefault('page_class', page_class(page))
+        context.setdefault('page_stylesheet', self.page_stylesheets.get(page))
+
+    # ---------- fingerprinting ----------
+
+    def _sources(self):
+        for root, dirs, files in os.walk(self.static_folder):
+            if os.path.samefile(root, self.static_folder) and DIST in dirs:
+                dirs.remove(DIST)
+            for name in files:
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, self.static_folder).replace(os.sep, '/'), path
+
+    def _build_one(self, source, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        base, ext = os.path.splitext(source)
+        if ext == '.css' and not base.endswith('.min'):
+            data = minify_css(data.decode('utf-8')).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        target = f'{DIST}/{base}.{digest}{ext}'
+        out = os.path.join(self.static_folder, *target.split('/'))
+        if not os.path.exists(out):
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+            _write(out, data)
+            if ext in COMPRESSIBLE:
+                _write(out + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    _write(out + '.br', brotli.compress(data, quality=11))
+        self._mtimes[source] = os.path.getmtime(path)
+        return target
+
+    def build(self):
+        """Fingerprint every static file and write the manifest; returns it"""
+        manifest = {source: self._build_one(source, path) for source, path in self._sources()}
+        with self._lock:
+            self.manifest = manifest
+            self.fingerprinted = set(manifest.values())
+        _write(self._manifest_path(), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+        return manifest
+
+    def clean(self):
+        """Delete fingerprinted files no longer referenced by the manifest; returns how many"""
+        keep = set()
+        for target in self.fingerprinted:
+            keep.update({target, target + '.gz', target + '.br'})
+        removed = 0
+        dist = os.path.join(self.static_folder, DIST)
+        for root, _, files in os.walk(dist):
+            for name in files:
+                rel = os.path.relpath(os.path.join(root, name), self.static_folder).replace(os.sep, '/')
+                if rel not in keep and name != 'manifest.json':
+                    os.remove(os.path.join(root, name))
+                    removed += 1
+        return removed
+
+    def _manifest_path(self):
+        return os.path.join(self.static_folder, DIST, 'manifest.json')
+
+    def load_manifest(self):
+        try:
+            with open(self._manifest_path()) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        with self._lock:
+            self.manifest = manifest
+            self.fingerprinted = set(manifest.values())
+        return True
+
+    # ---------- urls ----------
+
+    def lookup(self, filename):
+        """Fingerprinted path for a static file, or the filename itself if unknown"""
+        if self.debug:
+            self._refresh(filename)
+        return self.manifest.get(filename, filename)
+
+    def _refresh(self, filename):
+        # Development servers edit assets in place; re-hash when the source changes
+        path = os.path.join(self.static_folder, *filename.split('/'))
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return
+        if self._mtimes.get(filename) != mtime:
+            target = self._build_one(filename, path)
+            with self._lock:
+                self.manifest = dict(self.manifest, **{filename: target})
+                self.fingerprinted = self.fingerprinted | {target}
+
+    def url(self, filename):
+        """Template helper: ``asset_url('css/style.css')``"""
+        return url_for('static', filename=filename)
+
+    def _fingerprint_url(self, endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = self.lookup(values['filename'])
+
+    # ---------- serving ----------
+
+    def send_static(self, filename):
+        """Static view: immutable, precompressed responses for fingerprinted files"""
+        if filename not in self.fingerprinted:
+            return current_app.send_static_file(filename)
+
+        path = os.path.join(self.static_folder, *filename.split('/'))
+        mimetype = None
+        encoding = None
+        accepted = request.accept_encodings
+        for name, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if accepted[name] and os.path.exists(path + suffix):
+                encoding = name
+                mimetype = guess_type(path)[0] or 'application/octet-stream'
+                path += suffix
+                break
+
+        response = send_file(path, mimetype=mimetype, max_age=ONE_YEAR, conditional=True)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.content_encoding = encoding
+        return response
+
+
+def _write(path, data):
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+assets = AssetPipeline()
@@ -0,0 +1,252 @@
+"""Async JSON tier for the busiest read endpoints.
+
+The map's ``/api/opportunities``, ``/api/availability`` and the XHR branch
+of ``/search`` (also served as ``/api/search``) answer from the same
+statements and JSON helpers as the Flask views, so the payloads are
+identical. Here they run on an asyncio event loop with an async database
+driver, so one process can hold many slow clients and in-flight queries
+without a thread or worker each.
+
+This is a plain ASGI application with no framework. Run it next to the
+Flask app and have the proxy route those paths to it (see DEPLOYMENT.md)::
+
+    pip install -r requirements-async.txt
+    uvicorn async_api:app --port 8001
+
+It reads ``ASYNC_DATABASE_URL``, which defaults to ``DATABASE_URL`` with its
+driver swapped for ``aiosqlite`` or ``asyncpg``. At most
+``ASYNC_API_MAX_CONCURRENCY`` requests use the database at once; the pool
+holds that many connections. Up to ``ASYNC_API_MAX_WAITING`` more wait for
+a turn, and beyond that requests get a 503 with ``Retry-After``.
+``/search`` draws on the same rate-limit buckets as the Flask view.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import sqlite3
+import time
+from datetime import date
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qsl
+
+from flask import Flask
+from itsdangerous import BadSignature
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException
+
+from config import Config
+from models import Opportunity, Organization
+from availability import Availability
+from blueprints.api import availability_request, map_markers, map_statement
+from ratelimit import RateLimiter
+from search import PER_PAGE, facet_statement, paginate, parse_search, results_statement, search_json, tally_facets
+
+logger = logging.getLogger('volunteerhub.async_api')
+
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg', 'postgres': 'postgresql+asyncpg'}
+RETRY_AFTER = 1
+
+
+def async_url(url, instance_path):
+    """A database URL with an async driver; relative SQLite paths resolve against the instance folder"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver configured for {backend!r}; set ASYNC_DATABASE_URL')
+    if '+' not in url.drivername:
+        url = url.set(drivername=ASYNC_DRIVERS[backend])
+    # As Flask-SQLAlchemy does for the sync engine
+    if backend == 'sqlite' and url.database and url.database != ':memory:' and not os.path.isabs(url.database):
+        url = url.set(database=os.path.join(instance_path, url.database))
+    return url
+
+
+class AsyncAPI:
+    """ASGI app serving read-only JSON endpoints from an async engine"""
+
+    def __init__(self, config=None):
+        # A bare Flask app for its config, instance folder and session-cookie signing; it serves nothing
+        self.flask_app = Flask(__name__)
+        self.flask_app.config.from_object(Config)
+        if config:
+            self.flask_app.config.from_mapping(config)
+        self.config = self.flask_app.config
+        self.max_concurrency = self.config['ASYNC_API_MAX_CONCURRENCY']
+        self.max_waiting = self.config['ASYNC_API_MAX_WAITING']
+        self.rate_limiter = RateLimiter(self.flask_app)
+        self.engine = None
+        self.sessions = None
+        self._slots = None
+        self._waiting = 0
+        self.routes = {
+            '/api/opportunities': self.opportunities,
+            '/api/availability': self.availability,
+            '/api/search': self.search,
+            '/search': self.search,
+        }
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        """Create the engine and the concurrency limit; runs at startup, or on the first request"""
+        if self.engine is not None:
+            return
+        url = async_url(self.config.get('ASYNC_DATABASE_URL') or self.config['SQLALCHEMY_DATABASE_URI'],
+                        self.flask_app.instance_path)
+        options = {}
+        if url.database != ':memory:':
+            options = {'pool_size': self.max_concurrency, 'max_overflow': 0}
+        self.engine = create_async_engine(url, **options)
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+
+    async def stop(self):
+        if self.engine is not None:
+            await self.engine.dispose()
+            self.engine = None
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    self.start()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    # ---------- requests ----------
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+        handler = self.routes.get(scope['path'])
+        if handler is None:
+            return await self._send(scope, send, 404, {'success': False, 'message': 'Not found'})
+        if scope['method'] not in ('GET', 'HEAD'):
+            return await self._send(scope, send, 405, {'success': False, 'message': 'Method not allowed'},
+                                    [(b'allow', b'GET, HEAD')])
+        self.start()
+        if self._slots.locked() and self._waiting >= self.max_waiting:
+            return await self._send(scope, send, 503, {'success': False, 'message': 'Server busy, try again'},
+                                    [(b'retry-after', str(RETRY_AFTER).encode())])
+        args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True))
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            status, body, headers = await handler(scope, args)
+        except HTTPException as e:
+            status, body, headers = e.code, {'success': False, 'message': e.description}, []
+        except Exception:
+            logger.exception('Unhandled error on %s', scope['path'])
+            status, body, headers = 500, {'success': False, 'message': 'Internal server error'}, []
+        finally:
+            self._slots.release()
+        await self._send(scope, send, status, body, headers)
+
+    async def _send(self, scope, send, status, body, headers=()):
+        # Same serialization as Flask's jsonify outside debug mode
+        payload = json.dumps(body, sort_keys=True, separators=(',', ':')).encode() + b'\n'
+        await send({'type': 'http.response.start', 'status': status, 'headers': [
+            (b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode()), *headers,
+        ]})
+        await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else payload})
+
+    # ---------- endpoints ----------
+
+    async def opportunities(self, scope, args):
+        async with self.sessions() as session:
+            rows = (await session.execute(map_statement())).all()
+        return 200, map_markers(rows), []
+
+    async def availability(self, scope, args):
+        ids, start, end = availability_request(args)
+        result = Availability(ids, start, end, active_only=ids is None)
+        rows = []
+        if result.opportunity_ids != []:
+            async with self.sessions() as session:
+                rows = (await session.execute(result.statement())).all()
+        result.fill(rows)
+        return 200, result.columns(), []
+
+    async def search(self, scope, args):
+        retry_after = await self._rate_limit('search', scope)
+        if retry_after:
+            return 429, {'success': False, 'message': 'Too many requests. Please wait a moment and try again.'}, \
+                [(b'retry-after', str(max(math.ceil(retry_after), 1)).encode())]
+        params = parse_search(args)
+        today = date.today()
+        async with self.sessions() as session:
+            facets, total = tally_facets((await session.execute(facet_statement(params, today))).all(), params)
+            page, pages = paginate(params, total)
+            results = (await session.scalars(results_statement(params, page, PER_PAGE, today))).all()
+            names = {}
+            if results:
+                names = dict((await session.execute(
+                    select(Opportunity.id, Organization.name).join(
+                        Organization, Organization.id == Opportunity.organization_id
+                    ).where(Opportunity.id.in_([opp.id for opp in results]))
+                )).all())
+        found = {'results': results, 'facets': facets, 'total': total, 'page': page, 'pages': pages}
+        return 200, search_json(found, names), []
+
+    # ---------- rate limits ----------
+
+    def _user_id(self, scope):
+        """The signed-in user id from the Flask session cookie, as the Flask rate limiter reads it"""
+        cookie = SimpleCookie()
+        for name, value in scope['headers']:
+            if name == b'cookie':
+                cookie.load(value.decode('latin-1'))
+        morsel = cookie.get(self.config['SESSION_COOKIE_NAME'])
+        if morsel is None:
+            return None
+        serializer = self.flask_app.session_interface.get_signing_serializer(self.flask_app)
+        try:
+            session = serializer.loads(morsel.value,
+                                       max_age=int(self.config['PERMANENT_SESSION_LIFETIME'].total_seconds()))
+        except BadSignature:
+            return None
+        return session.get('_user_id')
+
+    async def _rate_limit(self, name, scope):
+        """Seconds to wait if the client is over the ``name`` limit, else 0"""
+        limiter = self.rate_limiter
+        if not limiter.enabled or name not in limiter.rules:
+            return 0
+        capacity, rate = limiter.rules[name]
+        keys = [('ip', (scope.get('client') or ('unknown',))[0])]
+        user_id = self._user_id(scope)
+        if user_id:
+            keys.append(('user', user_id))
+        now = time.time()
+        retry_after = 0
+        try:
+            for kind, value in keys:
+                # The bucket store is a blocking SQLite file shared with the Flask workers
+                allowed, tokens = await asyncio.to_thread(limiter.store.hit, f'{name}:{kind}:{value}',
+                                                          capacity, rate, now)
+                if not allowed:
+                    retry_after = max(retry_after, (1 - tokens) / rate)
+        except sqlite3.Error:
+            logger.warning('Rate limit store unavailable; allowing request', exc_info=True)
+            return 0
+        return retry_after
+
+
+app = AsyncAPI()
@@ -0,0 +1,247 @@
+"""Type-ahead suggestions for the search box.
+
+Upcoming, active opportunities are kept in memory. Their titles,
+organization names, categories and cities go into one sorted array of
+``(term, suggestion)`` pairs, where the terms are each label and each
+word-suffix of it ("food bank", "bank"). A prefix lookup is then one
+bisect plus a short scan. Suggestions are ranked by popularity (confirmed
+bookings) and by how soon the opportunity is, so ``/api/autocomplete``
+answers from memory without a query.
+
+Opportunity and organization writes mark ids dirty after commit, like the
+recommendation index. The next lookup reloads only those opportunities. A
+full rebuild every ``AUTOCOMPLETE_INDEX_TTL`` seconds picks up other
+workers' writes and refreshes booking counts.
+"""
+import bisect
+import math
+import re
+import threading
+import time
+from datetime import date
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db, Booking, Opportunity, Organization
+
+# Matches scanned per lookup; short prefixes stop here rather than walk the whole index
+MAX_MATCHES = 500
+DATE_WEIGHT = 2.0
+PREFIX_BONUS = 1.0  # the label itself starts with the query, not just a later word
+
+
+def normalize(text):
+    """Lowercase words separated by single spaces"""
+    return ' '.join(re.findall(r'[a-z0-9]+', (text or '').lower()))
+
+
+def _terms(label):
+    """The label and every word-suffix of it: 'food bank' -> ['food bank', 'bank']"""
+    words = normalize(label).split()
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+class AutocompleteIndex:
+    """Sorted prefix index over upcoming opportunities and their organizations, categories and cities"""
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._terms = []  # sorted (term, key)
+        self._opportunities = {}  # id -> entry
+        self._groups = {}  # ('organization' | 'category' | 'city', value) -> group
+        self._dirty = set()
+        self._built_at = None
+        self.ttl = 300
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read config and subscribe to session commits"""
+        self.ttl = app.config.get('AUTOCOMPLETE_INDEX_TTL', 300)
+        if not event.contains(Session, 'after_commit', self._apply_changes):
+            event.listen(Session, 'after_flush', _collect_changes)
+            event.listen(Session, 'after_commit', self._apply_changes)
+            event.listen(Session, 'after_rollback', _discard_changes)
+        app.extensions['autocomplete'] = self
+
+    # ---------- maintenance ----------
+
+    def _apply_changes(self, session):
+        changed = session.info.pop('autocomplete_dirty', None)
+        if changed:
+            with self._lock:
+                self._dirty |= changed
+
+    def invalidate(self):
+        """Force a full rebuild on the next lookup"""
+        with self._lock:
+            self._built_at = None
+
+    def _ensure_fresh(self):
+        stale = self._built_at is None or time.monotonic() - self._built_at > self.ttl
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if stale:
+            self._rebuild()
+        elif dirty:
+            self._refresh(dirty)
+
+    def _rebuild(self):
+        entries = self._load_entries(None)
+        with self._lock:
+            self._terms = []
+            self._opportunities = {}
+            self._groups = {}
+            for entry in entries.values():
+                self._add(entry, sort=False)
+            self._terms.sort()
+            self._built_at = time.monotonic()
+
+    def _refresh(self, changed):
+        """Reload changed opportunities; ('organization', id) marks reload all of its opportunities"""
+        with self._lock:
+            opportunity_ids = {value for kind, value in changed if kind == 'opportunity'}
+            for kind, value in changed:
+                if kind == 'organization':
+                    group = self._groups.get(('organization', value))
+                    opportunity_ids |= group['members'] if group else set()
+        entries = self._load_entries(opportunity_ids, {value for kind, value in changed if kind == 'organization'})
+        with self._lock:
+            # Remove every changed opportunity before adding any, so a renamed group is rebuilt with its new label
+            for opp_id in opportunity_ids | set(entries):
+                self._remove(opp_id)
+            for entry in entries.values():
+                self._add(entry)
+
+    def _load_entries(self, opportunity_ids, organization_ids=()):
+        query = db.session.query(
+            Opportunity.id, Opportunity.title, Opportunity.category, Opportunity.city, Opportunity.date,
+            Opportunity.organization_id, Organization.name.label('organization')
+        ).outerjoin(Organization, Organization.id == Opportunity.organization_id).filter(
+            Opportunity.is_active == True, Opportunity.date >= date.today()
+        )
+        if opportunity_ids is not None:
+            query = query.filter(db.or_(Opportunity.id.in_(opportunity_ids),
+                                        Opportunity.organization_id.in_(organization_ids)))
+        entries = {row.id: {
+            'id': row.id,
+            'title': row.title,
+            'date': row.date,
+            'bookings': 0,
+            'groups': [key for key in (
+                ('organization', row.organization_id, row.organization),
+                ('category', (row.category or '').lower(), row.category),
+                ('city', (row.city or '').lower(), row.city),
+            ) if key[1] and key[2]],
+        } for row in query}
+        if entries:
+            counts = db.session.query(Booking.opportunity_id, db.func.count(Booking.id)).filter(
+                Booking.opportunity_id.in_(list(entries)), Booking.status == 'confirmed'
+            ).group_by(Booking.opportunity_id)
+            for opp_id, count in counts:
+                entries[opp_id]['bookings'] = count
+        return entries
+
+    def _insert_terms(self, label, key, sort):
+        for term in _terms(label):
+            if sort:
+                bisect.insort(self._terms, (term, key))
+            else:
+                self._terms.append((term, key))
+
+    def _delete_terms(self, label, key):
+        for term in _terms(label):
+            i = bisect.bisect_left(self._terms, (term, key))
+            if i < len(self._terms) and self._terms[i] == (term, key):
+                del self._terms[i]
+
+    def _add(self, entry, sort=True):
+        self._opportunities[entry['id']] = entry
+        self._insert_terms(entry['title'], ('opportunity', entry['id']), sort)
+        for kind, value, label in entry['groups']:
+            group = self._groups.get((kind, value))
+            if group is None:
+                group = self._groups[(kind, value)] = {'label': label, 'members': set(), 'bookings': 0}
+                self._insert_terms(label, (kind, value), sort)
+            group['members'].add(entry['id'])
+            group['bookings'] += entry['bookings']
+
+    def _remove(self, opp_id):
+        entry = self._opportunities.pop(opp_id, None)
+        if entry is None:
+            return
+        self._delete_terms(entry['title'], ('opportunity', opp_id))
+        for kind, value, label in entry['groups']:
+            group = self._groups[(kind, value)]
+            group['members'].discard(opp_id)
+            group['bookings'] -= entry['bookings']
+            if not group['members']:
+                self._delete_terms(group['label'], (kind, value))
+                del self._groups[(kind, value)]
+
+    # ---------- queries ----------
+
+    def _score(self, key, prefix, today):
+        if key[0] == 'opportunity':
+            entry = self._opportunities[key[1]]
+            label = entry['title']
+            score = math.log1p(entry['bookings']) + DATE_WEIGHT / (1 + (entry['date'] - today).days / 7.0)
+        else:
+            group = self._groups[key]
+            label = group['label']
+            score = math.log1p(len(group['members'])) + math.log1p(group['bookings'])
+        if normalize(label).startswith(prefix):
+            score += PREFIX_BONUS
+        return score
+
+    def suggest(self, query, limit=8):
+        """Best suggestions for a typed prefix, as dicts with kind, label and the value to search or open"""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        self._ensure_fresh()
+        today = date.today()
+        with self._lock:
+            keys = set()
+            i = bisect.bisect_left(self._terms, (prefix,))
+            while i < len(self._terms) and len(keys) < MAX_MATCHES and self._terms[i][0].startswith(prefix):
+                keys.add(self._terms[i][1])
+                i += 1
+            keys = [key for key in keys
+                    if key[0] != 'opportunity' or self._opportunities[key[1]]['date'] >= today]
+            ranked = sorted(keys, key=lambda key: self._score(key, prefix, today), reverse=True)[:limit]
+            return [self._suggestion(key) for key in ranked]
+
+    def _suggestion(self, key):
+        kind, value = key
+        if kind == 'opportunity':
+            entry = self._opportunities[value]
+            return {'kind': kind, 'label': entry['title'], 'id': value, 'date': entry['date'].isoformat()}
+        group = self._groups[key]
+        suggestion = {'kind': kind, 'label': group['label'], 'count': len(group['members'])}
+        if kind == 'organization':
+            suggestion['id'] = value
+        return suggestion
+
+
+def _collect_changes(session, flush_context):
+    """Remember which opportunities and organizations a flush touched until the transaction commits"""
+    changed = session.info.setdefault('autocomplete_dirty', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Opportunity) and obj.id is not None:
+            changed.add(('opportunity', obj.id))
+        elif isinstance(obj, Organization) and obj.id is not None:
+            changed.add(('organization', obj.id))
+
+
+def _discard_changes(session):
+    session.info.pop('autocomplete_dirty', None)
+
+
+def mark_changed(session, opportunity_ids):
+    """Reload opportunities changed by set-based statements once ``session`` commits"""
+    session.info.setdefault('autocomplete_dirty', set()).update(('opportunity', opp_id) for opp_id in opportunity_ids)
+
+
+autocomplete_index = AutocompleteIndex()
@@ -0,0 +1,95 @@
+"""Remaining capacity per time slot, for many opportunities at once.
+
+``Opportunity.spots_remaining`` loads every slot and every booking of each
+opportunity it is called on. ``availability()`` answers the same question
+for a whole page in one GROUP BY: one row per time slot, and one per
+opportunity without slots, each with its capacity minus confirmed bookings.
+The counting rules match the model properties.
+
+The result is columnar, parallel lists of opportunity ids, slot ids (None
+for slot-less opportunities) and remaining spots, and it is read lazily. A
+page can build one up front and pass it to the template, and the query
+only runs if a spots figure misses the fragment cache. ``/api/availability``
+serves the same columns as JSON.
+"""
+from sqlalchemy import select
+
+from models import db, Booking, Opportunity, TimeSlot
+
+MAX_IDS = 500
+
+
+class Availability:
+    """Lazily loaded remaining spots for a set of opportunities or a date range"""
+
+    def __init__(self, opportunity_ids=None, start=None, end=None, active_only=False):
+        self.opportunity_ids = None if opportunity_ids is None else sorted(set(opportunity_ids))
+        self.start = start
+        self.end = end
+        self.active_only = active_only
+        self._columns = None
+        self._by_opportunity = None
+        self._by_slot = None
+
+    def _load(self):
+        if self._columns is None:
+            self.fill(db.session.execute(self.statement()) if self.opportunity_ids != [] else [])
+
+    def fill(self, rows):
+        """Load ``(opportunity_id, slot_id, remaining)`` rows of ``statement()`` run elsewhere (async_api.py)"""
+        columns = {'opportunity_ids': [], 'slot_ids': [], 'remaining': []}
+        for opp_id, slot_id, remaining in rows:
+            columns['opportunity_ids'].append(opp_id)
+            columns['slot_ids'].append(slot_id)
+            columns['remaining'].append(remaining)
+        self._columns = columns
+        self._by_opportunity = {}
+        self._by_slot = {}
+        for opp_id, slot_id, remaining in zip(*columns.values()):
+            self._by_opportunity[opp_id] = self._by_opportunity.get(opp_id, 0) + remaining
+            if slot_id is not None:
+                self._by_slot[slot_id] = remaining
+
+    def statement(self):
+        """The GROUP BY, one row per time slot and per opportunity without slots"""
+        # A slotted opportunity counts its slots' bookings; one without slots counts its own
+        booked = db.and_(Booking.status == 'confirmed', db.or_(
+            Booking.time_slot_id == TimeSlot.id,
+            db.and_(TimeSlot.id.is_(None), Booking.opportunity_id == Opportunity.id),
+        ))
+        statement = select(
+            Opportunity.id, TimeSlot.id,
+            db.func.coalesce(TimeSlot.spots_available, Opportunity.spots_available, 0) - db.func.count(Booking.id)
+        ).outerjoin(TimeSlot, TimeSlot.opportunity_id == Opportunity.id).outerjoin(Booking, booked)
+        if self.opportunity_ids is not None:
+            statement = statement.where(Opportunity.id.in_(self.opportunity_ids))
+        if self.start is not None:
+            statement = statement.where(Opportunity.date >= self.start)
+        if self.end is not None:
+            statement = statement.where(Opportunity.date <= self.end)
+        if self.active_only:
+            statement = statement.where(Opportunity.is_active == True)
+        return statement.group_by(Opportunity.id, TimeSlot.id).order_by(Opportunity.id, TimeSlot.id)
+
+    def remaining(self, opportunity_id):
+        """Spots left across an opportunity's slots, as ``Opportunity.spots_remaining``"""
+        self._load()
+        return self._by_opportunity.get(opportunity_id, 0)
+
+    def slot_remaining(self, slot_id):
+        """Spots left in one time slot, as ``TimeSlot.spots_remaining``"""
+        self._load()
+        return self._by_slot.get(slot_id, 0)
+
+    def columns(self):
+        """Parallel lists: ``opportunity_ids``, ``slot_ids`` and ``remaining``"""
+        self._load()
+        return self._columns
+
+
+def availability(opportunities=None, start=None, end=None, active_only=False):
+    """Availability for opportunities (objects or ids) and/or an inclusive date range"""
+    ids = None
+    if opportunities is not None:
+        ids = [opp if isinstance(opp, int) else opp.id for opp in opportunities]
+    return Availability(ids, start, end, active_only)
@@ -0,0 +1,78 @@
+"""Closed-loop HTTP load generator for comparing server configurations.
+
+Runs CONCURRENCY client threads, each reusing one keep-alive connection
+and requesting the given paths in turn for DURATION seconds, then prints
+throughput and latency percentiles.
+
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000 --concurrency 32 --duration 20 / /map /api/opportunities
+
+See DEPLOYMENT.md ("Local load test") for the worker-scaling procedure.
+"""
+import argparse
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def client(host, port, paths, deadline, latencies, errors):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    i = 0
+    while time.monotonic() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException) as exc:
+            errors.append(type(exc).__name__)
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def percentile(values, pct):
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('paths', nargs='*', default=['/', '/map', '/opportunity/1', '/api/opportunities'])
+    args = parser.parse_args()
+
+    target = urlsplit(args.url)
+    latencies, errors = [], []
+    deadline = time.monotonic() + args.duration
+    threads = [threading.Thread(target=client, args=(target.hostname, target.port or 80, args.paths,
+                                                     deadline, latencies, errors))
+               for _ in range(args.concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    print(f'requests   {len(latencies)} ok, {len(errors)} errors in {elapsed:.1f}s')
+    print(f'throughput {len(latencies) / elapsed:.1f} req/s')
+    if latencies:
+        print(f'latency    p50 {percentile(latencies, 50) * 1000:.1f} ms  '
+              f'p95 {percentile(latencies, 95) * 1000:.1f} ms  '
+              f'p99 {percentile(latencies, 99) * 1000:.1f} ms  '
+              f'mean {statistics.mean(latencies) * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
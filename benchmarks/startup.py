@@ -0,0 +1,51 @@
+"""Measure how long a fresh worker takes to import the app and how much memory it holds.
+
+Each run starts a new interpreter (as a prefork server does for every
+worker), imports ``app`` and reports wall time and peak RSS.
+
+    python benchmarks/startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'import_ms': elapsed * 1000, 'rss_mb': rss_kb / 1024,
+                  'modules': len(sys.modules)}))
+"""
+
+
+def measure(runs):
+    env = dict(os.environ, TASK_WORKER_THREADS='0', COMPLETE_BOOKINGS_INTERVAL='0')
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env,
+                             capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    samples = measure(args.runs)
+    for key, unit in (('import_ms', 'ms'), ('rss_mb', 'MB'), ('modules', '')):
+        values = [s[key] for s in samples]
+        print(f'{key:10} median {statistics.median(values):8.1f} {unit:2}  '
+              f'min {min(values):8.1f}  max {max(values):8.1f}')
+
+
+if __name__ == '__main__':
+    main()
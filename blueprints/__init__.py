@@ -0,0 +1,9 @@
+"""Route blueprints, one per portal"""
+from blueprints import admin, api, auth, cli, organization, public, volunteer
+
+ALL = (public.bp, auth.bp, volunteer.bp, organization.bp, admin.bp, api.bp, cli.bp)
+
+
+def register_blueprints(app):
+    for bp in ALL:
+        app.register_blueprint(bp)
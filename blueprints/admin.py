@@ -0,0 +1,259 @@
+"""Admin portal"""
+from datetime import datetime, timedelta
+
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, abort, send_file
+from flask_login import login_user, login_required, current_user
+from werkzeug.security import check_password_hash
+
+from models import db, User, Opportunity, Booking, Organization
+from access import admin_required
+from ratelimit import rate_limit
+from fragment_cache import fragment_cache
+from profiling import profiler
+from slow_queries import slow_query_log
+from analytics import series, series_args
+from ledger import hours_for_month, total_hours as ledger_total_hours
+from moderation import (cancel_bookings, delete_opportunities, parse_ids, set_opportunities_active,
+                        set_organizations_verified)
+from exports import (BOOKING_HEADER, VOLUNTEER_HEADER, booking_rows, csv_response, export_filename,
+                     parse_filters, volunteer_rows)
+
+bp = Blueprint('admin', __name__)
+
+
+# ==================== ADMIN PORTAL ====================
+@bp.route('/admin/login', methods=['GET', 'POST'])
+@rate_limit('login', by=('ip', 'email'), methods=('POST',))
+def admin_login():
+    """Admin login page"""
+    if current_user.is_authenticated and current_user.role == 'admin':
+        return redirect(url_for('admin.admin_dashboard'))
+    
+    if request.method == 'POST':
+        email = request.form.get('email')
+        password = request.form.get('password')
+        
+        user = User.query.filter_by(email=email, role='admin').first()
+        
+        if user and check_password_hash(user.password_hash, password):
+            login_user(user)
+            user.last_login = datetime.utcnow()
+            db.session.commit()
+            return redirect(url_for('admin.admin_dashboard'))
+        else:
+            flash('Invalid admin credentials', 'danger')
+    
+    return render_template('admin_login.html')
+
+@bp.route('/admin/dashboard')
+@login_required
+@admin_required
+def admin_dashboard():
+    """Admin dashboard with statistics"""
+    # Calculate statistics
+    total_users = User.query.count()
+    volunteers = User.query.filter_by(role='volunteer').count()
+    organizations_count = User.query.filter_by(role='organization').count()
+    
+    total_opportunities = Opportunity.query.count()
+    active_opportunities = Opportunity.query.filter_by(is_active=True).count()
+    
+    total_bookings = Booking.query.count()
+    confirmed_bookings = Booking.query.filter_by(status='confirmed').count()
+    
+    total_hours = ledger_total_hours()
+    hours_this_month = hours_for_month(datetime.utcnow().strftime('%Y-%m'))
+    
+    stats = {
+        'total_users': total_users,
+        'volunteers': volunteers,
+        'organizations': organizations_count,
+        'total_opportunities': total_opportunities,
+        'active_opportunities': active_opportunities,
+        'total_bookings': total_bookings,
+        'confirmed_bookings': confirmed_bookings,
+        'total_hours': total_hours,
+        'hours_this_month': hours_this_month
+    }
+    
+    # Recent activity
+    recent_users = User.query.order_by(User.created_at.desc()).limit(5).all()
+    recent_bookings = Booking.query.order_by(Booking.created_at.desc()).limit(5).all()
+    
+    recent_activity = []
+    for user in recent_users:
+        recent_activity.append({
+            'time': user.created_at.strftime('%Y-%m-%d %H:%M'),
+            'description': f'New {user.role} registered: {user.full_name or user.username}'
+        })
+    
+    for booking in recent_bookings:
+        recent_activity.append({
+            'time': booking.created_at.strftime('%Y-%m-%d %H:%M'),
+            'description': f'New booking: {booking.user.username} → {booking.opportunity.title}'
+        })
+    
+    recent_activity = sorted(recent_activity, key=lambda x: x['time'], reverse=True)[:10]
+    
+    # Last 30 days from the daily rollups (one indexed range scan)
+    today = datetime.utcnow().date()
+    trend = series(today - timedelta(days=29), today)
+    
+    return render_template('admin_dashboard.html', stats=stats, recent_activity=recent_activity, trend=trend)
+
+@bp.route('/admin/users')
+@login_required
+@admin_required
+def admin_users():
+    """Admin users management page"""
+    users = User.query.order_by(User.created_at.desc()).all()
+    return render_template('admin_users.html', users=users)
+
+@bp.route('/admin/organizations', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def admin_organizations():
+    """Admin organizations management page"""
+    if request.method == 'POST':
+        action = request.form.get('action')
+        ids = parse_ids(request.form, 'organization_id')
+        
+        if action in ('verify', 'unverify') and ids:
+            count = set_organizations_verified(ids, action == 'verify')
+            db.session.commit()
+            if action == 'verify':
+                flash(f'{count} organization(s) verified', 'success')
+            else:
+                flash(f'Verification removed from {count} organization(s)', 'warning')
+        return redirect(url_for('admin.admin_organizations'))
+    
+    organizations = Organization.query.order_by(Organization.created_at.desc()).all()
+    total_opportunities = Opportunity.query.count()
+    return render_template('admin_organizations.html', 
+                         organizations=organizations,
+                         total_opportunities=total_opportunities)
+
+@bp.route('/admin/opportunities', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def admin_opportunities():
+    """Admin opportunities management page"""
+    if request.method == 'POST':
+        action = request.form.get('action')
+        ids = parse_ids(request.form, 'opportunity_id')
+        
+        if action and ids:
+            if action in ('activate', 'deactivate'):
+                count = set_opportunities_active(ids, action == 'activate')
+                flash(f'{count} opportunity(ies) {action}d', 'success' if action == 'activate' else 'warning')
+            elif action == 'delete':
+                count = delete_opportunities(ids)
+                flash(f'{count} opportunity(ies) deleted with their time slots and bookings', 'info')
+            db.session.commit()
+        return redirect(url_for('admin.admin_opportunities'))
+    
+    opportunities = Opportunity.query.order_by(Opportunity.created_at.desc()).all()
+    total_bookings = Booking.query.count()
+    total_hours = db.session.query(db.func.sum(Opportunity.hours)).scalar() or 0
+    return render_template('admin_opportunities.html', 
+                         opportunities=opportunities,
+                         total_bookings=total_bookings,
+                         total_hours=total_hours)
+
+@bp.route('/admin/bookings', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def admin_bookings():
+    """Admin bookings management page"""
+    if request.method == 'POST':
+        action = request.form.get('action')
+        ids = parse_ids(request.form, 'booking_id')
+        
+        if action == 'cancel' and ids:
+            count = cancel_bookings(ids)
+            db.session.commit()
+            flash(f'{count} booking(s) cancelled', 'info')
+        return redirect(url_for('admin.admin_bookings'))
+    
+    bookings = Booking.query.order_by(Booking.created_at.desc()).all()
+    unique_volunteers = db.session.query(Booking.user_id).distinct().count()
+    total_hours = db.session.query(db.func.sum(Opportunity.hours)).join(Booking).scalar() or 0
+    return render_template('admin_bookings.html', 
+                         bookings=bookings,
+                         unique_volunteers=unique_volunteers,
+                         total_hours=total_hours)
+
+@bp.route('/admin/bookings/export.csv')
+@login_required
+@admin_required
+def admin_export_bookings():
+    """Stream all bookings as CSV (?from=&to=&status=&organization_id=)"""
+    filters = parse_filters(request.args)
+    organization_id = request.args.get('organization_id', type=int)
+    return csv_response(export_filename('bookings', filters), BOOKING_HEADER,
+                        booking_rows(filters, organization_id))
+
+@bp.route('/admin/volunteers/export.csv')
+@login_required
+@admin_required
+def admin_export_volunteers():
+    """Stream per-volunteer booking totals as CSV (?from=&to=&status=&organization_id=)"""
+    filters = parse_filters(request.args)
+    organization_id = request.args.get('organization_id', type=int)
+    return csv_response(export_filename('volunteers', filters), VOLUNTEER_HEADER,
+                        volunteer_rows(filters, organization_id))
+
+@bp.route('/admin/cache-stats')
+@login_required
+@admin_required
+def admin_cache_stats():
+    """Fragment cache hit/miss counters for sizing FRAGMENT_CACHE_MAX_BYTES"""
+    return jsonify(fragment_cache.stats())
+
+@bp.route('/admin/profiles')
+@bp.route('/admin/profiles/<route>')
+@login_required
+@admin_required
+def admin_profiles(route=None):
+    """Sampled request profiles: hottest endpoints, and the hottest functions of one (?sort=tottime|cumtime)"""
+    routes = profiler.routes()
+    sort = request.args.get('sort') if request.args.get('sort') in ('tottime', 'cumtime') else 'tottime'
+    functions = profiler.hot_functions(route, sort) if route else []
+    if route and not functions:
+        abort(404)
+    samples = profiler.files(route) if route else []
+    return render_template('admin_profiles.html', routes=routes, endpoint=route, sort=sort,
+                           functions=functions, samples=samples, sample_rate=profiler.sample_rate)
+
+@bp.route('/admin/profiles/<route>/<name>')
+@login_required
+@admin_required
+def admin_profile_download(route, name):
+    """Download one pstats file (open with snakeviz or python -m pstats)"""
+    path = profiler.path(route, name)
+    if path is None:
+        abort(404)
+    return send_file(path, as_attachment=True, download_name=f'{route}-{name}')
+
+@bp.route('/admin/slow-queries')
+@bp.route('/admin/slow-queries/<query_id>')
+@login_required
+@admin_required
+def admin_slow_queries(query_id=None):
+    """Logged slow statements ranked by total time, with one's plan, routes and parameter shapes"""
+    statements = slow_query_log.report()
+    selected = next((stats for stats in statements if stats['id'] == query_id), None)
+    if query_id and selected is None:
+        abort(404)
+    return render_template('admin_slow_queries.html', statements=statements, selected=selected,
+                           threshold_ms=slow_query_log.threshold * 1000, enabled=slow_query_log.enabled)
+
+@bp.route('/admin/api/activity')
+@login_required
+@admin_required
+def admin_activity_series():
+    """Daily activity series for charts (?from=&to=&interval=&organization_id=&category=&group_by=)"""
+    try:
+        return jsonify(series_args(request.args, request.args.get('organization_id', type=int)))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
@@ -0,0 +1,151 @@
+"""JSON API"""
+import hmac
+
+from flask import Blueprint, abort, current_app, flash, jsonify, redirect, request, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import select
+
+from models import db, Opportunity, Organization, User
+from autocomplete import autocomplete_index
+from availability import MAX_IDS, availability
+from calendar_feeds import (feed_range, ics_response, not_modified, organization_rows, parse_range,
+                            read_feed_token, reset_feed_token, version, volunteer_rows)
+from metrics import metrics
+
+bp = Blueprint('api', __name__)
+
+
+# ==================== API ENDPOINTS ====================
+# The statements and row formatting below are shared with the async tier (async_api.py)
+def map_statement():
+    """Active opportunities with coordinates and their organization's name, in one query"""
+    return select(
+        Opportunity.id, Opportunity.title, Organization.name, Opportunity.latitude, Opportunity.longitude,
+        Opportunity.date, Opportunity.time, Opportunity.hours, Opportunity.category, Opportunity.spots_available
+    ).outerjoin(Organization, Organization.id == Opportunity.organization_id).where(
+        Opportunity.is_active == True, Opportunity.latitude.isnot(None), Opportunity.longitude.isnot(None)
+    ).order_by(Opportunity.id)
+
+
+def map_markers(rows):
+    return [{
+        'id': opp_id,
+        'title': title,
+        'organization': organization or 'Unknown',
+        'latitude': latitude,
+        'longitude': longitude,
+        'date': day.isoformat() if day else None,
+        'time': time,
+        'hours': hours,
+        'category': category,
+        'spots_available': spots
+    } for opp_id, title, organization, latitude, longitude, day, time, hours, category, spots in rows
+        if latitude and longitude]
+
+
+def availability_request(args):
+    """``(ids, start, end)`` from ``?ids=1,2,3`` and/or ``?from=&to=``; 400 on bad input"""
+    ids = None
+    if args.get('ids'):
+        try:
+            ids = [int(value) for value in args['ids'].split(',') if value.strip()]
+        except ValueError:
+            abort(400, 'ids must be comma-separated integers')
+        if len(ids) > MAX_IDS:
+            abort(400, f'At most {MAX_IDS} ids per request')
+    start = end = None
+    if ids is None or 'from' in args or 'to' in args:
+        start, end = parse_range(args)
+    return ids, start, end
+
+
+@bp.route('/api/opportunities')
+def api_opportunities():
+    """API endpoint for opportunities (for map)"""
+    return jsonify(map_markers(db.session.execute(map_statement())))
+
+
+@bp.route('/api/autocomplete')
+def api_autocomplete():
+    """Search box suggestions for a typed prefix (?q=&limit=), served from memory"""
+    limit = min(max(request.args.get('limit', 8, type=int), 1), 20)
+    response = jsonify(autocomplete_index.suggest(request.args.get('q', ''), limit))
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    return response
+
+
+@bp.route('/api/availability')
+def api_availability():
+    """Remaining spots per time slot as parallel arrays (?ids=1,2,3 and/or ?from=&to=), from one GROUP BY"""
+    ids, start, end = availability_request(request.args)
+    return jsonify(availability(ids, start, end, active_only=ids is None).columns())
+
+
+# ==================== CALENDAR ====================
+def _calendar_owner(user):
+    if user.role == 'organization' and user.organization_id:
+        return 'organization', user.organization_id
+    return 'user', user.id
+
+
+def _calendar_events(owner, owner_id, start, end):
+    rows = organization_rows if owner == 'organization' else volunteer_rows
+    return rows(owner_id, start, end)
+
+
+@bp.route('/api/calendar')
+@login_required
+def api_calendar():
+    """The signed-in volunteer's bookings, or organization's slots, from one query (?from=&to=)"""
+    owner, owner_id = _calendar_owner(current_user)
+    start, end = parse_range(request.args)
+    etag = version(owner, owner_id, start, end)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    events = [{key: value.isoformat() if hasattr(value, 'isoformat') else value for key, value in event.items()}
+              for event in _calendar_events(owner, owner_id, start, end)]
+    response = jsonify({'from': start.isoformat(), 'to': end.isoformat(), 'events': events})
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@bp.route('/calendar/<token>.ics')
+def calendar_feed(token):
+    """Subscribable iCalendar feed for a volunteer or organization; the token is the credential"""
+    owner, owner_id = read_feed_token(token)
+    model = Organization if owner == 'organization' else User
+    name = db.session.query(model.name if owner == 'organization' else model.username).filter(
+        model.id == owner_id).scalar()
+    if name is None:
+        abort(404)
+    start, end = feed_range()
+    etag = version(owner, owner_id, start, end)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    return ics_response(f'VolunteerHub: {name}', _calendar_events(owner, owner_id, start, end), etag)
+
+
+@bp.route('/calendar/reset', methods=['POST'])
+@login_required
+def reset_calendar_feed():
+    """Revoke the signed-in user's calendar link; the dashboard then shows a new one"""
+    owner, owner_id = _calendar_owner(current_user)
+    reset_feed_token(owner, owner_id)
+    db.session.commit()
+    flash('Calendar link reset. Subscribe again with the new link; the old one no longer works.', 'success')
+    return redirect(url_for('organization.organization_dashboard' if owner == 'organization' else 'volunteer.dashboard'))
+
+
+# ==================== METRICS ====================
+@bp.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint; needs ``Authorization: Bearer <METRICS_TOKEN>`` when a token is set"""
+    if not metrics.enabled:
+        abort(404)
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(401)
+    return current_app.response_class(metrics.exposition(), mimetype='text/plain; version=0.0.4')
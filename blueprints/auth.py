@@ -0,0 +1,179 @@
+"""Volunteer sign-in, sign-up and Google OAuth"""
+import os
+from datetime import datetime
+
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask_login import login_user, logout_user, login_required, current_user
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from models import db, User
+from interests import set_user_interests
+from oauth import get_google, google_oauth_enabled
+from replicas import use_primary
+from ratelimit import rate_limit
+
+bp = Blueprint('auth', __name__)
+
+
+# ==================== AUTHENTICATION ====================
+@bp.route('/login', methods=['GET', 'POST'])
+@rate_limit('login', by=('ip', 'email'), methods=('POST',))
+def login():
+    """Login page - Eshaan"""
+    if current_user.is_authenticated:
+        # Redirect to appropriate dashboard based on role
+        if current_user.role == 'admin':
+            return redirect(url_for('admin.admin_dashboard'))
+        elif current_user.role == 'organization':
+            return redirect(url_for('organization.organization_dashboard'))
+        else:
+            return redirect(url_for('volunteer.dashboard'))
+    
+    if request.method == 'POST':
+        email = request.form.get('email')
+        password = request.form.get('password')
+        remember = request.form.get('remember', False)
+        
+        user = User.query.filter_by(email=email).first()
+        
+        if user and check_password_hash(user.password_hash, password):
+            login_user(user, remember=remember)
+            user.last_login = datetime.utcnow()
+            db.session.commit()
+            
+            # Redirect based on user role
+            next_page = request.args.get('next')
+            if next_page:
+                return redirect(next_page)
+            elif user.role == 'admin':
+                return redirect(url_for('admin.admin_dashboard'))
+            elif user.role == 'organization':
+                return redirect(url_for('organization.organization_dashboard'))
+            else:
+                return redirect(url_for('volunteer.dashboard'))
+        else:
+            flash('Invalid email or password', 'error')
+    
+    # Check if Google OAuth is configured
+    return render_template('login.html', google_oauth_enabled=google_oauth_enabled())
+
+@bp.route('/signup', methods=['GET', 'POST'])
+def signup():
+    """Signup page - Eshaan"""
+    if current_user.is_authenticated:
+        return redirect(url_for('volunteer.dashboard'))
+    
+    if request.method == 'POST':
+        email = request.form.get('email')
+        username = request.form.get('username')
+        password = request.form.get('password')
+        full_name = request.form.get('full_name')
+        
+        # Check if user exists
+        if User.query.filter_by(email=email).first():
+            flash('Email already registered', 'error')
+            return redirect(url_for('auth.signup'))
+        
+        if User.query.filter_by(username=username).first():
+            flash('Username already taken', 'error')
+            return redirect(url_for('auth.signup'))
+        
+        # Create new user
+        user = User(
+            email=email,
+            username=username,
+            full_name=full_name,
+            password_hash=generate_password_hash(password),
+            role='volunteer'
+        )
+        
+        db.session.add(user)
+        set_user_interests(user, request.form.getlist('interests'))
+        set_user_interests(user, request.form.getlist('skills'), kind='skill')
+        db.session.commit()
+        
+        login_user(user)
+        flash('Account created successfully!', 'success')
+        return redirect(url_for('volunteer.dashboard'))
+    
+    # Check if Google OAuth is configured
+    return render_template('signup.html', google_oauth_enabled=google_oauth_enabled())
+
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    flash('You have been logged out', 'info')
+    return redirect(url_for('public.index'))
+
+# ==================== GOOGLE OAUTH ====================
+@bp.route('/login/google')
+def google_login():
+    """Initiate Google OAuth login"""
+    # Check if Google OAuth is configured
+    if not google_oauth_enabled():
+        flash('Google Sign-In is not configured yet. Please contact the administrator or use email/password login.', 'warning')
+        return redirect(url_for('auth.login'))
+    
+    # Use localhost instead of 127.0.0.1 for better OAuth compatibility
+    redirect_uri = url_for('auth.google_authorize', _external=True, _scheme='http')
+    # Force localhost in the redirect URI
+    redirect_uri = redirect_uri.replace('127.0.0.1', 'localhost')
+    return get_google().authorize_redirect(redirect_uri)
+
+@bp.route('/authorize/google')
+@use_primary  # looks up the account it may be about to create
+def google_authorize():
+    """Handle Google OAuth callback"""
+    try:
+        token = get_google().authorize_access_token()
+        user_info = token.get('userinfo')
+        
+        if user_info:
+            email = user_info.get('email')
+            name = user_info.get('name')
+            google_id = user_info.get('sub')
+            
+            # Check if user exists
+            user = User.query.filter_by(email=email).first()
+            
+            if not user:
+                # Create new user with Google account
+                username = email.split('@')[0]
+                # Make username unique if it already exists
+                base_username = username
+                counter = 1
+                while User.query.filter_by(username=username).first():
+                    username = f"{base_username}{counter}"
+                    counter += 1
+                
+                user = User(
+                    email=email,
+                    username=username,
+                    full_name=name,
+                    password_hash=generate_password_hash(os.urandom(24).hex()),  # Random password
+                    role='volunteer'
+                )
+                db.session.add(user)
+                db.session.commit()
+                flash('Account created successfully with Google!', 'success')
+            else:
+                flash('Welcome back!', 'success')
+            
+            # Log the user in
+            login_user(user)
+            
+            # Redirect based on user role
+            if user.role == 'admin':
+                return redirect(url_for('admin.admin_dashboard'))
+            elif user.role == 'organization':
+                return redirect(url_for('organization.organization_dashboard'))
+            else:  # volunteer
+                return redirect(url_for('volunteer.dashboard'))
+        else:
+            flash('Failed to get user info from Google', 'error')
+            return redirect(url_for('auth.login'))
+            
+    except Exception as e:
+        flash(f'Authentication failed: {str(e)}', 'error')
+        return redirect(url_for('auth.login'))
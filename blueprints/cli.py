@@ -0,0 +1,186 @@
+"""Management commands (`flask init-db`, `flask task-worker`, ...)
+
+Job modules are imported inside each command so serving workers never load them.
+"""
+import click
+from flask import Blueprint, current_app
+
+from models import db
+
+# cli_group=None keeps the commands at the top level (`flask init-db`)
+bp = Blueprint('cli', __name__, cli_group=None)
+
+
+# ==================== DATABASE INITIALIZATION ====================
+@bp.cli.command()
+def init_db():
+    """Initialize the database with sample data"""
+    from seed import seed_database
+    seed_database()
+
+@bp.cli.command('migrate-interests')
+def migrate_interests():
+    """Split legacy comma-separated interests into indexed tag tables"""
+    from interests import migrate_interest_strings
+    user_links, opportunity_links = migrate_interest_strings()
+    print(f'✅ Added {user_links} volunteer interest links and {opportunity_links} opportunity tags')
+
+@bp.cli.command('upgrade-foreign-keys')
+def upgrade_foreign_keys():
+    """Add the ON DELETE rules and SQLite AUTOINCREMENT ids from models.py to tables created before them"""
+    from schema import upgrade_foreign_keys as upgrade
+    tables = upgrade()
+    if tables:
+        print(f'✅ Upgraded foreign keys and ids on {", ".join(tables)}')
+    else:
+        print('✅ Foreign keys and ids already up to date')
+
+@bp.cli.command('dedupe-bookings')
+def dedupe_bookings():
+    """Cancel duplicate confirmed bookings of one time slot by one volunteer and add the unique index"""
+    from schema import dedupe_active_bookings
+    cancelled = dedupe_active_bookings()
+    print(f'✅ Cancelled {cancelled} duplicate bookings; one active booking per volunteer and time slot enforced')
+
+@bp.cli.command('purge-idempotency-keys')
+def purge_idempotency_keys():
+    """Delete stored /book responses older than IDEMPOTENCY_KEY_TTL"""
+    from idempotency import purge_expired
+    db.create_all()
+    print(f'🧹 Purged {purge_expired()} expired idempotency keys')
+
+@bp.cli.command('rebuild-hours-ledger')
+def rebuild_hours_ledger():
+    """Recompute the volunteer-hours ledger from completed bookings"""
+    from ledger import rebuild_ledger
+    buckets = rebuild_ledger()
+    print(f'✅ Hours ledger rebuilt ({buckets} user/month/category buckets)')
+
+@bp.cli.command('compact-rollups')
+@click.option('--days', default=2, show_default=True, help='Recent days to recompute from bookings.')
+@click.option('--all', 'rebuild', is_flag=True, help='Rebuild every day from booking history instead.')
+def compact_rollups(days, rebuild):
+    """Nightly: recompute recent daily activity rollups and prune volunteer membership rows"""
+    from analytics import compact, rebuild_all
+    if rebuild:
+        print(f'✅ Daily activity rebuilt ({rebuild_all()} day/organization/category buckets)')
+        return
+    db.create_all()
+    buckets, pruned = compact(days=days)
+    print(f'✅ Recomputed {buckets} buckets over the last {days} days, pruned {pruned} membership rows')
+
+@bp.cli.command('complete-bookings')
+@click.option('--chunk-size', default=500, show_default=True, help='Bookings updated per transaction.')
+@click.option('--pause', default=0.0, show_default=True, help='Seconds to sleep between chunks.')
+def complete_bookings(chunk_size, pause):
+    """Mark confirmed bookings whose time slot has ended as completed"""
+    from jobs import complete_past_bookings
+    count = complete_past_bookings(chunk_size=chunk_size, pause=pause)
+    print(f'✅ Marked {count} bookings as completed')
+
+@bp.cli.command('archive-past')
+@click.option('--days', default=90, show_default=True, help='Archive opportunities more than this many days past.')
+@click.option('--chunk-size', default=200, show_default=True, help='Opportunities moved per transaction.')
+@click.option('--pause', default=0.0, show_default=True, help='Seconds to sleep between chunks.')
+def archive_past(days, chunk_size, pause):
+    """Move past opportunities, their time slots and bookings into the archive tables"""
+    from archive import archive_past as archive
+    db.create_all()
+    try:
+        count = archive(days=days, chunk_size=chunk_size, pause=pause)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    print(f'📦 Archived {count} opportunities older than {days} days')
+
+@bp.cli.command('sync-replica')
+def sync_replica():
+    """Copy the SQLite database into the SQLite replica (local stand-in for replication)"""
+    from replicas import sync_sqlite_replica
+    if 'replica' not in (current_app.config.get('SQLALCHEMY_BINDS') or {}):
+        raise click.ClickException('Set DATABASE_REPLICA_URL first')
+    db.create_all()
+    try:
+        path = sync_sqlite_replica()
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    print(f'✅ Replica refreshed: {path}')
+
+@bp.cli.command('build-assets')
+@click.option('--clean', is_flag=True, help='Delete fingerprinted files from earlier builds.')
+def build_assets(clean):
+    """Fingerprint and precompress static files into static/dist"""
+    from assets import assets
+    manifest = assets.build()
+    print(f'✅ Built {len(manifest)} static assets')
+    if clean:
+        print(f'🧹 Removed {assets.clean()} stale files')
+
+@bp.cli.command('asset-report')
+def asset_report():
+    """Show HTML bytes saved per route by moving page styles into bundles"""
+    import gzip
+    import os
+    from flask import template_rendered
+    from assets import assets
+    from models import User
+
+    app = current_app._get_current_object()
+    app.logger.disabled = True  # pages that fail to render are skipped, not reported
+    users = {role: User.query.filter_by(role=role).first() for role in ('admin', 'organization', 'volunteer')}
+    styles = {page: os.path.getsize(path) for page, _, path in assets._styles()}
+    skip = {'static', 'auth.logout', 'auth.google_login', 'auth.google_authorize'}
+
+    print(f"{'route':40} {'template':38} {'html':>8} {'css moved':>10} {'saved':>6}")
+    total_html = total_css = 0
+    for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+        if 'GET' not in rule.methods or rule.endpoint in skip:
+            continue
+        url = rule.rule
+        for arg in rule.arguments:
+            url = url.replace(f'<int:{arg}>', '1').replace(f'<{arg}>', '1')
+        role = rule.endpoint.split('.')[0]
+        user = users.get(role) or users['volunteer']
+        if rule.endpoint.endswith(('login', 'signup')):
+            user = None
+
+        rendered = []
+        def record(sender, template, context, **extra):
+            rendered.append(template.name)
+        client = app.test_client()
+        if user is not None:
+            with client.session_transaction() as session:
+                session['_user_id'] = str(user.id)
+                session['_fresh'] = True
+        # A fresh app context per request, so Flask-Login's cached user in `g` is not reused
+        with app.app_context(), template_rendered.connected_to(record, app):
+            response = client.get(url)
+        if response.status_code != 200 or not rendered:
+            continue
+
+        page = os.path.splitext(rendered[0])[0]
+        html = len(response.data)
+        css = styles.get(page, 0)
+        total_html += html
+        total_css += css
+        share = css / (html + css) * 100 if css else 0
+        print(f'{url:40} {rendered[0]:38} {html:8} {css:10} {share:5.1f}%')
+
+    print(f"{'total':80} {total_html:8} {total_css:10}")
+    print()
+    for bundle in sorted(set(assets.page_stylesheets.values())):
+        source = os.path.join(app.static_folder, *bundle.split('/'))
+        built = os.path.join(app.static_folder, *assets.lookup(bundle).split('/'))
+        with open(built, 'rb') as f:
+            minified = f.read()
+        print(f'{bundle:28} {os.path.getsize(source):7} bytes scoped, {len(minified):7} minified, '
+              f'{len(gzip.compress(minified)):6} gzipped (cached once per portal)')
+
+@bp.cli.command('task-worker')
+@click.option('--poll-interval', default=2.0, show_default=True, help='Seconds to wait when the queue is empty.')
+@click.option('--batch-size', default=20, show_default=True, help='Tasks claimed per poll.')
+def task_worker(poll_interval, batch_size):
+    """Run a background task worker in the foreground"""
+    from tasks import TaskWorker
+    db.create_all()
+    print('👷 Task worker started (Ctrl+C to stop)')
+    TaskWorker(current_app._get_current_object(), poll_interval=poll_interval, batch_size=batch_size).run_forever()
@@ -0,0 +1,412 @@
+"""Organization portal"""
+from datetime import datetime
+
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, jsonify
+from flask_login import login_user, login_required, current_user
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from models import db, User, Opportunity, Booking, Organization
+from access import organization_required
+from ratelimit import rate_limit
+from interests import (interest_counts, organization_zip_prefix, parse_labels, tag_opportunity,
+                       volunteers_matching)
+from tasks import enqueue
+from analytics import series_args
+from calendar_feeds import feed_token
+from availability import availability
+from exports import (BOOKING_HEADER, VOLUNTEER_HEADER, booking_rows, csv_response, export_filename,
+                     parse_filters, volunteer_rows)
+
+bp = Blueprint('organization', __name__)
+
+
+# ==================== ORGANIZATION PORTAL ====================
+@bp.route('/organization/login', methods=['GET', 'POST'])
+@rate_limit('login', by=('ip', 'email'), methods=('POST',))
+def organization_login():
+    """Organization login page"""
+    if current_user.is_authenticated and current_user.role == 'organization':
+        return redirect(url_for('organization.organization_dashboard'))
+    
+    if request.method == 'POST':
+        email = request.form.get('email')
+        password = request.form.get('password')
+        
+        user = User.query.filter_by(email=email, role='organization').first()
+        
+        if user and check_password_hash(user.password_hash, password):
+            login_user(user)
+            user.last_login = datetime.utcnow()
+            db.session.commit()
+            return redirect(url_for('organization.organization_dashboard'))
+        else:
+            flash('Invalid organization credentials', 'danger')
+    
+    return render_template('organization_login.html')
+
+@bp.route('/organization/signup', methods=['GET', 'POST'])
+def organization_signup():
+    """Organization signup page"""
+    if current_user.is_authenticated:
+        if current_user.role == 'organization':
+            return redirect(url_for('organization.organization_dashboard'))
+        return redirect(url_for('public.index'))
+    
+    if request.method == 'POST':
+        # Get form data
+        org_name = request.form.get('org_name')
+        description = request.form.get('description')
+        contact_email = request.form.get('contact_email')
+        phone = request.form.get('phone')
+        address = request.form.get('address')
+        city = request.form.get('city')
+        state = request.form.get('state')
+        zip_code = request.form.get('zip_code')
+        website = request.form.get('website')
+        
+        # User account details
+        username = request.form.get('username')
+        full_name = request.form.get('full_name')
+        password = request.form.get('password')
+        
+        # Check if email already exists
+        if User.query.filter_by(email=contact_email).first():
+            flash('Email already registered', 'error')
+            return redirect(url_for('organization.organization_signup'))
+        
+        if User.query.filter_by(username=username).first():
+            flash('Username already taken', 'error')
+            return redirect(url_for('organization.organization_signup'))
+        
+        # Create organization
+        organization = Organization(
+            name=org_name,
+            description=description,
+            contact_email=contact_email,
+            phone=phone,
+            address=address,
+            city=city,
+            state=state,
+            zip_code=zip_code,
+            website=website,
+            is_verified=False  # Needs admin approval
+        )
+        db.session.add(organization)
+        db.session.flush()  # Get the organization ID
+        
+        # Create organization user account
+        user = User(
+            email=contact_email,
+            username=username,
+            full_name=full_name,
+            password_hash=generate_password_hash(password),
+            role='organization',
+            organization_id=organization.id
+        )
+        
+        db.session.add(user)
+        enqueue('organization_registered', {'organization_id': organization.id})
+        db.session.commit()
+        
+        login_user(user)
+        flash('Organization registered successfully! Your account is pending verification by an administrator.', 'success')
+        return redirect(url_for('organization.organization_dashboard'))
+    
+    return render_template('organization_signup.html')
+
+@bp.route('/organization/dashboard')
+@login_required
+@organization_required
+def organization_dashboard():
+    """Organization dashboard"""
+    # Get organization
+    organization = Organization.query.get(current_user.organization_id) if current_user.organization_id else None
+    
+    if not organization:
+        flash('No organization linked to your account', 'warning')
+        return redirect(url_for('public.index'))
+    
+    # Calculate stats
+    total_opportunities = Opportunity.query.filter_by(organization_id=organization.id).count()
+    active_opportunities = Opportunity.query.filter_by(organization_id=organization.id, is_active=True).count()
+    
+    # Get all bookings for this organization's opportunities
+    org_opportunity_ids = [opp.id for opp in organization.opportunities]
+    total_bookings = Booking.query.filter(Booking.opportunity_id.in_(org_opportunity_ids)).count()
+    
+    total_hours = db.session.query(db.func.sum(Booking.hours)).filter(
+        Booking.opportunity_id.in_(org_opportunity_ids),
+        Booking.status == 'completed'
+    ).scalar() or 0
+    
+    # Upcoming events
+    from datetime import date
+    upcoming_events = Opportunity.query.filter(
+        Opportunity.organization_id == organization.id,
+        Opportunity.date >= date.today(),
+        Opportunity.is_active == True
+    ).count()
+    
+    # Volunteers this week
+    import datetime as dt
+    week_ago = dt.datetime.now() - dt.timedelta(days=7)
+    volunteers_this_week = Booking.query.filter(
+        Booking.opportunity_id.in_(org_opportunity_ids),
+        Booking.created_at >= week_ago
+    ).count()
+    
+    pending_bookings = Booking.query.filter(
+        Booking.opportunity_id.in_(org_opportunity_ids),
+        Booking.status == 'confirmed'
+    ).count()
+    
+    stats = {
+        'total_opportunities': total_opportunities,
+        'active_opportunities': active_opportunities,
+        'total_bookings': total_bookings,
+        'total_hours': total_hours,
+        'upcoming_events': upcoming_events,
+        'volunteers_this_week': volunteers_this_week,
+        'pending_bookings': pending_bookings
+    }
+    
+    # Recent opportunities
+    recent_opportunities = Opportunity.query.filter_by(
+        organization_id=organization.id
+    ).order_by(Opportunity.created_at.desc()).limit(5).all()
+    
+    return render_template('organization_dashboard.html', 
+                         organization=organization, 
+                         stats=stats, 
+                         recent_opportunities=recent_opportunities,
+                         availability=availability(recent_opportunities),
+                         calendar_feed_url=url_for('api.calendar_feed', token=feed_token('organization', organization.id),
+                                                   _external=True))
+
+@bp.route('/organization/opportunities')
+@login_required
+@organization_required
+def organization_opportunities():
+    """List all opportunities for organization"""
+    organization = Organization.query.get(current_user.organization_id)
+    opportunities = Opportunity.query.filter_by(organization_id=organization.id).order_by(Opportunity.created_at.desc()).all()
+    
+    # Calculate stats
+    total_bookings = sum(len(opp.bookings) for opp in opportunities)
+    unique_volunteers = len(set(booking.user_id for opp in opportunities for booking in opp.bookings))
+    
+    return render_template('organization_opportunities.html', 
+                         opportunities=opportunities, 
+                         organization=organization,
+                         total_bookings=total_bookings,
+                         total_volunteers=unique_volunteers)
+
+@bp.route('/organization/opportunities/create', methods=['GET', 'POST'])
+@login_required
+@organization_required
+def organization_create_opportunity():
+    """Create new opportunity"""
+    if request.method == 'POST':
+        from datetime import datetime
+        
+        # Get form data
+        title = request.form.get('title')
+        description = request.form.get('description')
+        category = request.form.get('category')
+        hours = int(request.form.get('hours'))
+        date_str = request.form.get('date')
+        address = request.form.get('address')
+        city = request.form.get('city')
+        state = request.form.get('state')
+        zip_code = request.form.get('zip_code')
+        requirements = request.form.get('requirements', '')
+        what_to_bring = request.form.get('what_to_bring', '')
+        image_url = request.form.get('image_url', 'https://images.unsplash.com/photo-1559027615-cd4628902d4a?w=800&q=80')
+        
+        # Get time slots
+        time_slots_list = request.form.getlist('time_slots[]')
+        spots_per_slot_list = request.form.getlist('spots_per_slot[]')
+        
+        # Convert times to readable format (HH:MM to H:MM AM/PM)
+        formatted_slots = []
+        for time_str in time_slots_list:
+            hour, minute = map(int, time_str.split(':'))
+            period = 'AM' if hour < 12 else 'PM'
+            display_hour = hour if hour <= 12 else hour - 12
+            if display_hour == 0:
+                display_hour = 12
+            formatted_slots.append(f"{display_hour}:{minute:02d} {period}")
+        
+        time_slots = ','.join(formatted_slots)
+        spots_per_slot = int(spots_per_slot_list[0]) if spots_per_slot_list else 10
+        
+        # Parse date
+        event_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        
+        # Create opportunity
+        opportunity = Opportunity(
+            title=title,
+            description=description,
+            organization_id=current_user.organization_id,
+            category=category,
+            date=event_date,
+            hours=hours,
+            latitude=42.3601,  # Default Boston coordinates
+            longitude=-71.0589,
+            address=address,
+            city=city,
+            state=state,
+            zip_code=zip_code,
+            requirements=requirements,
+            what_to_bring=what_to_bring,
+            time_slots=time_slots,
+            spots_per_slot=spots_per_slot,
+            image_url=image_url,
+            is_active=True
+        )
+        
+        db.session.add(opportunity)
+        tag_opportunity(opportunity, [category] if category else [])
+        db.session.commit()
+        
+        flash(f'Opportunity "{title}" created successfully!', 'success')
+        return redirect(url_for('organization.organization_opportunities'))
+    
+    # GET request
+    from datetime import date
+    return render_template('organization_create_opportunity.html', today=date.today().isoformat())
+
+@bp.route('/organization/opportunities/<int:opportunity_id>/edit', methods=['GET', 'POST'])
+@login_required
+@organization_required
+def organization_edit_opportunity(opportunity_id):
+    """Edit opportunity"""
+    opportunity = Opportunity.query.get_or_404(opportunity_id)
+    # Verify ownership
+    if opportunity.organization_id != current_user.organization_id:
+        abort(403)
+    
+    if request.method == 'POST':
+        # Update opportunity fields
+        opportunity.title = request.form.get('title')
+        opportunity.description = request.form.get('description')
+        opportunity.category = request.form.get('category')
+        opportunity.requirements = request.form.get('requirements', '')
+        opportunity.what_to_bring = request.form.get('what_to_bring', '')
+        tag_opportunity(opportunity, [opportunity.category] if opportunity.category else [])
+        
+        db.session.commit()
+        flash('Opportunity updated successfully!', 'success')
+        return redirect(url_for('organization.organization_opportunities'))
+    
+    return render_template('organization_edit_opportunity.html', opportunity=opportunity)
+
+@bp.route('/organization/opportunities/<int:opportunity_id>/bookings')
+@login_required
+@organization_required
+def organization_opportunity_bookings(opportunity_id):
+    """View bookings for an opportunity"""
+    opportunity = Opportunity.query.get_or_404(opportunity_id)
+    if opportunity.organization_id != current_user.organization_id:
+        abort(403)
+    bookings = Booking.query.filter_by(opportunity_id=opportunity_id).order_by(Booking.created_at.desc()).all()
+    return render_template('organization_opportunity_bookings.html', opportunity=opportunity, bookings=bookings)
+
+@bp.route('/organization/volunteers')
+@login_required
+@organization_required
+def organization_volunteers():
+    """View all volunteers who booked opportunities"""
+    organization = Organization.query.get(current_user.organization_id)
+    org_opportunity_ids = [opp.id for opp in organization.opportunities]
+    
+    # Get all unique volunteers who have booked
+    bookings = Booking.query.filter(Booking.opportunity_id.in_(org_opportunity_ids)).all()
+    volunteer_ids = set(booking.user_id for booking in bookings)
+    volunteers = User.query.filter(User.id.in_(volunteer_ids)).all()
+    
+    # Calculate totals
+    total_bookings = len(bookings)
+    total_hours = sum(booking.opportunity.hours for booking in bookings)
+    
+    return render_template('organization_volunteers.html', 
+                         volunteers=volunteers,
+                         opportunities=organization.opportunities,
+                         organization=organization,
+                         total_bookings=total_bookings,
+                         total_hours=total_hours)
+
+@bp.route('/organization/bookings/export.csv')
+@login_required
+@organization_required
+def organization_export_bookings():
+    """Stream this organization's bookings as CSV (?from=&to=&status=)"""
+    filters = parse_filters(request.args)
+    return csv_response(export_filename('bookings', filters), BOOKING_HEADER,
+                        booking_rows(filters, current_user.organization_id))
+
+@bp.route('/organization/volunteers/export.csv')
+@login_required
+@organization_required
+def organization_export_volunteers():
+    """Stream this organization's volunteers with booking totals as CSV (?from=&to=&status=)"""
+    filters = parse_filters(request.args)
+    return csv_response(export_filename('volunteers', filters), VOLUNTEER_HEADER,
+                        volunteer_rows(filters, current_user.organization_id))
+
+@bp.route('/organization/api/activity')
+@login_required
+@organization_required
+def organization_activity_series():
+    """This organization's daily activity series for charts (?from=&to=&interval=&category=&group_by=category)"""
+    try:
+        return jsonify(series_args(request.args, current_user.organization_id or 0))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@bp.route('/organization/outreach')
+@login_required
+@organization_required
+def organization_outreach():
+    """Find volunteers by interest for targeted outreach"""
+    organization = Organization.query.get(current_user.organization_id)
+    selected = parse_labels(request.args.get('interests', ''))
+    match = 'all' if request.args.get('match') == 'all' else 'any'
+    scope = 'all' if request.args.get('scope') == 'all' else 'area'
+    
+    zip_prefix = organization_zip_prefix(organization) if scope == 'area' else None
+    volunteers = volunteers_matching(selected, zip_prefix=zip_prefix, match=match).all() if selected else []
+    
+    return render_template('organization_outreach.html',
+                         organization=organization,
+                         volunteers=volunteers,
+                         interest_counts=interest_counts(zip_prefix),
+                         selected=selected,
+                         match=match,
+                         scope=scope,
+                         zip_prefix=zip_prefix)
+
+@bp.route('/organization/profile', methods=['GET', 'POST'])
+@login_required
+@organization_required
+def organization_profile():
+    """Organization profile page"""
+    organization = Organization.query.get(current_user.organization_id)
+    
+    if request.method == 'POST':
+        # Update organization details
+        organization.name = request.form.get('name')
+        organization.description = request.form.get('description')
+        organization.contact_email = request.form.get('contact_email')
+        organization.phone = request.form.get('phone', '')
+        organization.website = request.form.get('website', '')
+        organization.address = request.form.get('address', '')
+        organization.city = request.form.get('city', '')
+        organization.state = request.form.get('state', '')
+        organization.zip_code = request.form.get('zip_code', '')
+        
+        db.session.commit()
+        flash('Profile updated successfully!', 'success')
+        return redirect(url_for('organization.organization_profile'))
+    
+    return render_template('organization_profile.html', organization=organization)
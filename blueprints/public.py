@@ -0,0 +1,74 @@
+"""Public pages: home, map, opportunity detail and search"""
+from datetime import datetime
+
+from flask import Blueprint, render_template, request, jsonify
+
+from models import db, User, Opportunity, Organization
+from ledger import total_hours as ledger_total_hours
+from search import parse_search, search as run_search, search_args, search_json
+from ratelimit import rate_limit
+from availability import availability
+
+bp = Blueprint('public', __name__)
+
+
+# ==================== HOME PAGE ====================
+@bp.route('/')
+def index():
+    """Home page - Tobias"""
+    opportunities = Opportunity.query.filter_by(is_active=True).limit(6).all()
+    stats = {
+        'total_opportunities': Opportunity.query.filter_by(is_active=True).count(),
+        'total_hours': ledger_total_hours(),
+        'total_volunteers': User.query.filter_by(role='volunteer').count(),
+        'total_organizations': Organization.query.count()
+    }
+    return render_template('index.html', opportunities=opportunities, stats=stats,
+                           availability=availability(opportunities))
+
+# ==================== MAP/BROWSE PAGE ====================
+@bp.route('/opportunities')
+@bp.route('/map')
+def opportunities_map():
+    """Map page with opportunities - Sreehass"""
+    opportunities = Opportunity.query.filter_by(is_active=True).all()
+    # Convert to JSON for map markers
+    opportunities_json = [{
+        'id': opp.id,
+        'title': opp.title,
+        'organization': opp.organization.name if opp.organization else 'Unknown',
+        'latitude': opp.latitude,
+        'longitude': opp.longitude,
+        'date': opp.date.strftime('%b %d, %Y') if opp.date else 'TBD',
+        'time_slots': [slot.start_time for slot in sorted(opp.time_slots, key=lambda s: datetime.strptime(s.start_time, '%I:%M %p').time())] if opp.time_slots else [],
+        'hours': opp.hours,
+        'category': opp.category
+    } for opp in opportunities if opp.latitude and opp.longitude]
+    
+    return render_template('map.html', opportunities=opportunities, opportunities_json=opportunities_json,
+                           availability=availability(opportunities))
+
+# ==================== OPPORTUNITY DETAIL PAGE ====================
+@bp.route('/opportunity/<int:id>')
+def opportunity_detail(id):
+    """Individual opportunity detail page"""
+    opportunity = Opportunity.query.get_or_404(id)
+    return render_template('opportunity_detail.html', opportunity=opportunity,
+                           availability=availability([opportunity]))
+
+# ==================== SEARCH & FILTER ====================
+@bp.route('/search')
+@rate_limit('search', by=('ip', 'user'))
+def search():
+    """Search opportunities, with facet counts and pagination"""
+    params = parse_search(request.args)
+    found = run_search(params)
+    
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return jsonify(search_json(found, {opp.id: opp.organization.name
+                                           for opp in found['results'] if opp.organization}))
+    
+    return render_template('search_results.html', opportunities=found['results'], query=params['q'],
+                           params=params, facets=found['facets'], total=found['total'],
+                           page=found['page'], pages=found['pages'], search_args=search_args,
+                           availability=availability(found['results']))
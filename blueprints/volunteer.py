@@ -0,0 +1,193 @@
+"""Volunteer booking flow and dashboard"""
+from datetime import datetime
+
+from flask import Blueprint, render_template, request, jsonify, url_for
+from flask_login import login_required, current_user
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Opportunity, Booking, TimeSlot
+from recommendations import recommended_for
+from ledger import total_hours as ledger_total_hours
+from tasks import enqueue
+from replicas import use_primary
+from archive import archived_bookings_for, include_archived
+from ratelimit import rate_limit
+from idempotency import idempotent
+from metrics import metrics
+from calendar_feeds import feed_token
+
+bp = Blueprint('volunteer', __name__)
+
+
+# ==================== BOOKING PAGE ====================
+@bp.route('/booking/<int:opportunity_id>')
+@login_required
+@use_primary  # spots shown here decide what the volunteer tries to book
+def booking_page(opportunity_id):
+    """OpenTable-style booking page - Thomas"""
+    opportunity = Opportunity.query.get_or_404(opportunity_id)
+    
+    # Get all time slots for this opportunity with remaining spots
+    time_slots = TimeSlot.query.filter_by(
+        opportunity_id=opportunity_id,
+        is_available=True
+    ).order_by(TimeSlot.start_time).all()
+    
+    return render_template('booking.html', opportunity=opportunity, time_slots=time_slots)
+
+@bp.route('/book', methods=['POST'])
+@login_required
+@rate_limit('book', by=('ip', 'user'))
+@idempotent  # retries with the same Idempotency-Key replay the first response
+def create_booking():
+    """Create a new booking"""
+    data = request.get_json()
+    
+    time_slot_id = data.get('time_slot_id')
+    time_slot = TimeSlot.query.get_or_404(time_slot_id)
+    opportunity = Opportunity.query.get_or_404(time_slot.opportunity_id)
+    
+    if Booking.query.filter_by(user_id=current_user.id, time_slot_id=time_slot.id, status='confirmed').first():
+        metrics.inc('bookings_total', result='duplicate')
+        return jsonify({'success': False, 'message': 'You have already booked this time slot'}), 409
+    
+    # Check if slot is still available
+    if time_slot.is_full:
+        metrics.inc('bookings_total', result='full')
+        return jsonify({'success': False, 'message': 'This time slot is now full'}), 400
+    
+    if not time_slot.is_available:
+        metrics.inc('bookings_total', result='unavailable')
+        return jsonify({'success': False, 'message': 'This time slot is not available'}), 400
+    
+    # Create booking
+    booking = Booking(
+        user_id=current_user.id,
+        opportunity_id=opportunity.id,
+        time_slot_id=time_slot.id,
+        booking_time=datetime.combine(opportunity.date, datetime.strptime(time_slot.start_time, '%I:%M %p').time()),
+        hours=opportunity.hours,
+        status='confirmed'
+    )
+    
+    db.session.add(booking)
+    try:
+        db.session.flush()
+    except IntegrityError:
+        # A concurrent request booked the same slot for this volunteer (uq_bookings_active_user_slot)
+        db.session.rollback()
+        metrics.inc('bookings_total', result='duplicate')
+        return jsonify({'success': False, 'message': 'You have already booked this time slot'}), 409
+    enqueue('booking_confirmation', {'booking_id': booking.id})
+    db.session.commit()
+    metrics.inc('bookings_total', result='confirmed')
+    
+    return jsonify({
+        'success': True, 
+        'message': f'Booking confirmed for {time_slot.start_time}!', 
+        'booking_id': booking.id
+    })
+
+@bp.route('/booking/<int:booking_id>/cancel', methods=['POST'])
+@login_required
+def cancel_booking(booking_id):
+    """Cancel a booking"""
+    booking = Booking.query.get_or_404(booking_id)
+    
+    # Verify the booking belongs to the current user
+    if booking.user_id != current_user.id:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    # Update booking status to cancelled
+    booking.status = 'cancelled'
+    db.session.commit()
+    
+    return jsonify({'success': True, 'message': 'Booking cancelled successfully'})
+
+# ==================== DASHBOARD ====================
+@bp.route('/dashboard')
+@login_required
+def dashboard():
+    """User dashboard - Eshaan"""
+    upcoming_bookings_raw = Booking.query.filter_by(
+        user_id=current_user.id,
+        status='confirmed'
+    ).join(Opportunity).filter(
+        Opportunity.date >= datetime.now().date()
+    ).all()
+    
+    past_bookings_raw = Booking.query.filter_by(
+        user_id=current_user.id
+    ).join(Opportunity).filter(
+        Opportunity.date < datetime.now().date()
+    ).all()
+    show_archived = include_archived(request.args)
+    if show_archived:
+        past_bookings_raw += archived_bookings_for(current_user.id)
+    
+    # Group bookings by opportunity
+    def group_bookings(bookings):
+        grouped = {}
+        for booking in bookings:
+            opp_id = (booking.opportunity.__tablename__, booking.opportunity.id)
+            if opp_id not in grouped:
+                grouped[opp_id] = {
+                    'opportunity': booking.opportunity,
+                    'bookings': [],
+                    'time_slots': [],
+                    'booking_ids': [],
+                    'total_hours': 0
+                }
+            grouped[opp_id]['bookings'].append(booking)
+            grouped[opp_id]['booking_ids'].append(booking.id)
+            grouped[opp_id]['time_slots'].append(booking.time_slot)
+            grouped[opp_id]['total_hours'] += booking.hours
+        
+        # Sort time slots chronologically for each opportunity
+        for group in grouped.values():
+            group['time_slots'].sort(key=lambda ts: datetime.strptime(ts.start_time, '%I:%M %p').time())
+        
+        return list(grouped.values())
+    
+    upcoming_bookings = group_bookings(upcoming_bookings_raw)
+    past_bookings = group_bookings(past_bookings_raw)
+    
+    total_hours = ledger_total_hours(current_user.id)
+    
+    recommended = recommended_for(current_user)
+    
+    return render_template('dashboard.html', 
+                         upcoming_bookings=upcoming_bookings,
+                         past_bookings=past_bookings,
+                         total_hours=total_hours,
+                         recommended=recommended,
+                         show_archived=show_archived,
+                         calendar_feed_url=url_for('api.calendar_feed', token=feed_token('user', current_user.id),
+                                                   _external=True))
+
+@bp.route('/dashboard/bookings')
+@login_required
+def my_bookings():
+    """View all bookings (?archived=1 adds archived ones)"""
+    bookings = Booking.query.filter_by(user_id=current_user.id).all()
+    if include_archived(request.args):
+        bookings += archived_bookings_for(current_user.id)
+    return render_template('my_bookings.html', bookings=bookings)
+
+@bp.route('/dashboard/profile')
+@login_required
+def profile():
+    """User profile page"""
+    return render_template('profile.html')
+
+@bp.route('/dashboard/history')
+@login_required
+def volunteer_history():
+    """Volunteer history (?archived=1 adds archived bookings)"""
+    completed_bookings = Booking.query.filter_by(
+        user_id=current_user.id,
+        status='completed'
+    ).all()
+    if include_archived(request.args):
+        completed_bookings += archived_bookings_for(current_user.id, status='completed')
+    return render_template('history.html', bookings=completed_bookings)
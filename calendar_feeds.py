@@ -0,0 +1,284 @@
+"""Calendar events for volunteers and organizations, as JSON and iCalendar.
+
+A volunteer's events are their confirmed and completed bookings. An
+organization's events are its time slots with how many are booked, plus
+opportunities that have no slots. Either set for a date range comes from one
+joined query, with booked counts grouped in subqueries.
+
+``/api/calendar?from=&to=`` returns the signed-in user's events.
+``/calendar/<token>.ics`` is a subscribable feed covering 30 days back to a
+year ahead. The token is signed with ``SECRET_KEY``, so calendar apps need
+no session. It also carries the owner's feed version from
+``calendar_feed_keys``; resetting the link bumps that version, which
+revokes every token issued before. Both answer conditional requests from a single aggregate query,
+the "version" (row counts and newest ``updated_at``). A client that polls
+with ``If-None-Match`` gets a 304 without the events being read. The feed
+streams from the database cursor.
+"""
+import hashlib
+from datetime import date, datetime, timedelta
+
+from flask import Response, abort, current_app, request, stream_with_context
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import select
+
+from models import db, Booking, CalendarFeedKey, Opportunity, Organization, TimeSlot
+
+BATCH_SIZE = 500
+MAX_DAYS = 366
+DEFAULT_DAYS = 90
+FEED_PAST_DAYS = 30
+FEED_FUTURE_DAYS = 365
+FEED_MAX_AGE = 300
+STATUSES = ('confirmed', 'completed')
+
+
+def parse_range(args):
+    """``from``/``to`` (YYYY-MM-DD, inclusive); defaults to today and the next 90 days"""
+    bounds = {}
+    for key in ('from', 'to'):
+        value = args.get(key)
+        if value:
+            try:
+                bounds[key] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                abort(400, f'Invalid {key} date: {value!r} (expected YYYY-MM-DD)')
+    start = bounds.get('from') or date.today()
+    end = bounds.get('to') or start + timedelta(days=DEFAULT_DAYS)
+    if end < start or (end - start).days > MAX_DAYS:
+        abort(400, f'The range must run forwards and cover at most {MAX_DAYS} days')
+    return start, end
+
+
+def feed_range():
+    today = date.today()
+    return today - timedelta(days=FEED_PAST_DAYS), today + timedelta(days=FEED_FUTURE_DAYS)
+
+
+# ==================== QUERIES ====================
+def _in_range(query, start, end):
+    return query.where(Opportunity.date >= start, Opportunity.date <= end)
+
+
+def volunteer_rows(user_id, start, end):
+    """A volunteer's bookings in the range, with opportunity, organization and slot, in date order"""
+    query = db.session.query(
+        Booking.id, Booking.status, Opportunity.id, Opportunity.title, Organization.name, Opportunity.address,
+        Opportunity.date, Opportunity.time, Opportunity.hours, TimeSlot.start_time, TimeSlot.end_time,
+        Booking.updated_at
+    ).join(Opportunity, Opportunity.id == Booking.opportunity_id).outerjoin(
+        Organization, Organization.id == Opportunity.organization_id
+    ).outerjoin(TimeSlot, TimeSlot.id == Booking.time_slot_id).filter(
+        Booking.user_id == user_id, Booking.status.in_(STATUSES)
+    )
+    # booking_time is the slot's start; TimeSlot.start_time is text and would sort "10:00 AM" before "9:00 AM"
+    query = _in_range(query, start, end).order_by(Opportunity.date, Booking.booking_time, Booking.id)
+    for (booking_id, status, opp_id, title, org_name, address, day, time, hours, start_time, end_time,
+         updated_at) in query.execution_options(yield_per=BATCH_SIZE):
+        event = _event(f'booking-{booking_id}', title, day, start_time or time, end_time, hours)
+        event.update(status=status, opportunity_id=opp_id, organization=org_name, location=address,
+                     updated_at=updated_at)
+        yield event
+
+
+def organization_rows(organization_id, start, end):
+    """An organization's slots (and slot-less opportunities) in the range, with confirmed bookings per slot"""
+    by_slot = db.session.query(
+        Booking.time_slot_id.label('slot_id'), db.func.count(Booking.id).label('booked')
+    ).filter(Booking.status == 'confirmed', Booking.time_slot_id.isnot(None)).group_by(Booking.time_slot_id).subquery()
+    by_opportunity = db.session.query(
+        Booking.opportunity_id.label('opportunity_id'), db.func.count(Booking.id).label('booked')
+    ).filter(Booking.status == 'confirmed', Booking.time_slot_id.is_(None)).group_by(Booking.opportunity_id).subquery()
+    query = db.session.query(
+        Opportunity.id, Opportunity.title, Opportunity.address, Opportunity.date, Opportunity.time,
+        Opportunity.hours, Opportunity.spots_available, Opportunity.is_active, Opportunity.updated_at,
+        TimeSlot.id, TimeSlot.start_time, TimeSlot.end_time, TimeSlot.spots_available,
+        db.func.coalesce(by_slot.c.booked, by_opportunity.c.booked, 0)
+    ).outerjoin(TimeSlot, TimeSlot.opportunity_id == Opportunity.id).outerjoin(
+        by_slot, by_slot.c.slot_id == TimeSlot.id
+    ).outerjoin(
+        by_opportunity, db.and_(by_opportunity.c.opportunity_id == Opportunity.id, TimeSlot.id.is_(None))
+    ).filter(Opportunity.organization_id == organization_id)
+    query = _in_range(query, start, end).order_by(Opportunity.date, Opportunity.id, TimeSlot.id)
+    # Slot times are text, so each day's events are sorted on their parsed start before being yielded
+    day_events = []
+    for (opp_id, title, address, day, time, hours, opp_spots, active, updated_at, slot_id, start_time, end_time,
+         slot_spots, booked) in query.execution_options(yield_per=BATCH_SIZE):
+        uid = f'slot-{slot_id}' if slot_id else f'opportunity-{opp_id}'
+        event = _event(uid, title, day, start_time or time, end_time, hours)
+        event.update(status='confirmed' if active else 'cancelled', opportunity_id=opp_id, location=address,
+                     booked=booked, capacity=(slot_spots if slot_id else opp_spots) or 0, updated_at=updated_at)
+        if day_events and day_events[0]['day'] != day:
+            yield from _by_start(day_events)
+            day_events = []
+        event['day'] = day
+        day_events.append(event)
+    yield from _by_start(day_events)
+
+
+def _by_start(events):
+    """One day's events, all-day ones first, then by start time"""
+    for event in sorted(events, key=lambda event: (not event['all_day'], _start(event))):
+        del event['day']
+        yield event
+
+
+def _start(event):
+    return event['start'] if not event['all_day'] else datetime.combine(event['start'], datetime.min.time())
+
+
+def version(owner, owner_id, start, end):
+    """A string that changes whenever the owner's events in the range could have"""
+    if owner == 'user':
+        row = _in_range(db.session.query(
+            db.func.count(Booking.id), db.func.max(Booking.updated_at), db.func.max(Opportunity.updated_at)
+        ).join(Opportunity, Opportunity.id == Booking.opportunity_id).filter(Booking.user_id == owner_id),
+            start, end).one()
+    else:
+        def bookings(column):
+            return _in_range(select(column).select_from(Booking).join(
+                Opportunity, Opportunity.id == Booking.opportunity_id
+            ).where(Opportunity.organization_id == owner_id), start, end).scalar_subquery()
+        row = _in_range(db.session.query(
+            db.func.count(TimeSlot.id), db.func.max(TimeSlot.id), db.func.sum(TimeSlot.spots_available),
+            db.func.max(Opportunity.updated_at),
+            bookings(db.func.count(Booking.id)), bookings(db.func.max(Booking.updated_at))
+        ).select_from(Opportunity).outerjoin(TimeSlot).filter(Opportunity.organization_id == owner_id),
+            start, end).one()
+    key = '|'.join(str(value) for value in (owner, owner_id, start, end) + tuple(row))
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+def not_modified(etag):
+    """A 304 if the client already has ``etag``, else None"""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def _parse_time(value):
+    try:
+        return datetime.strptime((value or '').split('-')[0].strip(), '%I:%M %p').time()
+    except ValueError:
+        return None
+
+
+def _event(uid, title, day, start_time, end_time, hours):
+    """Start and end from the slot (or opportunity) times; all-day when there is no usable start time"""
+    start = _parse_time(start_time)
+    if start is None:
+        return {'uid': uid, 'title': title, 'all_day': True, 'start': day, 'end': day + timedelta(days=1)}
+    start = datetime.combine(day, start)
+    end = _parse_time(end_time)
+    end = datetime.combine(day, end) if end else start + timedelta(hours=hours or 1)
+    return {'uid': uid, 'title': title, 'all_day': False, 'start': start, 'end': end}
+
+
+# ==================== FEEDS ====================
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='calendar-feed')
+
+
+def feed_version(owner, owner_id):
+    """The owner's current feed version; 0 until the link is first reset"""
+    key = db.session.get(CalendarFeedKey, (owner, owner_id))
+    return key.version if key else 0
+
+
+def feed_token(owner, owner_id):
+    """Token for a ``/calendar/<token>.ics`` subscription; owner is 'user' or 'organization'"""
+    return _serializer().dumps([owner, owner_id, feed_version(owner, owner_id)])
+
+
+def reset_feed_token(owner, owner_id):
+    """Revoke the owner's feed tokens and return a new one; the caller commits"""
+    table = CalendarFeedKey.__table__
+    updated = db.session.execute(table.update().where(
+        table.c.owner == owner, table.c.owner_id == owner_id
+    ).values(version=table.c.version + 1))
+    if updated.rowcount == 0:
+        db.session.execute(table.insert().values(owner=owner, owner_id=owner_id, version=1))
+    return feed_token(owner, owner_id)
+
+
+def read_feed_token(token):
+    """(owner, owner_id) from a feed token; 404 if it was not issued here or has been reset"""
+    try:
+        # Tokens from before feed versions carry none and count as version 0
+        owner, owner_id, *issued = _serializer().loads(token)
+    except (BadSignature, ValueError, TypeError):
+        abort(404)
+    if owner not in ('user', 'organization') or len(issued) > 1:
+        abort(404)
+    if (issued[0] if issued else 0) != feed_version(owner, owner_id):
+        abort(404)
+    return owner, owner_id
+
+
+def _escape(text):
+    return str(text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _fold(line):
+    """Split lines longer than 75 octets, continuing with a leading space (RFC 5545)"""
+    data = line.encode()
+    if len(data) <= 75:
+        return line + '\r\n'
+    parts, start = [], 0
+    while start < len(data):
+        end = min(start + (75 if not parts else 74), len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:  # do not split a UTF-8 sequence
+            end -= 1
+        parts.append(data[start:end].decode())
+        start = end
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _vevent(event, url_root):
+    if event['all_day']:
+        when = [f"DTSTART;VALUE=DATE:{event['start']:%Y%m%d}", f"DTEND;VALUE=DATE:{event['end']:%Y%m%d}"]
+    else:
+        # Floating local times: slots are stored as wall-clock times without a zone
+        when = [f"DTSTART:{event['start']:%Y%m%dT%H%M%S}", f"DTEND:{event['end']:%Y%m%dT%H%M%S}"]
+    description = event.get('organization') or ''
+    if 'booked' in event:
+        description = f"{event['booked']} of {event['capacity']} spots booked"
+    lines = [
+        'BEGIN:VEVENT',
+        f"UID:{event['uid']}@{request.host}",
+        f"DTSTAMP:{(event['updated_at'] or datetime.utcnow()):%Y%m%dT%H%M%SZ}",
+        *when,
+        f"SUMMARY:{_escape(event['title'])}",
+        f"LOCATION:{_escape(event.get('location'))}",
+        f"DESCRIPTION:{_escape(description)}",
+        f"URL:{url_root}opportunity/{event['opportunity_id']}",
+        f"STATUS:{'CANCELLED' if event['status'] == 'cancelled' else 'CONFIRMED'}",
+        'END:VEVENT',
+    ]
+    return ''.join(_fold(line) for line in lines)
+
+
+def ics_response(name, events, etag):
+    """Stream events as an iCalendar feed"""
+    url_root = request.url_root
+
+    def generate():
+        yield ''.join(_fold(line) for line in (
+            'BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//VolunteerHub//Calendar//EN', 'CALSCALE:GREGORIAN',
+            f'X-WR-CALNAME:{_escape(name)}', f'X-PUBLISHED-TTL:PT{FEED_MAX_AGE // 60}M',
+        ))
+        chunk = []
+        for event in events:
+            chunk.append(_vevent(event, url_root))
+            if len(chunk) == 100:
+                yield ''.join(chunk)
+                chunk = []
+        yield ''.join(chunk) + 'END:VCALENDAR\r\n'
+
+    response = Response(stream_with_context(generate()), mimetype='text/calendar')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'private, max-age={FEED_MAX_AGE}'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,109 @@
+"""Application configuration, read from the environment (and .env)"""
+import os
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+class Config:
+    SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///volunteer.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Optional read replica: GET requests read from it while it is at most
+    # REPLICA_MAX_STALENESS seconds behind; a browser that just wrote reads the
+    # primary for REPLICA_STICKY_SECONDS
+    DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+    SQLALCHEMY_BINDS = {'replica': DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    REPLICA_MAX_STALENESS = float(os.getenv('REPLICA_MAX_STALENESS', '5'))
+    REPLICA_STICKY_SECONDS = float(os.getenv('REPLICA_STICKY_SECONDS', '10'))
+
+    # Token-bucket limits per client IP and per user ("N/second|minute|hour|day"; empty = no limit),
+    # shared by all workers through a SQLite file (default instance/ratelimit.db; "memory" = per process)
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_STORAGE = os.getenv('RATE_LIMIT_STORAGE')
+    RATE_LIMITS = {
+        'login': os.getenv('RATE_LIMIT_LOGIN', '10/minute'),
+        'book': os.getenv('RATE_LIMIT_BOOK', '20/minute'),
+        'search': os.getenv('RATE_LIMIT_SEARCH', '60/minute'),
+    }
+
+    # Seconds a /book response is kept for replay to retries with the same Idempotency-Key
+    IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', '86400'))
+
+    # Profile this fraction of requests with cProfile (0 = only admins sending "X-Profile: 1"),
+    # keeping the newest PROFILE_KEEP pstats files per endpoint (default dir instance/profiles)
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+    PROFILE_DIR = os.getenv('PROFILE_DIR')
+    PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '20'))
+
+    # Prometheus metrics at /metrics; workers share snapshots through METRICS_DIR
+    # (default instance/metrics). Set METRICS_TOKEN to require a bearer token.
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_DIR = os.getenv('METRICS_DIR')
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+    # Log statements slower than SLOW_QUERY_MS, with their plans, to a rotating
+    # JSON-lines file (default instance/slow_queries.log); see /admin/slow-queries
+    SLOW_QUERY_ENABLED = os.getenv('SLOW_QUERY_ENABLED', 'true').lower() == 'true'
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '100'))
+    SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG')
+    SLOW_QUERY_LOG_BYTES = int(os.getenv('SLOW_QUERY_LOG_BYTES', '5000000'))
+    SLOW_QUERY_LOG_BACKUPS = int(os.getenv('SLOW_QUERY_LOG_BACKUPS', '3'))
+
+    # Async JSON tier (async_api.py): database URL for its async driver (default DATABASE_URL
+    # via aiosqlite/asyncpg), queries in flight at once, and requests queued before a 503
+    ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL')
+    ASYNC_API_MAX_CONCURRENCY = int(os.getenv('ASYNC_API_MAX_CONCURRENCY', '20'))
+    ASYNC_API_MAX_WAITING = int(os.getenv('ASYNC_API_MAX_WAITING', '200'))
+
+    # Google OAuth Config
+    GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
+    GOOGLE_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET')
+
+    # Google Maps API Key
+    GOOGLE_MAPS_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY')
+
+    # Recommendation index refresh interval (seconds) for writes made by other workers
+    RECOMMENDATION_INDEX_TTL = int(os.getenv('RECOMMENDATION_INDEX_TTL', '300'))
+
+    # Search autocomplete index refresh interval (seconds); also refreshes booking counts
+    AUTOCOMPLETE_INDEX_TTL = int(os.getenv('AUTOCOMPLETE_INDEX_TTL', '300'))
+
+    # Run the booking-completion job in a background thread every N seconds (unset = off)
+    COMPLETE_BOOKINGS_INTERVAL = int(os.getenv('COMPLETE_BOOKINGS_INTERVAL', '0'))
+
+    # Outgoing email (sent by the task queue; unset MAIL_SERVER = log only)
+    MAIL_SERVER = os.getenv('MAIL_SERVER')
+    MAIL_PORT = int(os.getenv('MAIL_PORT', '25'))
+    MAIL_USERNAME = os.getenv('MAIL_USERNAME')
+    MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
+    MAIL_USE_TLS = os.getenv('MAIL_USE_TLS', 'false').lower() == 'true'
+    MAIL_SENDER = os.getenv('MAIL_SENDER', 'VolunteerHub <no-reply@volunteerhub.local>')
+
+    # In-process task queue worker threads (0 = run `flask task-worker` separately)
+    TASK_WORKER_THREADS = int(os.getenv('TASK_WORKER_THREADS', '1'))
+    # Days a finished ('done') task is kept before the workers delete it; failed tasks are kept
+    TASK_RETENTION_DAYS = float(os.getenv('TASK_RETENTION_DAYS', '7'))
+
+    # Rendered-fragment cache for opportunity cards and detail pages
+    FRAGMENT_CACHE_ENABLED = os.getenv('FRAGMENT_CACHE_ENABLED', 'true').lower() == 'true'
+    FRAGMENT_CACHE_MAX_BYTES = int(os.getenv('FRAGMENT_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+    FRAGMENT_CACHE_SPOTS_TTL = int(os.getenv('FRAGMENT_CACHE_SPOTS_TTL', '30'))
+
+    # Fingerprinted, precompressed static files served with immutable caching
+    ASSETS_FINGERPRINT = os.getenv('ASSETS_FINGERPRINT', 'true').lower() == 'true'
+    # Rebuild static/dist at startup (set false when `flask build-assets` runs at deploy time)
+    ASSETS_BUILD_ON_STARTUP = os.getenv('ASSETS_BUILD_ON_STARTUP', 'true').lower() == 'true'
+
+    # Per-portal page stylesheets bundled into static/css/bundles (default: ./styles)
+    ASSETS_STYLES_FOLDER = os.getenv('ASSETS_STYLES_FOLDER')
+
+    # Start the scheduler and task-worker threads in this process. gunicorn.conf.py turns
+    # this off for the preloaded master and starts them in each worker after the fork.
+    # Under the flask CLI only the reloader child of `flask run --debug` (WERKZEUG_RUN_MAIN)
+    # starts them, not one-off commands; `flask run --no-reload` needs `flask task-worker`.
+    START_BACKGROUND_THREADS = ((os.getenv('FLASK_RUN_FROM_CLI') != 'true' or os.getenv('WERKZEUG_RUN_MAIN') == 'true')
+                                and os.getenv('START_BACKGROUND_THREADS', 'true').lower() == 'true')
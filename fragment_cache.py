@@ -0,0 +1,182 @@
+"""In-process LRU cache for rendered template fragments.
+
+Templates wrap the parts of a page that are the same for every visitor in
+a ``call`` block::
+
+    {% call cache_fragment('card', opp.id, opp.updated_at) %}
+        ...static card markup...
+    {% endcall %}
+
+The key is the fragment kind, the owning opportunity id and any version
+values (such as ``updated_at``), so edits produce a new key. Volatile
+figures like spots remaining get their own short-lived keys. Commits that
+touch an opportunity, its time slots, its bookings or its organization
+(whose name the cards show) drop the affected entries. Entries are evicted least-recently-used once the cache exceeds
+its byte budget.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from markupsafe import Markup
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models import Opportunity, Organization, TimeSlot, Booking
+
+
+class FragmentCache:
+    """Byte-bounded LRU cache of rendered HTML fragments"""
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (html, size, expires_at)
+        self._by_owner = {}
+        self.max_bytes = 16 * 1024 * 1024
+        self.enabled = True
+        self.ttls = {'spots': 30}  # Default seconds-to-live per fragment kind
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read config, expose ``cache_fragment`` to templates and subscribe to commits"""
+        self.max_bytes = app.config.get('FRAGMENT_CACHE_MAX_BYTES', self.max_bytes)
+        self.enabled = app.config.get('FRAGMENT_CACHE_ENABLED', True)
+        # Other workers' bookings only reach this process's spots figures through expiry
+        self.ttls['spots'] = app.config.get('FRAGMENT_CACHE_SPOTS_TTL', self.ttls['spots'])
+        app.jinja_env.globals['cache_fragment'] = self.fragment
+        if not event.contains(Session, 'after_commit', self._apply_changes):
+            event.listen(Session, 'after_flush', _collect_changes)
+            event.listen(Session, 'after_commit', self._apply_changes)
+            event.listen(Session, 'after_rollback', _discard_changes)
+        app.extensions['fragment_cache'] = self
+
+    # ---------- storage ----------
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] < time.monotonic():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, html, ttl=None):
+        size = len(html.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (html, size, expires_at)
+            self._by_owner.setdefault(key[1], set()).add(key)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        html, size, _ = self._entries.pop(key)
+        self.bytes -= size
+        keys = self._by_owner.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_owner[key[1]]
+
+    def invalidate(self, owner_id, kinds=None):
+        """Drop cached fragments for an opportunity, optionally only some kinds"""
+        with self._lock:
+            for key in list(self._by_owner.get(owner_id, ())):
+                if kinds is None or key[0] in kinds:
+                    self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_owner.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+            }
+
+    # ---------- templates ----------
+
+    def fragment(self, kind, owner_id, *version, ttl=None, caller=None):
+        """Jinja ``call`` target: return the cached body, rendering it on a miss"""
+        if not self.enabled:
+            return caller()
+        key = (kind, owner_id) + version
+        html = self.get(key)
+        if html is None:
+            html = str(caller())
+            self.set(key, html, ttl or self.ttls.get(kind))
+        return Markup(html)
+
+    # ---------- invalidation ----------
+
+    def _apply_changes(self, session):
+        changes = session.info.pop('fragment_cache_dirty', None)
+        if not changes:
+            return
+        for owner_id, kinds in changes.items():
+            self.invalidate(owner_id, kinds)
+
+
+# Booking changes only move the spots-remaining figures
+VOLATILE_KINDS = {'spots'}
+
+
+def _collect_changes(session, flush_context):
+    changes = session.info.setdefault('fragment_cache_dirty', {})
+    organization_ids = {obj.id for obj in list(session.dirty) + list(session.deleted)
+                        if isinstance(obj, Organization) and obj.id is not None}
+    if organization_ids:
+        for owner_id in session.connection().scalars(
+                select(Opportunity.id).where(Opportunity.organization_id.in_(organization_ids))):
+            changes[owner_id] = None
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (Opportunity, TimeSlot)):
+            owner_id = obj.id if isinstance(obj, Opportunity) else obj.opportunity_id
+            if owner_id is not None:
+                changes[owner_id] = None
+        elif isinstance(obj, Booking) and obj.opportunity_id is not None:
+            if changes.get(obj.opportunity_id, VOLATILE_KINDS) is not None:
+                changes[obj.opportunity_id] = VOLATILE_KINDS
+
+
+def _discard_changes(session):
+    session.info.pop('fragment_cache_dirty', None)
+
+
+def mark_changed(session, opportunity_ids, kinds=None):
+    """Invalidate fragments for opportunities changed by set-based statements when ``session`` commits"""
+    changes = session.info.setdefault('fragment_cache_dirty', {})
+    for owner_id in opportunity_ids:
+        if kinds is None or (owner_id in changes and changes[owner_id] is None):
+            changes[owner_id] = None
+        else:
+            changes[owner_id] = set(changes.get(owner_id) or ()) | set(kinds)
+
+
+fragment_cache = FragmentCache()
@@ -0,0 +1,57 @@
+"""Production server settings: `gunicorn app:app` picks this file up automatically.
+
+Every setting can be tuned from the environment:
+
+    WEB_CONCURRENCY=4 GUNICORN_THREADS=4 gunicorn app:app
+
+The app is imported once in the master (``preload_app``) and forked into
+the workers, so templates, compiled modules and the recommendation index
+code are shared copy-on-write instead of loaded per worker. Workers are
+recycled after ``max_requests`` (plus jitter, so they do not all restart
+at once) to cap slow memory growth.
+
+Reload without dropping requests: ``kill -HUP $(cat gunicorn.pid)`` starts
+fresh workers and lets the old ones finish in-flight requests. Because the
+code is preloaded, a HUP does not pick up new code; for a deploy send
+``USR2`` (starts a new master with the new code), then ``WINCH`` and
+``TERM`` to the old master once the new one is serving.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', '2'))
+worker_class = 'gthread'
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+pidfile = os.getenv('GUNICORN_PIDFILE', 'gunicorn.pid')
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+# Threads do not survive fork(): keep the master free of them and start them per worker
+os.environ['START_BACKGROUND_THREADS'] = 'false'
+
+
+def on_starting(server):
+    # Metric snapshots from a previous run would be summed into this one's
+    import shutil
+    from config import Config
+    shutil.rmtree(Config.METRICS_DIR or os.path.join(os.path.dirname(__file__), 'instance', 'metrics'),
+                  ignore_errors=True)
+
+
+def post_fork(server, worker):
+    from app import app, start_background_threads
+    from models import db
+
+    with app.app_context():
+        # Connections opened in the master must not be shared between workers
+        db.engine.dispose()
+    start_background_threads(app)
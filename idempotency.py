@@ -0,0 +1,145 @@
+"""Idempotency-Key support for POST endpoints.
+
+A client that may retry a request (a double click, a timeout, parallel
+submits) sends the same ``Idempotency-Key`` header each time. The first
+request claims the key by inserting a row, runs the view and stores the
+response. Later requests with that key, from the same user, get the stored
+response back with ``Idempotent-Replayed: true`` and do no work. A retry
+that arrives while the first request is still running waits briefly for
+its response, then gets a 409. A claim with no response after
+``LEASE_SECONDS`` belongs to a request that died, and the next retry takes
+it over. Reusing a key for a different body is a 422.
+
+Responses are kept for ``IDEMPOTENCY_KEY_TTL`` seconds. 5xx responses and
+exceptions release the key, so the client can try again.
+``flask purge-idempotency-keys`` deletes expired rows.
+"""
+import hashlib
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, request
+from flask_login import current_user
+from sqlalchemy.exc import IntegrityError
+
+from models import db, IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 100
+# How long a retry waits for a concurrent first attempt to store its response
+WAIT_SECONDS = 5.0
+# A claim still without a response after this long is treated as released
+LEASE_SECONDS = 60
+
+
+def _fingerprint():
+    digest = hashlib.sha256(f'{request.method} {request.path}\n'.encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def _error(message, status):
+    return jsonify({'success': False, 'message': message}), status
+
+
+def _lookup(user_id, key):
+    """The live record for a key, dropping it if it has expired or its claim was abandoned"""
+    record = db.session.get(IdempotencyKey, (user_id, key))
+    now = datetime.utcnow()
+    # The view commits the claim along with its own writes, so a crash before _store leaves it pending
+    abandoned = record is not None and record.status_code is None and \
+        record.created_at <= now - timedelta(seconds=LEASE_SECONDS)
+    if record is not None and (record.expires_at <= now or abandoned):
+        db.session.delete(record)
+        db.session.flush()
+        return None
+    return record
+
+
+def _replay(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        return _error(f'This {HEADER} was already used for a different request', 422)
+    if record.status_code is None:
+        response = current_app.make_response(_error('A request with this key is still being processed', 409))
+        response.headers['Retry-After'] = '1'
+        return response
+    response = current_app.response_class(record.body, status=record.status_code, content_type=record.content_type)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _wait_for(user_id, key):
+    """Poll for a concurrent request's stored response"""
+    deadline = time.monotonic() + WAIT_SECONDS
+    while True:
+        db.session.rollback()  # start a fresh transaction so the other request's commit is visible
+        record = _lookup(user_id, key)
+        if record is None or record.status_code is not None or time.monotonic() >= deadline:
+            return record
+        time.sleep(0.1)
+
+
+def _store(user_id, key, fingerprint, response):
+    """Save the response; the view may have rolled back the claim, so re-add it if needed"""
+    record = db.session.get(IdempotencyKey, (user_id, key))
+    if record is None:
+        record = IdempotencyKey(user_id=user_id, key=key, fingerprint=fingerprint, expires_at=_expires_at())
+        db.session.add(record)
+    record.status_code = response.status_code
+    record.content_type = response.content_type
+    record.body = response.get_data(as_text=True)
+    db.session.commit()
+
+
+def _release(user_id, key):
+    db.session.rollback()
+    IdempotencyKey.query.filter_by(user_id=user_id, key=key, status_code=None).delete()
+    db.session.commit()
+
+
+def _expires_at():
+    return datetime.utcnow() + timedelta(seconds=current_app.config.get('IDEMPOTENCY_KEY_TTL', 86400))
+
+
+def idempotent(view):
+    """Replay the stored response for a repeated ``Idempotency-Key``; requires a signed-in user"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER, '').strip()
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return _error(f'{HEADER} must be at most {MAX_KEY_LENGTH} characters', 400)
+        user_id = current_user.id
+        fingerprint = _fingerprint()
+
+        record = _lookup(user_id, key)
+        if record is None:
+            db.session.add(IdempotencyKey(user_id=user_id, key=key, fingerprint=fingerprint,
+                                          created_at=datetime.utcnow(), expires_at=_expires_at()))
+            try:
+                db.session.flush()  # claim the key; a concurrent claim waits here, then conflicts
+            except IntegrityError:
+                record = _wait_for(user_id, key)
+        if record is not None:
+            return _replay(record, fingerprint)
+
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except Exception:
+            _release(user_id, key)
+            raise
+        if response.status_code >= 500:
+            _release(user_id, key)
+        else:
+            _store(user_id, key, fingerprint, response)
+        return response
+    return wrapper
+
+
+def purge_expired(now=None):
+    """Delete stored responses past their TTL; returns how many"""
+    count = IdempotencyKey.query.filter(IdempotencyKey.expires_at <= (now or datetime.utcnow())).delete()
+    db.session.commit()
+    return count
@@ -0,0 +1,149 @@
+"""Interest and skill tagging for users and opportunities.
+
+Tags live in the normalized ``interests`` table with indexed association
+tables, so outreach questions ("volunteers interested in Food Security near
+us") are answered with one set-based query instead of splitting the legacy
+comma-separated ``User.interests`` column row by row.
+"""
+import re
+
+from sqlalchemy import insert
+
+from models import db, User, Opportunity, Interest, UserInterest, OpportunityInterest
+
+ZIP_PATTERN = re.compile(r'\b(\d{5})(?:-\d{4})?\b')
+
+
+def parse_labels(raw):
+    """Split a comma-separated string into cleaned, de-duplicated labels"""
+    labels = {}
+    for part in (raw or '').split(','):
+        label = ' '.join(part.split())
+        if label:
+            labels.setdefault(Interest.normalize(label), label)
+    return list(labels.values())
+
+
+def _tag_map(labels, kind='interest'):
+    """Map normalized name -> Interest of ``kind``, creating any missing tags in one flush"""
+    names = {Interest.normalize(label): label for label in labels}
+    if not names:
+        return {}
+    tags = {tag.name: tag for tag in Interest.query.filter(Interest.kind == kind, Interest.name.in_(names))}
+    for name, label in names.items():
+        if name not in tags:
+            tags[name] = Interest(name=name, label=label, kind=kind)
+            db.session.add(tags[name])
+    db.session.flush()
+    return tags
+
+
+def set_user_interests(user, labels, kind='interest'):
+    """Replace a user's tags of one kind and keep the legacy string column in sync"""
+    tags = _tag_map(labels, kind)
+    kept = [tag for tag in user.interest_tags if tag.kind != kind]
+    user.interest_tags = kept + list(tags.values())
+    if kind == 'interest':
+        user.interests = ', '.join(tag.label for tag in tags.values()) or None
+
+
+def tag_opportunity(opportunity, labels):
+    """Replace an opportunity's tags"""
+    opportunity.interest_tags = list(_tag_map(labels).values())
+
+
+def organization_zip_prefix(organization):
+    """Three-digit ZIP prefix (USPS sectional center) used as an organization's area"""
+    zip_code = organization.zip_code
+    if not zip_code and organization.address:
+        found = ZIP_PATTERN.findall(organization.address)
+        zip_code = found[-1] if found else None
+    return zip_code[:3] if zip_code else None
+
+
+def volunteers_matching(interest_names, zip_prefix=None, match='any'):
+    """Active volunteers tagged with the given interests, optionally within a ZIP prefix.
+
+    ``match='any'`` returns volunteers with at least one of the tags,
+    ``match='all'`` only those with every tag. Only interest tags count, not
+    skills of the same name. Runs as a single query.
+    """
+    names = {Interest.normalize(name) for name in interest_names if name.strip()}
+    query = User.query.filter(User.role == 'volunteer', User.is_active == True)
+
+    if names:
+        tagged = db.session.query(UserInterest.user_id).join(
+            Interest, Interest.id == UserInterest.interest_id
+        ).filter(Interest.kind == 'interest', Interest.name.in_(names)).group_by(UserInterest.user_id)
+        if match == 'all':
+            tagged = tagged.having(db.func.count(db.distinct(Interest.name)) == len(names))
+        query = query.filter(User.id.in_(tagged))
+
+    if zip_prefix:
+        query = query.filter(User.zip_code.like(f'{zip_prefix}%'))
+
+    return query.order_by(User.full_name, User.username)
+
+
+def interest_counts(zip_prefix=None):
+    """Number of active volunteers per interest tag, optionally within a ZIP prefix"""
+    query = db.session.query(Interest, db.func.count(UserInterest.user_id)).join(
+        UserInterest, UserInterest.interest_id == Interest.id
+    ).join(User, User.id == UserInterest.user_id).filter(
+        Interest.kind == 'interest', User.role == 'volunteer', User.is_active == True
+    )
+    if zip_prefix:
+        query = query.filter(User.zip_code.like(f'{zip_prefix}%'))
+    return query.group_by(Interest.id).order_by(db.func.count(UserInterest.user_id).desc()).all()
+
+
+def migrate_interest_strings():
+    """Split legacy interest strings and opportunity categories into tag rows.
+
+    Safe to run repeatedly: existing associations are skipped.
+    Returns ``(user_links, opportunity_links)`` counts of new rows.
+    """
+    db.create_all()
+    # Tag names used to be unique across kinds; uniqueness is now per (kind, name)
+    for index in db.inspect(db.engine).get_indexes(Interest.__tablename__):
+        if index['name'] == 'ix_interests_name' and index['unique']:
+            with db.engine.begin() as conn:
+                conn.execute(db.text('DROP INDEX ix_interests_name'))
+    # create_all() does not add indexes to tables that already exist
+    for index in list(User.__table__.indexes) + list(Interest.__table__.indexes):
+        index.create(db.engine, checkfirst=True)
+
+    user_rows = db.session.query(User.id, User.interests).filter(
+        User.interests.isnot(None), User.interests != ''
+    ).all()
+    opp_rows = db.session.query(Opportunity.id, Opportunity.category).filter(
+        Opportunity.category.isnot(None), Opportunity.category != ''
+    ).all()
+
+    user_labels = {row.id: parse_labels(row.interests) for row in user_rows}
+    all_labels = [label for labels in user_labels.values() for label in labels]
+    all_labels += [row.category for row in opp_rows]
+    tags = _tag_map(all_labels)
+
+    existing_users = set(db.session.query(UserInterest.user_id, UserInterest.interest_id))
+    new_user_links = [
+        {'user_id': user_id, 'interest_id': tags[Interest.normalize(label)].id}
+        for user_id, labels in user_labels.items() for label in labels
+    ]
+    new_user_links = [link for link in new_user_links
+                      if (link['user_id'], link['interest_id']) not in existing_users]
+
+    existing_opps = set(db.session.query(OpportunityInterest.opportunity_id, OpportunityInterest.interest_id))
+    new_opp_links = [
+        {'opportunity_id': row.id, 'interest_id': tags[Interest.normalize(row.category)].id}
+        for row in opp_rows
+    ]
+    new_opp_links = [link for link in new_opp_links
+                     if (link['opportunity_id'], link['interest_id']) not in existing_opps]
+
+    if new_user_links:
+        db.session.execute(insert(UserInterest), new_user_links)
+    if new_opp_links:
+        db.session.execute(insert(OpportunityInterest), new_opp_links)
+    db.session.commit()
+    return len(new_user_links), len(new_opp_links)
@@ -0,0 +1,144 @@
+"""Periodic maintenance jobs.
+
+``complete_past_bookings`` moves confirmed bookings whose slot has ended to
+``completed``. It works in small id-ordered chunks, each its own short
+transaction with one set-based UPDATE, so it never holds the write lock for
+long, and it only touches rows that are still ``confirmed``, so re-running
+it (or running it from several workers at once) is harmless.
+"""
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from models import db, Booking, Opportunity, TimeSlot
+from ledger import apply_deltas, month_key
+from analytics import apply_activity
+
+TIME_FORMAT = '%I:%M %p'
+
+
+def slot_end(booking_time, end_time, hours):
+    """When a booked slot finishes: the slot's end time, else start plus duration"""
+    if end_time:
+        try:
+            end = datetime.combine(booking_time.date(), datetime.strptime(end_time, TIME_FORMAT).time())
+            if end > booking_time:
+                return end
+        except ValueError:
+            pass
+    return booking_time + timedelta(hours=hours or 0)
+
+
+def complete_past_bookings(now=None, chunk_size=500, pause=0.0):
+    """Mark confirmed bookings whose slot has ended as completed.
+
+    ``now`` is local wall-clock time, as slot times are; completion stamps and
+    the ledger and rollup buckets use UTC like the ORM path. Returns the number
+    of bookings completed.
+    """
+    now = now or datetime.now()
+    completed_at = datetime.utcnow()
+    # create_all() does not add indexes to tables that already exist (the unique one needs
+    # `flask dedupe-bookings`, which first cancels duplicates)
+    for index in Booking.__table__.indexes:
+        if not index.unique:
+            index.create(db.engine, checkfirst=True)
+
+    completed = 0
+    last_id = 0
+    while True:
+        # Bookings can only have ended if they started; the (status, booking_time) index serves this
+        rows = db.session.query(
+            Booking.id, Booking.user_id, Booking.booking_time, Booking.hours,
+            TimeSlot.end_time, Opportunity.organization_id, Opportunity.category
+        ).outerjoin(TimeSlot, TimeSlot.id == Booking.time_slot_id).join(
+            Opportunity, Opportunity.id == Booking.opportunity_id
+        ).filter(
+            Booking.status == 'confirmed',
+            Booking.booking_time <= now,
+            Booking.id > last_id
+        ).order_by(Booking.id).limit(chunk_size).with_for_update(skip_locked=True).all()
+
+        if not rows:
+            db.session.rollback()
+            break
+        last_id = rows[-1].id
+
+        finished = [row for row in rows if slot_end(row.booking_time, row.end_time, row.hours) <= now]
+        if not finished:
+            db.session.rollback()
+            continue
+
+        result = db.session.execute(
+            Booking.__table__.update().where(
+                Booking.id.in_([row.id for row in finished]),
+                Booking.status == 'confirmed'
+            ).values(status='completed', completed_at=completed_at, updated_at=completed_at)
+        )
+
+        # The UPDATE bypasses the ORM flush listeners, so post the ledger and rollup deltas here
+        deltas = defaultdict(lambda: [0, 0])
+        activity = defaultdict(lambda: [0, 0, 0])
+        members = []
+        for row in finished:
+            delta = deltas[(row.user_id, month_key(completed_at), row.category or '')]
+            delta[0] += row.hours or 0
+            delta[1] += 1
+            bucket = (completed_at.date(), row.organization_id or 0, row.category or '')
+            activity[bucket][1] += 1
+            activity[bucket][2] += row.hours or 0
+            members.append(bucket + (row.user_id,))
+        if result.rowcount == len(finished):
+            apply_deltas(db.session.connection(), deltas)
+            apply_activity(db.session.connection(), activity, members)
+            db.session.commit()
+            completed += result.rowcount
+        else:
+            # Another writer changed some rows between our read and write; retry this chunk
+            db.session.rollback()
+            last_id = rows[0].id - 1
+
+        if pause:
+            time.sleep(pause)
+
+    return completed
+
+
+class BookingCompletionScheduler:
+    """Daemon thread that runs ``complete_past_bookings`` on an interval"""
+
+    def __init__(self, app, interval):
+        self.app = app
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='complete-bookings', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self.app.app_context():
+                try:
+                    count = complete_past_bookings()
+                    if count:
+                        self.app.logger.info('Completed %d past bookings', count)
+                except Exception:
+                    self.app.logger.exception('complete-bookings run failed')
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+            self._stop.wait(self.interval)
+
+
+def start_scheduler(app):
+    """Start the completion thread when COMPLETE_BOOKINGS_INTERVAL is set (seconds)"""
+    interval = app.config.get('COMPLETE_BOOKINGS_INTERVAL')
+    if not interval:
+        return None
+    return BookingCompletionScheduler(app, interval).start()
@@ -0,0 +1,210 @@
+"""Materialized volunteer-hours ledger.
+
+Completed bookings are rolled up into ``volunteer_hours`` (per user, month
+and category) and ``volunteer_hours_totals`` (per user) as they change, so
+dashboards and leaderboards read a row or two instead of aggregating
+booking history. ORM changes are picked up by a flush listener; set-based
+UPDATEs that bypass the ORM must call ``apply_deltas`` themselves.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from models import db, User, Booking, Opportunity, VolunteerHours, VolunteerHoursTotal
+from archive import booking_history
+
+hours_table = VolunteerHours.__table__
+totals_table = VolunteerHoursTotal.__table__
+
+
+def month_key(value):
+    """Ledger month bucket for a completion timestamp"""
+    return value.strftime('%Y-%m') if value else datetime.utcnow().strftime('%Y-%m')
+
+
+def apply_deltas(connection, deltas):
+    """Add ``{(user_id, month, category): (hours, bookings)}`` deltas to the ledger.
+
+    Uses update-then-insert so it runs on any backend, inside the caller's
+    transaction.
+    """
+    per_user = defaultdict(lambda: [0, 0])
+    now = datetime.utcnow()
+
+    for (user_id, month, category), (hours, count) in deltas.items():
+        if not hours and not count:
+            continue
+        per_user[user_id][0] += hours
+        per_user[user_id][1] += count
+        key = (hours_table.c.user_id == user_id) & (hours_table.c.month == month) & (hours_table.c.category == category)
+        updated = connection.execute(hours_table.update().where(key).values(
+            hours=hours_table.c.hours + hours,
+            bookings=hours_table.c.bookings + count,
+        ))
+        if updated.rowcount == 0:
+            connection.execute(hours_table.insert().values(
+                user_id=user_id, month=month, category=category, hours=hours, bookings=count
+            ))
+
+    for user_id, (hours, count) in per_user.items():
+        if not hours and not count:
+            continue
+        updated = connection.execute(totals_table.update().where(totals_table.c.user_id == user_id).values(
+            hours=totals_table.c.hours + hours,
+            bookings=totals_table.c.bookings + count,
+            updated_at=now,
+        ))
+        if updated.rowcount == 0:
+            connection.execute(totals_table.insert().values(
+                user_id=user_id, hours=hours, bookings=count, updated_at=now
+            ))
+
+
+def _previous(state, attr):
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return None
+
+
+def _contribution(booking, state, old):
+    """(user_id, opportunity_id, month, hours) a booking adds to the ledger, or None"""
+    if old:
+        status = _previous(state, 'status')
+        values = [_previous(state, attr) for attr in ('user_id', 'opportunity_id', 'completed_at', 'hours')]
+    else:
+        status = booking.status
+        values = [booking.user_id, booking.opportunity_id, booking.completed_at, booking.hours]
+    if status != 'completed':
+        return None
+    user_id, opportunity_id, completed_at, hours = values
+    return user_id, opportunity_id, month_key(completed_at), hours or 0
+
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Load the old value when these attributes are set on an expired booking,
+# so the flush listener can subtract what a reverted booking contributed
+for _attr in (Booking.status, Booking.hours, Booking.completed_at, Booking.user_id, Booking.opportunity_id):
+    event.listen(_attr, 'set', _load_previous_value, active_history=True, retval=True)
+
+
+@event.listens_for(Session, 'before_flush')
+def _stamp_completion(session, flush_context, instances):
+    """Give newly completed bookings a completion time so they land in a month bucket"""
+    for booking in list(session.new) + list(session.dirty):
+        if isinstance(booking, Booking) and booking.status == 'completed' and booking.completed_at is None:
+            booking.completed_at = datetime.utcnow()
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_booking_changes(session, flush_context):
+    """Turn completed/reverted bookings in this flush into ledger deltas"""
+    changes = []
+    for booking in session.new:
+        if isinstance(booking, Booking):
+            changes.append((None, _contribution(booking, inspect(booking), old=False)))
+    for booking in session.dirty:
+        if isinstance(booking, Booking):
+            state = inspect(booking)
+            if any(state.attrs[a].history.has_changes() for a in ('status', 'hours', 'completed_at', 'user_id', 'opportunity_id')):
+                changes.append((_contribution(booking, state, old=True), _contribution(booking, state, old=False)))
+    for booking in session.deleted:
+        if isinstance(booking, Booking):
+            changes.append((_contribution(booking, inspect(booking), old=True), None))
+
+    changes = [(old, new) for old, new in changes if old != new]
+    if not changes:
+        return
+
+    connection = session.connection()
+    opportunity_ids = {c[1] for pair in changes for c in pair if c}
+    categories = dict(connection.execute(
+        select(Opportunity.id, Opportunity.category).where(Opportunity.id.in_(opportunity_ids))
+    ).all())
+
+    deltas = defaultdict(lambda: [0, 0])
+    for old, new in changes:
+        for contribution, sign in ((old, -1), (new, 1)):
+            if contribution:
+                user_id, opportunity_id, month, hours = contribution
+                delta = deltas[(user_id, month, categories.get(opportunity_id) or '')]
+                delta[0] += sign * hours
+                delta[1] += sign
+    apply_deltas(connection, deltas)
+
+
+def rebuild_ledger():
+    """Recompute the whole ledger from completed bookings, archived ones included"""
+    db.create_all()
+    db.session.execute(hours_table.delete())
+    db.session.execute(totals_table.delete())
+
+    history = booking_history()
+    rows = db.session.query(
+        history.c.user_id, history.c.completed_at, history.c.category, history.c.hours
+    ).filter(history.c.status == 'completed').yield_per(1000)
+
+    deltas = defaultdict(lambda: [0, 0])
+    for user_id, completed_at, category, hours in rows:
+        delta = deltas[(user_id, month_key(completed_at), category or '')]
+        delta[0] += hours or 0
+        delta[1] += 1
+    apply_deltas(db.session.connection(), deltas)
+    db.session.commit()
+    return len(deltas)
+
+
+# ---------- reads ----------
+
+def total_hours(user_id=None):
+    """Completed hours for one user, or across all users"""
+    if user_id is not None:
+        total = db.session.get(VolunteerHoursTotal, user_id)
+        return total.hours if total else 0
+    return db.session.query(db.func.sum(VolunteerHoursTotal.hours)).scalar() or 0
+
+
+def hours_for_month(month, user_id=None):
+    """Completed hours in a 'YYYY-MM' month, for one user or everyone"""
+    query = db.session.query(db.func.sum(VolunteerHours.hours)).filter(VolunteerHours.month == month)
+    if user_id is not None:
+        query = query.filter(VolunteerHours.user_id == user_id)
+    return query.scalar() or 0
+
+
+def hours_by_month(user_id, year=None):
+    """[(month, hours)] for a user, oldest first; optionally limited to one year"""
+    query = db.session.query(VolunteerHours.month, db.func.sum(VolunteerHours.hours)).filter(
+        VolunteerHours.user_id == user_id
+    )
+    if year is not None:
+        query = query.filter(VolunteerHours.month.like(f'{year}-%'))
+    return query.group_by(VolunteerHours.month).having(
+        db.func.sum(VolunteerHours.bookings) > 0
+    ).order_by(VolunteerHours.month).all()
+
+
+def hours_by_category(user_id, year=None):
+    """[(category, hours)] for a user, largest first; optionally limited to one year"""
+    query = db.session.query(VolunteerHours.category, db.func.sum(VolunteerHours.hours)).filter(
+        VolunteerHours.user_id == user_id
+    )
+    if year is not None:
+        query = query.filter(VolunteerHours.month.like(f'{year}-%'))
+    return query.group_by(VolunteerHours.category).having(
+        db.func.sum(VolunteerHours.bookings) > 0
+    ).order_by(db.func.sum(VolunteerHours.hours).desc()).all()
+
+
+def leaderboard(limit=10):
+    """Top volunteers by completed hours as [(User, hours)]"""
+    return db.session.query(User, VolunteerHoursTotal.hours).join(
+        VolunteerHoursTotal, VolunteerHoursTotal.user_id == User.id
+    ).filter(VolunteerHoursTotal.hours > 0).order_by(VolunteerHoursTotal.hours.desc()).limit(limit).all()
@@ -0,0 +1,329 @@
+"""Prometheus metrics at ``/metrics``.
+
+Collected per process:
+
+* requests: a latency histogram and status counts per endpoint and
+  method, plus the number of requests in flight
+* database: pool checkouts, time spent waiting for a pooled connection,
+  connections checked out, and queries per endpoint
+* bookings: ``/book`` outcomes (confirmed, full, unavailable, duplicate)
+* fragment cache: hits, misses, evictions and size
+
+Each process updates plain dicts under one lock and, at most once per
+``FLUSH_INTERVAL``, writes a JSON snapshot to ``METRICS_DIR/<pid>.json``
+(default ``instance/metrics``), so gunicorn workers share one directory.
+A scrape sums every snapshot. Gauges come only from live processes.
+Counters and histograms of exited workers are folded into
+``archived.json``, so totals survive worker restarts. ``gunicorn.conf.py``
+empties the directory when the server starts.
+
+No client library is needed: the text exposition format is written here.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from flask import g, request
+from sqlalchemy import event
+
+try:
+    import fcntl
+except ImportError:  # Windows: single process, nothing to serialize
+    fcntl = None
+
+PREFIX = 'volunteerhub_'
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FLUSH_INTERVAL = 1.0
+ARCHIVE = 'archived.json'
+
+COUNTER, GAUGE, HISTOGRAM = 'counter', 'gauge', 'histogram'
+METRICS = {
+    'http_requests_total': (COUNTER, 'Requests by endpoint, method and status'),
+    'http_request_duration_seconds': (HISTOGRAM, 'Request latency by endpoint and method'),
+    'http_requests_in_flight': (GAUGE, 'Requests being handled'),
+    'db_pool_checkouts_total': (COUNTER, 'Connections taken from the pool'),
+    'db_pool_wait_seconds': (HISTOGRAM, 'Time spent waiting for a pooled connection'),
+    'db_pool_checked_out': (GAUGE, 'Connections currently checked out'),
+    'db_pool_size': (GAUGE, 'Connections the pool keeps open'),
+    'db_queries_total': (COUNTER, 'SQL statements executed, by endpoint'),
+    'bookings_total': (COUNTER, 'Booking attempts by result'),
+    'fragment_cache_hits_total': (COUNTER, 'Fragment cache hits'),
+    'fragment_cache_misses_total': (COUNTER, 'Fragment cache misses'),
+    'fragment_cache_evictions_total': (COUNTER, 'Fragment cache evictions'),
+    'fragment_cache_bytes': (GAUGE, 'Bytes held by the fragment cache'),
+}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _endpoint():
+    try:
+        return request.endpoint or 'unmatched'
+    except RuntimeError:  # outside a request: background threads and commands
+        return 'background'
+
+
+class Metrics:
+    """Per-process metric store with a shared-directory exposition"""
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.directory = None
+        self._lock = threading.Lock()
+        self._values = defaultdict(float)  # (name, labels) -> counter or gauge value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+        self._flushed_at = 0.0
+        self._engines = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Hook requests and the database engines; call after ``db.init_app``"""
+        from models import db
+
+        app.extensions['metrics'] = self
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        if not self.enabled:
+            return
+        self.directory = app.config.get('METRICS_DIR') or os.path.join(app.instance_path, 'metrics')
+        os.makedirs(self.directory, exist_ok=True)
+        # First, ahead of the rate limiter, so 429s are counted too
+        app.before_request_funcs.setdefault(None, []).insert(0, self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        with app.app_context():
+            for engine in db.engines.values():
+                self._instrument(engine)
+        atexit.register(self.flush)
+
+    # ---------- recording ----------
+
+    def inc(self, name, amount=1, **labels):
+        with self._lock:
+            self._values[_key(name, labels)] += amount
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._values[_key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            counts = self._histograms.get(key)
+            if counts is None:
+                counts = self._histograms[key] = [0] * (len(BUCKETS) + 2)
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-2] += value
+            counts[-1] += 1
+
+    def _before_request(self):
+        g._metrics_started = time.perf_counter()
+        self.inc('http_requests_in_flight')
+
+    def _after_request(self, response):
+        started = g.get('_metrics_started')
+        if started is not None:
+            self._record_request(response.status_code, time.perf_counter() - started)
+            g._metrics_recorded = True
+        return response
+
+    def _teardown_request(self, exc=None):
+        started = g.pop('_metrics_started', None)
+        if started is None:
+            return
+        if not g.pop('_metrics_recorded', False):  # after_request never ran: an unhandled exception
+            self._record_request(500, time.perf_counter() - started)
+        self.inc('http_requests_in_flight', -1)
+        if time.monotonic() - self._flushed_at >= FLUSH_INTERVAL:
+            self.flush()
+
+    def _record_request(self, status, seconds):
+        endpoint = _endpoint()
+        self.inc('http_requests_total', endpoint=endpoint, method=request.method, status=str(status))
+        self.observe('http_request_duration_seconds', seconds, endpoint=endpoint, method=request.method)
+
+    def _instrument(self, engine):
+        """Count queries and checkouts, and time waits for a pooled connection"""
+        self._engines.append(engine)
+
+        def wrap_pool(engine):
+            connect = engine.pool.connect
+
+            def timed_connect():
+                started = time.perf_counter()
+                try:
+                    return connect()
+                finally:
+                    self.observe('db_pool_wait_seconds', time.perf_counter() - started)
+            engine.pool.connect = timed_connect
+
+        def checkout(dbapi_connection, record, proxy):
+            self.inc('db_pool_checkouts_total')
+
+        def query(conn, cursor, statement, parameters, context, executemany):
+            self.inc('db_queries_total', endpoint=_endpoint())
+
+        def listen_pool(engine):
+            wrap_pool(engine)
+            event.listen(engine.pool, 'checkout', checkout)
+
+        listen_pool(engine)
+        event.listen(engine, 'before_cursor_execute', query)
+        # dispose() (e.g. after gunicorn forks a worker) replaces the pool
+        event.listen(engine, 'engine_disposed', listen_pool)
+
+    # ---------- sharing ----------
+
+    def _collect(self):
+        """Copy figures kept elsewhere into the store"""
+        from fragment_cache import fragment_cache
+        stats = fragment_cache.stats()
+        self.set('fragment_cache_hits_total', stats['hits'])
+        self.set('fragment_cache_misses_total', stats['misses'])
+        self.set('fragment_cache_evictions_total', stats['evictions'])
+        self.set('fragment_cache_bytes', stats['bytes'])
+        for engine in self._engines:
+            pool = engine.pool
+            if hasattr(pool, 'checkedout'):  # QueuePool; SQLite in-memory pools have no counts
+                self.set('db_pool_checked_out', pool.checkedout(), database=engine.url.database or '')
+                self.set('db_pool_size', pool.size(), database=engine.url.database or '')
+
+    def snapshot(self):
+        self._collect()
+        with self._lock:
+            return {
+                'values': [[name, labels, value] for (name, labels), value in self._values.items()],
+                'histograms': [[name, labels, counts[:]] for (name, labels), counts in self._histograms.items()],
+            }
+
+    def flush(self):
+        """Write this process's snapshot for other workers' scrapes"""
+        self._flushed_at = time.monotonic()
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        try:
+            with open(path + '.tmp', 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(path + '.tmp', path)
+        except OSError:
+            pass  # the next flush retries
+
+    def collect_all(self):
+        """Every process's metrics summed: (values, histograms) keyed by (name, labels)"""
+        self.flush()
+        values, histograms = defaultdict(float), {}
+        lock = open(os.path.join(self.directory, '.lock'), 'w')
+        try:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            archived = self._read(ARCHIVE) or {'values': [], 'histograms': []}
+            archive_changed = False
+            for name in os.listdir(self.directory):
+                if not name.endswith('.json') or not name[:-5].isdigit():
+                    continue
+                snapshot = self._read(name)
+                if snapshot is None:
+                    continue
+                if _alive(int(name[:-5])):
+                    _merge(values, histograms, snapshot, gauges=True)
+                else:
+                    # Keep an exited worker's counters, drop its gauges
+                    archived = _combine(archived, snapshot)
+                    os.remove(os.path.join(self.directory, name))
+                    archive_changed = True
+            if archive_changed:
+                with open(os.path.join(self.directory, ARCHIVE), 'w') as f:
+                    json.dump(archived, f)
+            _merge(values, histograms, archived, gauges=False)
+        finally:
+            lock.close()
+        return values, histograms
+
+    def _read(self, name):
+        try:
+            with open(os.path.join(self.directory, name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def exposition(self):
+        """All metrics in the Prometheus text format"""
+        values, histograms = self.collect_all()
+        lines = []
+        for name, (kind, help_text) in sorted(METRICS.items()):
+            if kind == HISTOGRAM:
+                series = sorted((labels, counts) for (n, labels), counts in histograms.items() if n == name)
+            else:
+                series = sorted((labels, value) for (n, labels), value in values.items() if n == name)
+            if not series:
+                continue
+            lines.append(f'# HELP {PREFIX}{name} {help_text}')
+            lines.append(f'# TYPE {PREFIX}{name} {kind}')
+            for labels, sample in series:
+                if kind != HISTOGRAM:
+                    lines.append(f'{PREFIX}{name}{_labels(labels)} {_number(sample)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS, sample):
+                    cumulative += count
+                    lines.append(f'{PREFIX}{name}_bucket{_labels(labels + (("le", repr(bound)),))} {_number(cumulative)}')
+                lines.append(f'{PREFIX}{name}_bucket{_labels(labels + (("le", "+Inf"),))} {_number(sample[-1])}')
+                lines.append(f'{PREFIX}{name}_sum{_labels(labels)} {_number(sample[-2])}')
+                lines.append(f'{PREFIX}{name}_count{_labels(labels)} {_number(sample[-1])}')
+        return '\n'.join(lines) + '\n'
+
+
+def _alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # exists, owned by someone else
+    return True
+
+
+def _merge(values, histograms, snapshot, gauges):
+    for name, labels, value in snapshot['values']:
+        if METRICS.get(name, (GAUGE,))[0] == GAUGE and not gauges:
+            continue
+        values[(name, tuple(map(tuple, labels)))] += value
+    for name, labels, counts in snapshot['histograms']:
+        key = (name, tuple(map(tuple, labels)))
+        total = histograms.setdefault(key, [0] * len(counts))
+        for i, count in enumerate(counts):
+            total[i] += count
+
+
+def _combine(archived, snapshot):
+    """Add a dead process's counters and histograms to the archive snapshot"""
+    values, histograms = defaultdict(float), {}
+    _merge(values, histograms, archived, gauges=False)
+    _merge(values, histograms, snapshot, gauges=False)
+    return {
+        'values': [[name, labels, value] for (name, labels), value in values.items()],
+        'histograms': [[name, labels, counts] for (name, labels), counts in histograms.items()],
+    }
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+
+def _number(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+metrics = Metrics()
@@ -2,7 +2,10 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
 
-db = SQLAlchemy()
+from replicas import RoutingSession
+
+# RoutingSession sends request reads to the replica bind when one is configured (see replicas.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(UserMixin, db.Model):
     """User model for volunteers and organizations"""
@@ -15,18 +18,19 @@ class User(UserMixin, db.Model):
     full_name = db.Column(db.String(120))
     phone = db.Column(db.String(20))
     address = db.Column(db.String(200))
-    zip_code = db.Column(db.String(10))
+    zip_code = db.Column(db.String(10), index=True)
     date_of_birth = db.Column(db.Date)
     role = db.Column(db.String(20), default='volunteer')  # volunteer, admin, organization
-    organization_id = db.Column(db.Integer, db.ForeignKey('organizations.id'))  # For organization users
+    organization_id = db.Column(db.Integer, db.ForeignKey('organizations.id', ondelete='SET NULL'))  # For organization users
     profile_image = db.Column(db.String(255))
-    interests = db.Column(db.Text)  # Comma-separated interests
+    interests = db.Column(db.Text)  # Legacy comma-separated interests; see interest_tags
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime)
     is_active = db.Column(db.Boolean, default=True)
     
     # Relationships
     bookings = db.relationship('Booking', backref='user', lazy=True, cascade='all, delete-orphan')
+    interest_tags = db.relationship('Interest', secondary='user_interests', lazy=True)
     managed_organization = db.relationship('Organization', backref='manager', foreign_keys='User.organization_id')
     
     def __repr__(self):
@@ -34,13 +38,19 @@ class User(UserMixin, db.Model):
     
     @property
     def total_hours(self):
-        """Calculate total volunteer hours"""
-        return sum(booking.hours for booking in self.bookings if booking.status == 'completed')
+        """Total completed volunteer hours, read from the hours ledger"""
+        total = db.session.get(VolunteerHoursTotal, self.id)
+        return total.hours if total else 0
     
     @property
     def upcoming_bookings_count(self):
         """Count upcoming bookings"""
-        return len([b for b in self.bookings if b.opportunity.date >= datetime.now().date()])
+        return db.session.query(db.func.count(Booking.id)).join(
+            Opportunity, Opportunity.id == Booking.opportunity_id
+        ).filter(
+            Booking.user_id == self.id,
+            Opportunity.date >= datetime.now().date()
+        ).scalar()
 
 class Organization(db.Model):
     """Organization model for nonprofits"""
@@ -73,7 +83,7 @@ class Opportunity(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
-    organization_id = db.Column(db.Integer, db.ForeignKey('organizations.id'))
+    organization_id = db.Column(db.Integer, db.ForeignKey('organizations.id', ondelete='SET NULL'))
     category = db.Column(db.String(50))  # Environment, Education, Food Security, etc.
     date = db.Column(db.Date, nullable=False)
     time = db.Column(db.String(20))
@@ -103,6 +113,10 @@ class Opportunity(db.Model):
     # Relationships
     bookings = db.relationship('Booking', backref='opportunity', lazy=True, cascade='all, delete-orphan')
     time_slots = db.relationship('TimeSlot', backref='opportunity', lazy=True, cascade='all, delete-orphan', order_by='TimeSlot.start_time')
+    interest_tags = db.relationship('Interest', secondary='opportunity_interests', lazy=True)
+    
+    # Never reuse ids on SQLite: archived opportunities keep theirs (see archive.py)
+    __table_args__ = {'sqlite_autoincrement': True}
     
     def __repr__(self):
         return f'<Opportunity {self.title}>'
@@ -136,9 +150,9 @@ class Booking(db.Model):
     __tablename__ = 'bookings'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    opportunity_id = db.Column(db.Integer, db.ForeignKey('opportunities.id'), nullable=False)
-    time_slot_id = db.Column(db.Integer, db.ForeignKey('time_slots.id'))  # Link to specific time slot
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    opportunity_id = db.Column(db.Integer, db.ForeignKey('opportunities.id', ondelete='CASCADE'), nullable=False)
+    time_slot_id = db.Column(db.Integer, db.ForeignKey('time_slots.id', ondelete='SET NULL'))  # Link to specific time slot
     booking_time = db.Column(db.DateTime, nullable=False)
     hours = db.Column(db.Integer)  # Actual hours volunteered
     status = db.Column(db.String(20), default='confirmed')  # confirmed, cancelled, completed, no-show
@@ -150,6 +164,14 @@ class Booking(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     completed_at = db.Column(db.DateTime)
     
+    __table_args__ = (
+        db.Index('ix_bookings_status_booking_time', 'status', 'booking_time'),
+        # A volunteer holds a time slot at most once while the booking is active
+        db.Index('uq_bookings_active_user_slot', 'user_id', 'time_slot_id', unique=True,
+                 sqlite_where=db.text("status = 'confirmed'"), postgresql_where=db.text("status = 'confirmed'")),
+        {'sqlite_autoincrement': True},
+    )
+    
     def __repr__(self):
         return f'<Booking {self.id} - User {self.user_id} - Opp {self.opportunity_id}>'
     
@@ -166,7 +188,7 @@ class TimeSlot(db.Model):
     __tablename__ = 'time_slots'
     
     id = db.Column(db.Integer, primary_key=True)
-    opportunity_id = db.Column(db.Integer, db.ForeignKey('opportunities.id'), nullable=False)
+    opportunity_id = db.Column(db.Integer, db.ForeignKey('opportunities.id', ondelete='CASCADE'), nullable=False)
     start_time = db.Column(db.String(20), nullable=False)  # e.g., "9:00 AM"
     end_time = db.Column(db.String(20))  # e.g., "10:00 AM"
     spots_available = db.Column(db.Integer, default=1)
@@ -175,6 +197,8 @@ class TimeSlot(db.Model):
     # Relationships
     bookings = db.relationship('Booking', backref='time_slot', lazy=True)
     
+    __table_args__ = {'sqlite_autoincrement': True}
+    
     def __repr__(self):
         return f'<TimeSlot {self.start_time} for Opportunity {self.opportunity_id}>'
     
@@ -188,3 +212,224 @@ class TimeSlot(db.Model):
     def is_full(self):
         """Check if this time slot is full"""
         return self.spots_remaining <= 0
+
+class Interest(db.Model):
+    """Normalized interest or skill tag shared by users and opportunities"""
+    __tablename__ = 'interests'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(80), nullable=False, index=True)  # Lowercased tag
+    label = db.Column(db.String(80), nullable=False)  # Display form, e.g. "Food Security"
+    kind = db.Column(db.String(20), default='interest', nullable=False, index=True)  # interest, skill
+    
+    # An interest and a skill may share a name ("Teaching")
+    __table_args__ = (db.Index('uq_interests_kind_name', 'kind', 'name', unique=True),)
+    
+    def __repr__(self):
+        return f'<Interest {self.label}>'
+    
+    @staticmethod
+    def normalize(label):
+        """Canonical lookup key for a tag label"""
+        return ' '.join(label.split()).lower()
+
+class UserInterest(db.Model):
+    """Association between a user and an interest or skill tag"""
+    __tablename__ = 'user_interests'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    interest_id = db.Column(db.Integer, db.ForeignKey('interests.id', ondelete='CASCADE'), primary_key=True)
+    
+    # The primary key serves user -> interests; this serves interest -> users
+    __table_args__ = (db.Index('ix_user_interests_interest_user', 'interest_id', 'user_id'),)
+
+class OpportunityInterest(db.Model):
+    """Association between an opportunity and an interest or skill tag"""
+    __tablename__ = 'opportunity_interests'
+    
+    opportunity_id = db.Column(db.Integer, db.ForeignKey('opportunities.id', ondelete='CASCADE'), primary_key=True)
+    interest_id = db.Column(db.Integer, db.ForeignKey('interests.id', ondelete='CASCADE'), primary_key=True)
+    
+    __table_args__ = (db.Index('ix_opportunity_interests_interest_opportunity', 'interest_id', 'opportunity_id'),)
+
+class VolunteerHours(db.Model):
+    """Completed volunteer hours per user, month and opportunity category"""
+    __tablename__ = 'volunteer_hours'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    month = db.Column(db.String(7), primary_key=True)  # e.g. "2025-11"
+    category = db.Column(db.String(50), primary_key=True, default='')  # '' when uncategorized
+    hours = db.Column(db.Integer, default=0, nullable=False)
+    bookings = db.Column(db.Integer, default=0, nullable=False)
+    
+    __table_args__ = (db.Index('ix_volunteer_hours_month', 'month'),)
+
+class VolunteerHoursTotal(db.Model):
+    """Running total of completed volunteer hours per user"""
+    __tablename__ = 'volunteer_hours_totals'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    hours = db.Column(db.Integer, default=0, nullable=False, index=True)
+    bookings = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class DailyActivity(db.Model):
+    """Bookings, completions, hours and unique volunteers per day, organization and category (see analytics.py)"""
+    __tablename__ = 'daily_activity'
+
+    day = db.Column(db.Date, primary_key=True)
+    organization_id = db.Column(db.Integer, primary_key=True, default=0)  # 0 when the opportunity has none
+    category = db.Column(db.String(50), primary_key=True, default='')  # '' when uncategorized
+    bookings = db.Column(db.Integer, default=0, nullable=False)
+    completions = db.Column(db.Integer, default=0, nullable=False)
+    hours = db.Column(db.Integer, default=0, nullable=False)
+    volunteers = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (db.Index('ix_daily_activity_org_day', 'organization_id', 'day'),)
+
+class DailyActivityVolunteer(db.Model):
+    """Volunteers already counted in a recent DailyActivity row; pruned by the nightly compaction"""
+    __tablename__ = 'daily_activity_volunteers'
+
+    day = db.Column(db.Date, primary_key=True)
+    organization_id = db.Column(db.Integer, primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    user_id = db.Column(db.Integer, primary_key=True)
+
+class ArchivedOpportunity(db.Model):
+    """Past opportunity moved out of ``opportunities`` by the archiver (see archive.py)"""
+    __tablename__ = 'archived_opportunities'
+
+    id = db.Column(db.Integer, primary_key=True)  # original opportunity id
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    organization_id = db.Column(db.Integer, db.ForeignKey('organizations.id', ondelete='SET NULL'), index=True)
+    category = db.Column(db.String(50))
+    date = db.Column(db.Date, nullable=False)
+    time = db.Column(db.String(20))
+    hours = db.Column(db.Integer)
+    spots_available = db.Column(db.Integer, default=1)
+    spots_filled = db.Column(db.Integer, default=0)
+    address = db.Column(db.String(200))
+    city = db.Column(db.String(100))
+    state = db.Column(db.String(2))
+    zip_code = db.Column(db.String(10))
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    requirements = db.Column(db.Text)
+    what_to_bring = db.Column(db.Text)
+    image_url = db.Column(db.String(255))
+    is_recurring = db.Column(db.Boolean, default=False)
+    is_active = db.Column(db.Boolean, default=True)
+    is_urgent = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    organization = db.relationship('Organization', lazy=True)
+
+    is_archived = True
+
+    @property
+    def formatted_date(self):
+        """Return formatted date string"""
+        return self.date.strftime('%B %d, %Y') if self.date else 'TBD'
+
+class ArchivedTimeSlot(db.Model):
+    """Time slot of an archived opportunity"""
+    __tablename__ = 'archived_time_slots'
+
+    id = db.Column(db.Integer, primary_key=True)  # original time slot id
+    opportunity_id = db.Column(db.Integer, db.ForeignKey('archived_opportunities.id', ondelete='CASCADE'),
+                               nullable=False, index=True)
+    start_time = db.Column(db.String(20), nullable=False)
+    end_time = db.Column(db.String(20))
+    spots_available = db.Column(db.Integer, default=1)
+    is_available = db.Column(db.Boolean, default=True)
+
+class ArchivedBooking(db.Model):
+    """Booking of an archived opportunity"""
+    __tablename__ = 'archived_bookings'
+
+    id = db.Column(db.Integer, primary_key=True)  # original booking id
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    opportunity_id = db.Column(db.Integer, db.ForeignKey('archived_opportunities.id', ondelete='CASCADE'),
+                               nullable=False, index=True)
+    time_slot_id = db.Column(db.Integer, db.ForeignKey('archived_time_slots.id', ondelete='SET NULL'))
+    booking_time = db.Column(db.DateTime, nullable=False)
+    hours = db.Column(db.Integer)
+    status = db.Column(db.String(20))
+    notes = db.Column(db.Text)
+    emergency_contact = db.Column(db.String(100))
+    emergency_phone = db.Column(db.String(20))
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
+
+    opportunity = db.relationship('ArchivedOpportunity', lazy=True)
+    time_slot = db.relationship('ArchivedTimeSlot', lazy=True)
+
+    __table_args__ = (db.Index('ix_archived_bookings_user_status', 'user_id', 'status'),)
+
+    can_cancel = False
+
+    def __repr__(self):
+        return f'<ArchivedBooking {self.id} - User {self.user_id} - Opp {self.opportunity_id}>'
+
+class ArchivedOpportunityInterest(db.Model):
+    """Interest or skill tag of an archived opportunity"""
+    __tablename__ = 'archived_opportunity_interests'
+
+    opportunity_id = db.Column(db.Integer, db.ForeignKey('archived_opportunities.id', ondelete='CASCADE'),
+                               primary_key=True)
+    interest_id = db.Column(db.Integer, db.ForeignKey('interests.id', ondelete='CASCADE'), primary_key=True)
+
+class IdempotencyKey(db.Model):
+    """Stored response for a client-supplied Idempotency-Key (see idempotency.py)"""
+    __tablename__ = 'idempotency_keys'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    key = db.Column(db.String(100), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)  # hash of the method, path and body
+    status_code = db.Column(db.Integer)  # None while the first request is still running
+    content_type = db.Column(db.String(100))
+    body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+class CalendarFeedKey(db.Model):
+    """Version of an owner's calendar feed link; resetting it revokes older links (see calendar_feeds.py)"""
+    __tablename__ = 'calendar_feed_keys'
+
+    owner = db.Column(db.String(20), primary_key=True)  # 'user' or 'organization'
+    owner_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+class ReplicationHeartbeat(db.Model):
+    """Single row bumped by writes on the primary; its age on the replica is the replication lag"""
+    __tablename__ = 'replication_heartbeat'
+
+    id = db.Column(db.Integer, primary_key=True)
+    written_at = db.Column(db.DateTime, nullable=False)
+
+class Task(db.Model):
+    """Queued background job (see tasks.py)"""
+    __tablename__ = 'tasks'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(80), nullable=False)
+    payload = db.Column(db.Text)  # JSON
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, running, done, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=5, nullable=False)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = db.Column(db.DateTime)
+    locked_by = db.Column(db.String(64))
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    __table_args__ = (db.Index('ix_tasks_status_run_at', 'status', 'run_at'),)
+    
+    def __repr__(self):
+        return f'<Task {self.id} {self.name} {self.status}>'
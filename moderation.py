@@ -0,0 +1,101 @@
+"""Bulk admin moderation actions.
+
+Each action takes any number of ids and runs one set-based UPDATE or DELETE
+instead of loading and changing rows one at a time. These statements bypass
+the ORM flush listeners, so each action also posts what the listeners would
+have: ledger and rollup deltas for deleted bookings, and fragment cache,
+recommendation index and autocomplete index invalidations, which apply when
+the caller commits.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+
+from models import db, Booking, Opportunity, OpportunityInterest, Organization, TimeSlot
+from analytics import apply_activity
+from ledger import apply_deltas, month_key
+from schema import cascades_enabled
+import fragment_cache
+import recommendations
+import autocomplete
+
+log = logging.getLogger(__name__)
+
+
+def parse_ids(form, single_field):
+    """Ids from repeated ``ids`` fields, or the legacy single-id field"""
+    ids = {value for value in form.getlist('ids', type=int) if value}
+    single = form.get(single_field, type=int)
+    if single:
+        ids.add(single)
+    return sorted(ids)
+
+
+def set_opportunities_active(ids, active):
+    """Activate or deactivate opportunities; returns how many changed"""
+    result = db.session.execute(Opportunity.__table__.update().where(
+        Opportunity.id.in_(ids), Opportunity.is_active.isnot(active)
+    ).values(is_active=active, updated_at=datetime.utcnow()))
+    fragment_cache.mark_changed(db.session, ids)
+    recommendations.mark_changed(db.session, ids)
+    autocomplete.mark_changed(db.session, ids)
+    return result.rowcount
+
+
+def set_organizations_verified(ids, verified):
+    """Verify or unverify organizations; returns how many changed"""
+    return db.session.execute(Organization.__table__.update().where(
+        Organization.id.in_(ids), Organization.is_verified.isnot(verified)
+    ).values(is_verified=verified)).rowcount
+
+
+def cancel_bookings(ids):
+    """Cancel confirmed bookings; completed and already-cancelled ones are left alone"""
+    opportunity_ids = [row[0] for row in db.session.query(Booking.opportunity_id).filter(
+        Booking.id.in_(ids), Booking.status == 'confirmed'
+    ).distinct()]
+    result = db.session.execute(Booking.__table__.update().where(
+        Booking.id.in_(ids), Booking.status == 'confirmed'
+    ).values(status='cancelled', updated_at=datetime.utcnow()))
+    fragment_cache.mark_changed(db.session, opportunity_ids, fragment_cache.VOLATILE_KINDS)
+    recommendations.mark_changed(db.session, opportunity_ids)
+    return result.rowcount
+
+
+def delete_opportunities(ids):
+    """Delete opportunities with their time slots, bookings and tags; returns how many were deleted"""
+    _retract_bookings(Booking.opportunity_id.in_(ids))
+    if not cascades_enabled(Booking.__tablename__, 'opportunity_id'):
+        # Created before the ON DELETE rules: remove children explicitly until upgraded
+        log.warning('Foreign keys lack ON DELETE CASCADE; run `flask upgrade-foreign-keys`')
+        for model in (Booking, TimeSlot, OpportunityInterest):
+            db.session.execute(model.__table__.delete().where(model.opportunity_id.in_(ids)))
+    result = db.session.execute(Opportunity.__table__.delete().where(Opportunity.id.in_(ids)))
+    fragment_cache.mark_changed(db.session, ids)
+    recommendations.mark_changed(db.session, ids)
+    autocomplete.mark_changed(db.session, ids)
+    return result.rowcount
+
+
+def _retract_bookings(condition):
+    """Subtract bookings about to be deleted from the hours ledger and daily rollups"""
+    rows = db.session.query(
+        Booking.user_id, Booking.status, Booking.hours, Booking.created_at, Booking.completed_at,
+        Opportunity.organization_id, Opportunity.category
+    ).join(Opportunity, Opportunity.id == Booking.opportunity_id).filter(condition)
+
+    ledger = defaultdict(lambda: [0, 0])
+    activity = defaultdict(lambda: [0, 0, 0])
+    for user_id, status, hours, created_at, completed_at, organization_id, category in rows:
+        bucket = (organization_id or 0, category or '')
+        activity[((created_at or datetime.utcnow()).date(),) + bucket][0] -= 1
+        if status == 'completed':
+            delta = ledger[(user_id, month_key(completed_at), category or '')]
+            delta[0] -= hours or 0
+            delta[1] -= 1
+            completed = activity[((completed_at or datetime.utcnow()).date(),) + bucket]
+            completed[1] -= 1
+            completed[2] -= hours or 0
+    connection = db.session.connection()
+    apply_deltas(connection, ledger)
+    apply_activity(connection, activity)
@@ -0,0 +1,90 @@
+"""Email side effects, run from the task queue rather than inside requests.
+
+SMTP settings come from MAIL_SERVER / MAIL_PORT / MAIL_USERNAME /
+MAIL_PASSWORD / MAIL_USE_TLS / MAIL_SENDER. With no MAIL_SERVER the
+messages are only logged. For local testing, point MAIL_SERVER at a
+debugging SMTP server such as ``python -m aiosmtpd -n -l localhost:1025``.
+"""
+import smtplib
+from email.message import EmailMessage
+
+from flask import current_app
+
+from models import db, Booking, Organization, User
+from tasks import task
+
+
+def build_message(to, subject, body):
+    message = EmailMessage()
+    message['From'] = current_app.config.get('MAIL_SENDER', 'VolunteerHub <no-reply@volunteerhub.local>')
+    message['To'] = to
+    message['Subject'] = subject
+    message.set_content(body)
+    return message
+
+
+def send_messages(messages):
+    """Send messages over a single SMTP connection"""
+    messages = [m for m in messages if m['To']]
+    if not messages:
+        return
+    config = current_app.config
+    if not config.get('MAIL_SERVER'):
+        for message in messages:
+            current_app.logger.info('Email (MAIL_SERVER not set) to %s: %s', message['To'], message['Subject'])
+        return
+
+    with smtplib.SMTP(config['MAIL_SERVER'], config.get('MAIL_PORT', 25), timeout=30) as smtp:
+        if config.get('MAIL_USE_TLS'):
+            smtp.starttls()
+        if config.get('MAIL_USERNAME'):
+            smtp.login(config['MAIL_USERNAME'], config.get('MAIL_PASSWORD', ''))
+        for message in messages:
+            smtp.send_message(message)
+
+
+@task('booking_confirmation', batch=True)
+def booking_confirmation(payloads):
+    """Confirmation email to the volunteer plus a notice to the organization"""
+    ids = [p['booking_id'] for p in payloads]
+    bookings = Booking.query.filter(Booking.id.in_(ids)).all()
+    messages = []
+    for booking in bookings:
+        opp = booking.opportunity
+        slot = booking.time_slot.start_time if booking.time_slot else opp.time or 'TBD'
+        messages.append(build_message(
+            booking.user.email,
+            f'Booking confirmed: {opp.title}',
+            f'Hi {booking.user.full_name or booking.user.username},\n\n'
+            f'You are booked for {opp.title} on {opp.formatted_date} at {slot}.\n'
+            f'Location: {opp.address or "TBD"}\n\n'
+            f'Thank you for volunteering!\nVolunteerHub'
+        ))
+        if opp.organization and opp.organization.contact_email:
+            messages.append(build_message(
+                opp.organization.contact_email,
+                f'New volunteer for {opp.title}',
+                f'{booking.user.full_name or booking.user.username} booked {opp.title} '
+                f'on {opp.formatted_date} at {slot}.'
+            ))
+    send_messages(messages)
+
+
+@task('organization_registered')
+def organization_registered(payload):
+    """Welcome the new organization and ask admins to verify it"""
+    organization = db.session.get(Organization, payload['organization_id'])
+    if organization is None:
+        return
+    messages = [build_message(
+        organization.contact_email,
+        'Welcome to VolunteerHub',
+        f'Thanks for registering {organization.name}. An administrator will verify your account shortly.'
+    )]
+    for admin in User.query.filter_by(role='admin', is_active=True):
+        messages.append(build_message(
+            admin.email,
+            f'Organization awaiting verification: {organization.name}',
+            f'{organization.name} ({organization.contact_email}) registered and needs verification.'
+        ))
+    send_messages(messages)
@@ -0,0 +1,36 @@
+"""Google OAuth client, created on first use.
+
+Authlib (and the crypto stack it pulls in) is only imported when someone
+actually starts a Google sign-in, which keeps it out of every worker's
+startup time and memory. The provider metadata is likewise fetched on the
+first authorization request.
+"""
+from flask import current_app
+
+
+def google_oauth_enabled(app=None):
+    """True when Google OAuth credentials are configured"""
+    config = (app or current_app).config
+    client_id = config.get('GOOGLE_CLIENT_ID')
+    return bool(client_id and client_id != 'your-google-client-id-here')
+
+
+def get_google():
+    """The registered Google OAuth client for the current app"""
+    app = current_app._get_current_object()
+    client = app.extensions.get('google_oauth')
+    if client is None:
+        from authlib.integrations.flask_client import OAuth
+
+        oauth = OAuth(app)
+        client = oauth.register(
+            name='google',
+            client_id=app.config['GOOGLE_CLIENT_ID'],
+            client_secret=app.config['GOOGLE_CLIENT_SECRET'],
+            server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
+            client_kwargs={
+                'scope': 'openid email profile'
+            }
+        )
+        app.extensions['google_oauth'] = client
+    return client
@@ -0,0 +1,135 @@
+"""Opt-in cProfile sampling of requests.
+
+Off unless asked for: ``PROFILE_SAMPLE_RATE`` profiles that fraction of
+requests (e.g. ``0.01``), and an admin can profile a single request by
+sending ``X-Profile: 1``. Each profile is written as a pstats file under
+``PROFILE_DIR/<endpoint>/``, named with its timestamp and wall time, and
+only the newest ``PROFILE_KEEP`` per endpoint are kept. Open one with
+``python -m pstats`` or snakeviz, or browse them at ``/admin/profiles``,
+which ranks endpoints by total sampled time and sums their hottest
+functions.
+
+cProfile follows one thread, so each process profiles one request at a
+time; samples that arrive meanwhile are skipped.
+"""
+import cProfile
+import os
+import pstats
+import random
+import threading
+import time
+
+from flask import current_app, g, request
+from flask_login import current_user
+
+HEADER = 'X-Profile'
+SUFFIX = '.pstats'
+
+
+class RequestProfiler:
+    """Profiles sampled requests and keeps the newest pstats files per endpoint"""
+
+    def __init__(self, app=None):
+        self.sample_rate = 0.0
+        self.directory = None
+        self.keep = 20
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read the PROFILE_* settings and hook the request start and end"""
+        app.extensions['profiler'] = self
+        self.sample_rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+        self.directory = app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+        self.keep = app.config.get('PROFILE_KEEP', self.keep)
+        app.before_request(self._start)
+        app.teardown_request(self._stop)
+
+    def _wanted(self):
+        if request.endpoint in (None, 'static'):
+            return False
+        if request.headers.get(HEADER) == '1':
+            return current_user.is_authenticated and current_user.role == 'admin'
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _start(self):
+        if not self._wanted() or not self._lock.acquire(blocking=False):
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # another profiler (e.g. a debugger) is active
+            self._lock.release()
+            return
+        g._profile = (profile, time.perf_counter())
+
+    def _stop(self, exc=None):
+        state = g.pop('_profile', None)
+        if state is None:
+            return
+        profile, started = state
+        profile.disable()
+        self._lock.release()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        try:
+            self._save(request.endpoint, profile, elapsed_ms)
+        except OSError:
+            current_app.logger.warning('Could not write request profile', exc_info=True)
+
+    def _save(self, endpoint, profile, elapsed_ms):
+        folder = os.path.join(self.directory, endpoint)
+        os.makedirs(folder, exist_ok=True)
+        profile.dump_stats(os.path.join(folder, f'{time.time():.3f}-{elapsed_ms:.1f}ms-{os.getpid()}{SUFFIX}'))
+        files = self.files(endpoint)
+        for name in files[:max(len(files) - self.keep, 0)]:
+            os.remove(os.path.join(folder, name))
+
+    def files(self, endpoint):
+        """Profile file names for an endpoint, oldest first"""
+        folder = os.path.join(self.directory, endpoint)
+        if endpoint.startswith('.') or os.path.basename(endpoint) != endpoint or not os.path.isdir(folder):
+            return []
+        return sorted((name for name in os.listdir(folder) if name.endswith(SUFFIX)),
+                      key=lambda name: float(name.split('-', 1)[0]))
+
+    # ---------- reports ----------
+
+    def routes(self):
+        """Sampled endpoints as dicts, hottest (most total sampled time) first"""
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        routes = []
+        for endpoint in os.listdir(self.directory):
+            durations = [float(name.split('-')[1][:-2]) for name in self.files(endpoint)]
+            if durations:
+                routes.append({
+                    'endpoint': endpoint,
+                    'samples': len(durations),
+                    'total_ms': sum(durations),
+                    'mean_ms': sum(durations) / len(durations),
+                    'max_ms': max(durations),
+                })
+        return sorted(routes, key=lambda route: route['total_ms'], reverse=True)
+
+    def hot_functions(self, endpoint, sort='tottime', limit=30):
+        """The endpoint's samples merged: [(function, calls, own ms, cumulative ms)] per request"""
+        files = self.files(endpoint)
+        if not files:
+            return []
+        folder = os.path.join(self.directory, endpoint)
+        stats = pstats.Stats(*(os.path.join(folder, name) for name in files))
+        column = 3 if sort == 'cumtime' else 2
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][column], reverse=True)[:limit]
+        per_request = 1000 / len(files)
+        return [(pstats.func_std_string(func), calls // len(files), own * per_request, cumulative * per_request)
+                for func, (_, calls, own, cumulative, _) in rows]
+
+    def path(self, endpoint, name):
+        """Full path of one stored profile, or None if it is not one"""
+        if name not in self.files(endpoint):
+            return None
+        return os.path.join(self.directory, endpoint, name)
+
+
+profiler = RequestProfiler()
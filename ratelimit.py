@@ -0,0 +1,189 @@
+"""Per-IP and per-user rate limits for expensive endpoints.
+
+Views opt in with ``@rate_limit(name, by=...)``; the limit for ``name`` comes
+from ``RATE_LIMITS`` (e.g. ``'10/minute'``), so each endpoint group can be
+tuned from the environment. Each (name, key) pair gets a token bucket that
+holds up to N requests and refills at N per period, so short bursts pass and
+sustained floods do not. Keys are:
+
+* ``ip``: the client address
+* ``user``: the signed-in user id, read straight from the session cookie
+* ``email``: the account named in a login form, which slows password
+  guessing spread across many addresses
+
+The check runs in a ``before_request`` hook registered ahead of every other
+one, so a request over its budget gets a 429 with ``Retry-After`` before
+anything touches the database or hashes a password.
+
+Buckets live in a small SQLite file (``RATE_LIMIT_STORAGE``, default
+``instance/ratelimit.db``) shared by every worker on the host and updated with
+one atomic UPSERT per key. Set ``RATE_LIMIT_STORAGE=memory`` to keep them per
+process instead. If the store cannot be reached the request is let through.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from flask import current_app, jsonify, request, session
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+# Checks between sweeps that drop buckets which have refilled completely
+PRUNE_EVERY = 1000
+
+
+def parse_rule(rule):
+    """``'10/minute'`` -> (capacity, tokens per second); ValueError if malformed"""
+    count, _, period = rule.partition('/')
+    period = period.strip().lower().rstrip('s')
+    if not count.strip().isdigit() or int(count) <= 0 or period not in PERIODS:
+        raise ValueError(f'Invalid rate limit {rule!r}; expected e.g. "10/minute"')
+    return int(count), int(count) / PERIODS[period]
+
+
+def rate_limit(name, by=('ip',), methods=None):
+    """Limit a view by the ``RATE_LIMITS[name]`` rule for each of the ``by`` keys (``ip``, ``user``, ``email``)"""
+    def decorator(view):
+        view._rate_limit = (name, tuple(by), tuple(methods) if methods else None)
+        return view
+    return decorator
+
+
+class MemoryStore:
+    """Token buckets in this process only"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}  # key -> [tokens, updated_at]
+
+    def hit(self, key, capacity, rate, now):
+        """Take a token; returns (allowed, tokens left)"""
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = [tokens, now]
+        return allowed, tokens
+
+    def prune(self, before):
+        with self._lock:
+            for key in [key for key, (_, updated_at) in self._buckets.items() if updated_at < before]:
+                del self._buckets[key]
+
+
+class SQLiteStore:
+    """Token buckets in a SQLite file shared by all workers on the host"""
+
+    HIT = '''
+        INSERT INTO buckets (key, tokens, updated_at, allowed) VALUES (:key, :capacity - 1, :now, 1)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = min(:capacity, tokens + (:now - updated_at) * :rate)
+                     - (min(:capacity, tokens + (:now - updated_at) * :rate) >= 1),
+            allowed = min(:capacity, tokens + (:now - updated_at) * :rate) >= 1,
+            updated_at = :now
+        RETURNING allowed, tokens
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread, reopened after a fork
+        if getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')  # losing a few buckets in a crash is harmless
+            conn.execute('CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, '
+                         'updated_at REAL NOT NULL, allowed INTEGER NOT NULL)')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return self._local.conn
+
+    def hit(self, key, capacity, rate, now):
+        """Take a token; returns (allowed, tokens left)"""
+        allowed, tokens = self._connection().execute(
+            self.HIT, {'key': key, 'capacity': capacity, 'rate': rate, 'now': now}
+        ).fetchone()
+        return bool(allowed), tokens
+
+    def prune(self, before):
+        self._connection().execute('DELETE FROM buckets WHERE updated_at < ?', (before,))
+
+
+class RateLimiter:
+    """Checks ``@rate_limit`` views before any other request hook runs"""
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.rules = {}
+        self.store = None
+        self._hits = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read ``RATE_LIMITS`` and open the bucket store; call before other extensions add request hooks"""
+        app.extensions['rate_limiter'] = self
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        self.rules = {name: parse_rule(rule) for name, rule in (app.config.get('RATE_LIMITS') or {}).items() if rule}
+        storage = app.config.get('RATE_LIMIT_STORAGE') or os.path.join(app.instance_path, 'ratelimit.db')
+        if storage == 'memory':
+            self.store = MemoryStore()
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(storage)), exist_ok=True)
+            self.store = SQLiteStore(storage)
+        if self.enabled:
+            app.before_request_funcs.setdefault(None, []).insert(0, self._check)
+
+    def _keys(self, by):
+        for kind in by:
+            if kind == 'ip':
+                yield 'ip', request.remote_addr or 'unknown'
+            elif kind == 'user' and session.get('_user_id'):
+                yield 'user', session['_user_id']
+            elif kind == 'email' and request.form.get('email'):
+                yield 'email', request.form['email'].strip().lower()
+
+    def _check(self):
+        view = current_app.view_functions.get(request.endpoint)
+        limit = getattr(view, '_rate_limit', None)
+        if limit is None:
+            return None
+        name, by, methods = limit
+        if name not in self.rules or (methods and request.method not in methods):
+            return None
+        capacity, rate = self.rules[name]
+        now = time.time()
+        retry_after = 0
+        try:
+            for kind, value in self._keys(by):
+                allowed, tokens = self.store.hit(f'{name}:{kind}:{value}', capacity, rate, now)
+                if not allowed:
+                    retry_after = max(retry_after, (1 - tokens) / rate)
+            self._hits += 1
+            if self._hits % PRUNE_EVERY == 0:
+                self.store.prune(now - max(c / r for c, r in self.rules.values()))
+        except sqlite3.Error:
+            current_app.logger.warning('Rate limit store unavailable; allowing request', exc_info=True)
+            return None
+        if retry_after:
+            return self._too_many(retry_after)
+        return None
+
+    def _too_many(self, retry_after):
+        """429 without templates or the current user, so it costs no queries"""
+        message = 'Too many requests. Please wait a moment and try again.'
+        if request.is_json or request.accept_mimetypes.best == 'application/json' \
+                or request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            response = jsonify({'success': False, 'message': message})
+        else:
+            response = current_app.response_class(message, mimetype='text/plain')
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(math.ceil(retry_after), 1))
+        return response
+
+
+rate_limiter = RateLimiter()
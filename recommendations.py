@@ -0,0 +1,291 @@
+"""Interest-based opportunity recommendations for the volunteer dashboard.
+
+Upcoming opportunities are kept in an in-memory inverted index (category and
+keyword -> opportunity ids). Writes to opportunities, time slots and bookings
+mark the affected opportunity ids dirty after commit, and the next read
+refreshes only those rows, so a feed render is a handful of set lookups and
+a score over the small candidate set.
+"""
+import math
+import re
+import threading
+import time
+from datetime import date
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db, Opportunity, TimeSlot, Booking
+
+# Words that carry no signal when matching interests against titles
+STOPWORDS = {
+    'and', 'the', 'for', 'with', 'our', 'you', 'your', 'are', 'all', 'from',
+    'help', 'will', 'into', 'this', 'that', 'their', 'great', 'must', 'provided',
+}
+
+# Score weights
+CATEGORY_WEIGHT = 3.0
+KEYWORD_WEIGHT = 1.0
+DATE_WEIGHT = 1.5
+DISTANCE_WEIGHT = 1.5
+CAPACITY_WEIGHT = 1.0
+
+
+def tokenize(text):
+    """Split free text into lowercase keywords"""
+    if not text:
+        return set()
+    return {w for w in re.findall(r'[a-z0-9]+', text.lower()) if len(w) > 2 and w not in STOPWORDS}
+
+
+def parse_interests(raw):
+    """Split a comma-separated interests string into normalized terms"""
+    if not raw:
+        return []
+    return [term.strip().lower() for term in raw.split(',') if term.strip()]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+
+class RecommendationIndex:
+    """Inverted index over upcoming, active opportunities"""
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._by_category = {}
+        self._by_keyword = {}
+        self._entries = {}
+        self._dirty = set()
+        self._built_at = None
+        self.ttl = 300
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read config and subscribe to session commits"""
+        self.ttl = app.config.get('RECOMMENDATION_INDEX_TTL', 300)
+        # The listeners are process-wide; a second app from create_app() must not add them again
+        if not event.contains(Session, 'after_commit', self._apply_changes):
+            event.listen(Session, 'after_flush', _collect_changes)
+            event.listen(Session, 'after_commit', self._apply_changes)
+            event.listen(Session, 'after_rollback', _discard_changes)
+        app.extensions['recommendations'] = self
+
+    # ---------- maintenance ----------
+
+    def _apply_changes(self, session):
+        changed = session.info.pop('recommendation_dirty', None)
+        if changed:
+            with self._lock:
+                self._dirty |= changed
+
+    def invalidate(self):
+        """Force a full rebuild on the next read"""
+        with self._lock:
+            self._built_at = None
+
+    def _ensure_fresh(self):
+        # A periodic full rebuild picks up writes made by other worker processes
+        stale = self._built_at is None or time.monotonic() - self._built_at > self.ttl
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if stale:
+            self._rebuild()
+        elif dirty:
+            self._refresh(dirty)
+
+    def _rebuild(self):
+        entries = self._load_entries(None)
+        with self._lock:
+            self._entries = {}
+            self._by_category = {}
+            self._by_keyword = {}
+            for entry in entries.values():
+                self._add(entry)
+            self._built_at = time.monotonic()
+
+    def _refresh(self, opportunity_ids):
+        entries = self._load_entries(opportunity_ids)
+        with self._lock:
+            for opp_id in opportunity_ids:
+                self._remove(opp_id)
+                if opp_id in entries:
+                    self._add(entries[opp_id])
+
+    def _load_entries(self, opportunity_ids):
+        """Load index entries; slot capacity is aggregated in one grouped query"""
+        query = db.session.query(
+            Opportunity.id, Opportunity.title, Opportunity.description, Opportunity.category,
+            Opportunity.date, Opportunity.latitude, Opportunity.longitude, Opportunity.spots_available
+        ).filter(Opportunity.is_active == True, Opportunity.date >= date.today())
+        if opportunity_ids is not None:
+            query = query.filter(Opportunity.id.in_(opportunity_ids))
+
+        entries = {}
+        for row in query:
+            entries[row.id] = {
+                'id': row.id,
+                'category': (row.category or '').lower(),
+                'keywords': tokenize(row.title) | tokenize(row.description),
+                'date': row.date,
+                'latitude': row.latitude,
+                'longitude': row.longitude,
+                'capacity': row.spots_available or 0,
+                'remaining': row.spots_available or 0,
+                'has_slots': False,
+            }
+        if not entries:
+            return entries
+
+        # Slot capacity and confirmed bookings per opportunity, grouped in the database
+        confirmed = db.session.query(
+            Booking.time_slot_id, db.func.count(Booking.id).label('taken')
+        ).filter(Booking.status == 'confirmed').group_by(Booking.time_slot_id).subquery()
+        slot_rows = db.session.query(
+            TimeSlot.opportunity_id,
+            db.func.sum(TimeSlot.spots_available),
+            db.func.sum(TimeSlot.spots_available - db.func.coalesce(confirmed.c.taken, 0))
+        ).outerjoin(confirmed, confirmed.c.time_slot_id == TimeSlot.id).filter(
+            TimeSlot.opportunity_id.in_(list(entries))
+        ).group_by(TimeSlot.opportunity_id)
+        for opp_id, capacity, remaining in slot_rows:
+            entries[opp_id].update(capacity=capacity or 0, remaining=remaining or 0, has_slots=True)
+
+        # Opportunities without time slots fall back to opportunity-level bookings
+        slotless = [opp_id for opp_id, entry in entries.items() if not entry['has_slots']]
+        if slotless:
+            taken_rows = db.session.query(Booking.opportunity_id, db.func.count(Booking.id)).filter(
+                Booking.opportunity_id.in_(slotless), Booking.status == 'confirmed'
+            ).group_by(Booking.opportunity_id)
+            for opp_id, taken in taken_rows:
+                entries[opp_id]['remaining'] = entries[opp_id]['capacity'] - taken
+        return entries
+
+    def _add(self, entry):
+        self._entries[entry['id']] = entry
+        if entry['category']:
+            self._by_category.setdefault(entry['category'], set()).add(entry['id'])
+        for word in entry['keywords']:
+            self._by_keyword.setdefault(word, set()).add(entry['id'])
+
+    def _remove(self, opp_id):
+        entry = self._entries.pop(opp_id, None)
+        if entry is None:
+            return
+        if entry['category']:
+            ids = self._by_category.get(entry['category'])
+            if ids is not None:
+                ids.discard(opp_id)
+                if not ids:
+                    del self._by_category[entry['category']]
+        for word in entry['keywords']:
+            ids = self._by_keyword.get(word)
+            if ids is not None:
+                ids.discard(opp_id)
+                if not ids:
+                    del self._by_keyword[word]
+
+    # ---------- queries ----------
+
+    def recommend(self, interests, location=None, exclude=(), limit=6):
+        """Rank upcoming opportunities for a list of interest terms.
+
+        Returns a list of ``(opportunity_id, score)`` tuples, best first.
+        """
+        self._ensure_fresh()
+        today = date.today()
+
+        with self._lock:
+            category_hits = set()
+            keyword_hits = {}
+            for term in interests:
+                category_hits |= self._by_category.get(term, set())
+                for word in tokenize(term):
+                    for opp_id in self._by_keyword.get(word, ()):
+                        keyword_hits[opp_id] = keyword_hits.get(opp_id, 0) + 1
+
+            candidates = (category_hits | set(keyword_hits)) - set(exclude)
+            scored = []
+            for opp_id in candidates:
+                entry = self._entries[opp_id]
+                if entry['date'] < today or entry['remaining'] <= 0:
+                    continue
+
+                score = 0.0
+                if opp_id in category_hits:
+                    score += CATEGORY_WEIGHT
+                score += KEYWORD_WEIGHT * min(keyword_hits.get(opp_id, 0), 3)
+                score += DATE_WEIGHT / (1 + (entry['date'] - today).days / 7.0)
+                if location and entry['latitude'] is not None and entry['longitude'] is not None:
+                    km = haversine_km(location[0], location[1], entry['latitude'], entry['longitude'])
+                    score += DISTANCE_WEIGHT / (1 + km / 10.0)
+                if entry['capacity']:
+                    score += CAPACITY_WEIGHT * min(entry['remaining'] / entry['capacity'], 1.0)
+                # The date rides along: once the lock is released a refresh may drop the entry
+                scored.append((opp_id, score, entry['date']))
+
+        scored.sort(key=lambda item: (-item[1], item[2]))
+        return [(opp_id, score) for opp_id, score, _ in scored[:limit]]
+
+
+def _collect_changes(session, flush_context):
+    """Remember which opportunities a flush touched until the transaction commits"""
+    changed = session.info.setdefault('recommendation_dirty', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Opportunity):
+            if obj.id is not None:
+                changed.add(obj.id)
+        elif isinstance(obj, (TimeSlot, Booking)):
+            if obj.opportunity_id is not None:
+                changed.add(obj.opportunity_id)
+
+
+def _discard_changes(session):
+    session.info.pop('recommendation_dirty', None)
+
+
+def mark_changed(session, opportunity_ids):
+    """Refresh opportunities changed by set-based statements once ``session`` commits"""
+    session.info.setdefault('recommendation_dirty', set()).update(opportunity_ids)
+
+
+recommendation_index = RecommendationIndex()
+
+
+def recommended_for(user, limit=6):
+    """Recommended upcoming opportunities for a user, best first.
+
+    Uses the user's interest tags (or the legacy interests string), falling back to the categories of
+    opportunities they have booked before. Distance is measured from the
+    centroid of the user's booked opportunities.
+    """
+    booked_rows = db.session.query(
+        Booking.opportunity_id, Opportunity.category, Opportunity.latitude, Opportunity.longitude
+    ).join(Opportunity).filter(
+        Booking.user_id == user.id, Booking.status != 'cancelled'
+    ).distinct().all()
+    booked_ids = {row.opportunity_id for row in booked_rows}
+
+    interests = [tag.name for tag in user.interest_tags] or parse_interests(user.interests)
+    if not interests:
+        interests = sorted({row.category.lower() for row in booked_rows if row.category})
+    if not interests:
+        return []
+
+    points = [(row.latitude, row.longitude) for row in booked_rows
+              if row.latitude is not None and row.longitude is not None]
+    location = None
+    if points:
+        location = (sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points))
+
+    ranked = recommendation_index.recommend(interests, location=location, exclude=booked_ids, limit=limit)
+    if not ranked:
+        return []
+
+    opportunities = {opp.id: opp for opp in Opportunity.query.filter(Opportunity.id.in_([r[0] for r in ranked]))}
+    return [opportunities[opp_id] for opp_id, _ in ranked if opp_id in opportunities]
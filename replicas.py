@@ -0,0 +1,214 @@
+"""Read-replica routing.
+
+When ``DATABASE_REPLICA_URL`` is set it becomes the ``replica`` bind, and
+``db.session`` sends plain SELECTs there for requests that may read stale
+data: GET/HEAD requests whose view is not marked ``@use_primary``. Everything
+else goes to the primary, namely flushes, INSERT/UPDATE/DELETE, locking
+reads, non-GET requests and background jobs. Once a request writes, the rest
+of it reads from the primary too.
+
+Staleness is bounded in two ways:
+
+* Lag: every transaction that writes (ORM flush or set-based statement)
+  also bumps a one-row heartbeat as it commits. The replica's copy of that
+  row shows how far behind it is. A request only uses the replica while the lag is within
+  ``REPLICA_MAX_STALENESS`` seconds. A view can tighten this with
+  ``@max_staleness(seconds)``, and a client with an ``X-Max-Staleness``
+  header.
+* Read-your-writes: after a request writes, the same browser reads from the
+  primary for ``REPLICA_STICKY_SECONDS``, so it sees its own booking on the
+  next page.
+
+``flask sync-replica`` copies a SQLite primary into a SQLite replica, which
+stands in for replication when testing locally with two files.
+"""
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app, g, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql import Select
+
+BIND = 'replica'
+USE_REPLICA = 'use_replica'
+WROTE = 'wrote'
+STICKY_KEY = '_primary_until'
+HEARTBEAT_DUE = 'heartbeat_due'
+# Seconds between lag checks, per process
+LAG_CHECK_INTERVAL = 1.0
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica bind while ``info['use_replica']`` is set"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and self.info.get(USE_REPLICA) and not self._flushing
+                and isinstance(clause, Select) and clause._for_update_arg is None):
+            engine = self._db.engines.get(BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def use_primary(view):
+    """Mark a GET view that must read current data (e.g. before offering a booking)"""
+    view._use_primary = True
+    return view
+
+
+def max_staleness(seconds):
+    """Serve a GET view from the replica only while it is at most ``seconds`` behind"""
+    def decorator(view):
+        view._max_staleness = seconds
+        return view
+    return decorator
+
+
+class ReplicaRouter:
+    """Routes request reads between the primary and the replica bind"""
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.max_staleness = 5.0
+        self.sticky_seconds = 10.0
+        self._lock = threading.Lock()
+        self._lag = None
+        self._lag_checked = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Enable routing when a ``replica`` bind is configured"""
+        app.extensions['replica_router'] = self
+        self.enabled = BIND in (app.config.get('SQLALCHEMY_BINDS') or {})
+        self.max_staleness = app.config.get('REPLICA_MAX_STALENESS', self.max_staleness)
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', self.sticky_seconds)
+        if not self.enabled:
+            return
+        app.before_request(self._route_request)
+        app.after_request(self._remember_writes)
+        if not event.contains(RoutingSession, 'after_flush', self._after_flush):
+            event.listen(RoutingSession, 'after_flush', self._after_flush)
+            event.listen(RoutingSession, 'do_orm_execute', self._after_execute)
+            event.listen(RoutingSession, 'before_commit', self._before_commit)
+            event.listen(RoutingSession, 'after_rollback', self._after_rollback)
+
+    # ---------- lag ----------
+
+    def replica_lag(self):
+        """Seconds the replica trails the primary (cached briefly); None if it cannot be read"""
+        now = time.monotonic()
+        if now - self._lag_checked < LAG_CHECK_INTERVAL:
+            return self._lag
+        with self._lock:
+            if now - self._lag_checked >= LAG_CHECK_INTERVAL:
+                self._lag = self._measure_lag()
+                self._lag_checked = now
+        return self._lag
+
+    def _measure_lag(self):
+        from models import db, ReplicationHeartbeat
+        table = ReplicationHeartbeat.__table__
+        query = table.select().with_only_columns(table.c.written_at).where(table.c.id == 1)
+        try:
+            with db.engines[BIND].connect() as conn:
+                replica_at = conn.execute(query).scalar()
+            with db.engine.connect() as conn:
+                primary_at = conn.execute(query).scalar()
+        except Exception:
+            current_app.logger.warning('Replica heartbeat unreadable; reading from the primary', exc_info=True)
+            return None
+        if replica_at is None:
+            return None  # never synced
+        if primary_at is None:
+            return 0.0
+        return max((primary_at - replica_at).total_seconds(), 0.0)
+
+    def _after_flush(self, db_session, flush_context):
+        self._record_write(db_session)
+
+    def _after_execute(self, orm_execute_state):
+        # Set-based UPDATE/DELETE/INSERT statements never flush
+        if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+            self._record_write(orm_execute_state.session)
+
+    def _record_write(self, db_session):
+        """Pin the rest of the session to the primary and have the transaction bump the heartbeat"""
+        db_session.info[WROTE] = True
+        db_session.info[USE_REPLICA] = False
+        db_session.info[HEARTBEAT_DUE] = True
+
+    def _before_commit(self, db_session):
+        # Flush first so pending objects count as writes. Bumping at commit rather than at the
+        # first write keeps the heartbeat row locked only briefly.
+        db_session.flush()
+        if db_session.info.pop(HEARTBEAT_DUE, False):
+            self._bump_heartbeat(db_session)
+
+    def _after_rollback(self, db_session):
+        db_session.info.pop(HEARTBEAT_DUE, None)
+
+    def _bump_heartbeat(self, db_session):
+        from models import ReplicationHeartbeat
+        table = ReplicationHeartbeat.__table__
+        connection = db_session.connection()
+        written_at = datetime.utcnow()
+        if connection.execute(table.update().where(table.c.id == 1).values(written_at=written_at)).rowcount == 0:
+            connection.execute(table.insert().values(id=1, written_at=written_at))
+
+    # ---------- per request ----------
+
+    def _staleness_bound(self):
+        view = current_app.view_functions.get(request.endpoint)
+        bound = getattr(view, '_max_staleness', self.max_staleness)
+        requested = request.headers.get('X-Max-Staleness', type=float)
+        if requested is not None:
+            bound = min(bound, max(requested, 0.0))
+        return bound
+
+    def _route_request(self):
+        from models import db
+        g.read_source = 'primary'
+        if request.method not in ('GET', 'HEAD'):
+            return
+        view = current_app.view_functions.get(request.endpoint)
+        if view is None or getattr(view, '_use_primary', False):
+            return
+        if session.get(STICKY_KEY, 0) > time.time():
+            return
+        lag = self.replica_lag()
+        if lag is None or lag > self._staleness_bound():
+            return
+        db.session.info[USE_REPLICA] = True
+        g.read_source = 'replica'
+
+    def _remember_writes(self, response):
+        from models import db
+        if db.session.info.pop(WROTE, False):
+            session[STICKY_KEY] = time.time() + self.sticky_seconds
+        response.headers['X-Read-Source'] = g.get('read_source', 'primary')
+        return response
+
+
+def sync_sqlite_replica():
+    """Copy the SQLite primary into the SQLite replica (a local stand-in for replication)"""
+    import sqlite3
+    from models import db
+
+    primary, replica = db.engine.url, db.engines[BIND].url
+    if primary.get_backend_name() != 'sqlite' or replica.get_backend_name() != 'sqlite':
+        raise ValueError('sync-replica only copies SQLite files; use real replication for other databases')
+    db.engines[BIND].dispose()
+    source = sqlite3.connect(primary.database)
+    target = sqlite3.connect(replica.database)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    return replica.database
+
+
+replica_router = ReplicaRouter()
@@ -0,0 +1,148 @@
+"""Database-level constraints: foreign key behaviour and unique active bookings.
+
+Foreign keys in ``models.py`` carry ``ON DELETE`` rules, so deleting an
+opportunity removes its time slots, bookings and tags in the database
+without the ORM loading them. SQLite only enforces foreign keys when asked,
+once per connection, which the connect listener below does.
+
+``create_all()`` never changes existing tables, so databases created before
+the rules were added need ``flask upgrade-foreign-keys``. On SQLite this
+rebuilds the affected tables, because SQLite cannot alter a constraint. On
+PostgreSQL it swaps the constraints in place. The same SQLite rebuild adds
+``AUTOINCREMENT`` to the tables the archiver moves rows out of, so a deleted
+highest id is never handed out again.
+
+A partial unique index stops a volunteer from holding the same time slot
+twice while confirmed. ``flask dedupe-bookings`` adds it to existing
+databases after cancelling any duplicates already there.
+"""
+import sqlite3
+from datetime import datetime
+
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.engine import Engine
+
+from models import db, Booking
+
+
+@event.listens_for(Engine, 'connect')
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+
+def _ondelete(value):
+    return (value or '').upper() or None
+
+
+def outdated_tables(engine=None):
+    """Tables whose foreign keys in the database lack the ON DELETE rules declared in models.py"""
+    engine = engine or db.engine
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    unincremented = set(missing_autoincrement(engine))
+    outdated = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        wanted = {(fk.parent.name, _ondelete(fk.ondelete)) for fk in table.foreign_keys}
+        actual = {(fk['constrained_columns'][0], _ondelete(fk.get('options', {}).get('ondelete')))
+                  for fk in inspector.get_foreign_keys(table.name)}
+        if wanted - actual or table.name in unincremented:
+            outdated.append(table)
+    return outdated
+
+
+def missing_autoincrement(engine=None):
+    """SQLite tables declared with ``sqlite_autoincrement`` in models.py but created without it"""
+    engine = engine or db.engine
+    if engine.dialect.name != 'sqlite':
+        return []
+    with engine.connect() as conn:
+        ddl = dict(conn.exec_driver_sql("SELECT name, sql FROM sqlite_master WHERE type = 'table'").all())
+    return [table.name for table in db.metadata.sorted_tables
+            if table.dialect_options['sqlite'].get('autoincrement') and table.name in ddl
+            and 'AUTOINCREMENT' not in ddl[table.name].upper()]
+
+
+def cascades_enabled(table_name, column_name, engine=None):
+    """True if the database deletes rows of ``table_name`` with their ``column_name`` parent"""
+    for fk in inspect(engine or db.engine).get_foreign_keys(table_name):
+        if fk['constrained_columns'] == [column_name]:
+            return _ondelete(fk.get('options', {}).get('ondelete')) == 'CASCADE'
+    return False
+
+
+def upgrade_foreign_keys():
+    """Bring existing tables' foreign keys in line with models.py; returns the upgraded table names"""
+    tables = outdated_tables()
+    if not tables:
+        return []
+    if db.engine.dialect.name == 'sqlite':
+        _rebuild_sqlite_tables(tables)
+    else:
+        _replace_constraints(tables)
+    return [table.name for table in tables]
+
+
+def _rebuild_sqlite_tables(tables):
+    inspector = inspect(db.engine)
+    with db.engine.connect() as conn:
+        # Must be set outside a transaction; the rebuild briefly leaves dangling references.
+        # legacy_alter_table stops RENAME from repointing other tables' references at the old copy
+        conn.exec_driver_sql('PRAGMA foreign_keys=OFF')
+        conn.exec_driver_sql('PRAGMA legacy_alter_table=ON')
+        conn.commit()
+        try:
+            with conn.begin():
+                for table in tables:
+                    old = f'_old_{table.name}'
+                    columns = [c['name'] for c in inspector.get_columns(table.name)]
+                    for index in inspector.get_indexes(table.name):
+                        conn.exec_driver_sql(f'DROP INDEX "{index["name"]}"')
+                    conn.exec_driver_sql(f'ALTER TABLE "{table.name}" RENAME TO "{old}"')
+                    table.create(conn)
+                    shared = ', '.join(f'"{c.name}"' for c in table.columns if c.name in columns)
+                    conn.exec_driver_sql(f'INSERT INTO "{table.name}" ({shared}) SELECT {shared} FROM "{old}"')
+                    conn.exec_driver_sql(f'DROP TABLE "{old}"')
+                problems = conn.exec_driver_sql('PRAGMA foreign_key_check').fetchall()
+                if problems:
+                    raise RuntimeError(f'{len(problems)} rows reference missing parents, e.g. {problems[0]}')
+        finally:
+            conn.exec_driver_sql('PRAGMA legacy_alter_table=OFF')
+            conn.exec_driver_sql('PRAGMA foreign_keys=ON')
+
+
+def _replace_constraints(tables):
+    inspector = inspect(db.engine)
+    with db.engine.begin() as conn:
+        for table in tables:
+            names = {fk['constrained_columns'][0]: fk['name'] for fk in inspector.get_foreign_keys(table.name)}
+            for fk in table.foreign_keys:
+                name = names.get(fk.parent.name) or f'{table.name}_{fk.parent.name}_fkey'
+                clause = f' ON DELETE {fk.ondelete}' if fk.ondelete else ''
+                if fk.parent.name in names:
+                    conn.execute(text(f'ALTER TABLE "{table.name}" DROP CONSTRAINT "{name}"'))
+                conn.execute(text(
+                    f'ALTER TABLE "{table.name}" ADD CONSTRAINT "{name}" FOREIGN KEY ("{fk.parent.name}") '
+                    f'REFERENCES "{fk.column.table.name}" ("{fk.column.name}"){clause}'
+                ))
+
+
+def dedupe_active_bookings():
+    """Cancel all but the first confirmed booking per volunteer and time slot, then add the unique index.
+
+    Returns the number of bookings cancelled.
+    """
+    active = (Booking.status == 'confirmed', Booking.time_slot_id.isnot(None))
+    first = select(db.func.min(Booking.id)).where(*active).group_by(Booking.user_id, Booking.time_slot_id)
+    cancelled = db.session.execute(Booking.__table__.update().where(
+        *active, Booking.id.notin_(first)
+    ).values(status='cancelled', updated_at=datetime.utcnow())).rowcount
+    db.session.commit()
+    for index in Booking.__table__.indexes:
+        if index.unique:
+            index.create(db.engine, checkfirst=True)
+    return cancelled
@@ -0,0 +1,192 @@
+"""Opportunity search with facet counts.
+
+``search()`` returns a page of results plus counts per category, city, date
+bucket and "has open spots". The counts come from a single GROUP BY over the
+text/date-filtered set, one row per (category, city, bucket, open)
+combination, which is then summed per facet in Python. Each facet is counted
+with the other facets' selections applied but not its own, so picking a
+category still shows how many results the other categories have. The total
+is read off the same rows, so no separate COUNT is needed.
+"""
+from datetime import date, datetime, timedelta
+from math import ceil
+
+from sqlalchemy import select
+
+from models import db, Booking, Opportunity, TimeSlot
+
+PER_PAGE = 12
+FACETS = ('category', 'city', 'when', 'open')
+# Date buckets relative to today, in display order
+WHEN_LABELS = {
+    'week': 'Next 7 days',
+    'month': '1–4 weeks away',
+    'later': 'Later',
+    'past': 'Past',
+}
+OPEN_LABELS = {'1': 'Has open spots', '0': 'Full'}
+
+
+def parse_search(args):
+    """Search parameters from a query string; unknown or malformed values are ignored"""
+    params = {
+        'q': args.get('q', '').strip(),
+        'category': args.get('category', ''),
+        'city': args.get('city', ''),
+        'when': args.get('when', '') if args.get('when') in WHEN_LABELS else '',
+        'open': args.get('open', '') if args.get('open') in OPEN_LABELS else '',
+        'date': None,
+        'page': max(args.get('page', 1, type=int) or 1, 1),
+    }
+    if args.get('date'):
+        try:
+            params['date'] = datetime.strptime(args['date'], '%Y-%m-%d').date()
+        except ValueError:
+            pass
+    return params
+
+
+def search_args(params, **changes):
+    """Query-string args for the current search with some values changed; changing a filter resets the page"""
+    args = {name: params[name] for name in ('q', 'category', 'city', 'when', 'open')}
+    args['date'] = params['date'].isoformat() if params['date'] else ''
+    args['page'] = params['page'] if 'page' in changes else 1
+    args.update(changes)
+    return {name: value for name, value in args.items() if value and not (name == 'page' and value == 1)}
+
+
+def _when(today):
+    return db.case(
+        (Opportunity.date < today, 'past'),
+        (Opportunity.date < today + timedelta(days=7), 'week'),
+        (Opportunity.date <= today + timedelta(days=30), 'month'),
+        else_='later',
+    )
+
+
+def _open():
+    """1 if an opportunity has spots left: slot capacity (or its own) minus confirmed bookings"""
+    capacity = select(db.func.sum(TimeSlot.spots_available)).where(
+        TimeSlot.opportunity_id == Opportunity.id
+    ).scalar_subquery()
+    confirmed = select(db.func.count(Booking.id)).where(
+        Booking.opportunity_id == Opportunity.id, Booking.status == 'confirmed'
+    ).scalar_subquery()
+    remaining = db.func.coalesce(capacity, Opportunity.spots_available, 0) - confirmed
+    return db.case((remaining > 0, '1'), else_='0')
+
+
+def _facet_columns(today):
+    return {
+        'category': db.func.coalesce(Opportunity.category, ''),
+        'city': db.func.coalesce(Opportunity.city, ''),
+        'when': _when(today),
+        'open': _open(),
+    }
+
+
+def _base(params, *columns):
+    statement = select(*columns).where(Opportunity.is_active.is_(True))
+    if params['q']:
+        statement = statement.where(db.or_(
+            Opportunity.title.ilike(f"%{params['q']}%"),
+            Opportunity.description.ilike(f"%{params['q']}%")
+        ))
+    if params['date']:
+        statement = statement.where(Opportunity.date == params['date'])
+    return statement
+
+
+# Statements and row handling are kept apart so the async API (async_api.py) runs the same SQL
+def facet_statement(params, today):
+    """One row per (category, city, when, open) combination with its count"""
+    columns = _facet_columns(today)
+    return _base(params, *columns.values(), db.func.count(Opportunity.id)).group_by(*columns.values())
+
+
+def results_statement(params, page, per_page, today):
+    """One page of fully filtered opportunities"""
+    columns = _facet_columns(today)
+    statement = _base(params, Opportunity)
+    for name in FACETS:
+        if params[name]:
+            statement = statement.where(columns[name] == params[name])
+    return statement.order_by(Opportunity.date, Opportunity.id).limit(per_page).offset((page - 1) * per_page)
+
+
+def paginate(params, total, per_page=PER_PAGE):
+    """``(page, pages)``, with the requested page clamped to the last one"""
+    pages = max(ceil(total / per_page), 1)
+    return min(params['page'], pages), pages
+
+
+def facet_counts(params, today=None):
+    """``(facets, total)``: {facet: [(value, label, count, selected)]} and the fully filtered count"""
+    return tally_facets(db.session.execute(facet_statement(params, today or date.today())).all(), params)
+
+
+def tally_facets(rows, params):
+    """``facet_counts`` from the rows of ``facet_statement``"""
+    selected = {name: params[name] for name in FACETS if params[name]}
+    counts = {name: {} for name in FACETS}
+    total = 0
+    for *values, count in rows:
+        values = dict(zip(FACETS, values))
+        misses = [name for name, value in selected.items() if values[name] != value]
+        if not misses:
+            total += count
+        for name in FACETS:
+            # Count toward a facet when every *other* selection matches
+            if not misses or misses == [name]:
+                counts[name][values[name]] = counts[name].get(values[name], 0) + count
+
+    facets = {}
+    for name in FACETS:
+        if params[name]:
+            counts[name].setdefault(params[name], 0)  # keep a selection visible so it can be cleared
+        if name == 'when':
+            order = [(value, WHEN_LABELS[value]) for value in WHEN_LABELS if value in counts[name]]
+        elif name == 'open':
+            order = [(value, OPEN_LABELS[value]) for value in OPEN_LABELS if value in counts[name]]
+        else:
+            order = [(value, value or ('Other' if name == 'category' else 'Unknown'))
+                     for value in sorted(counts[name], key=lambda v: (-counts[name][v], v))]
+        facets[name] = [(value, label, counts[name][value], params[name] == value) for value, label in order]
+    return facets, total
+
+
+def search(params, per_page=PER_PAGE, today=None):
+    """One page of matching opportunities with facet counts"""
+    today = today or date.today()
+    facets, total = facet_counts(params, today)
+    page, pages = paginate(params, total, per_page)
+    results = db.session.scalars(results_statement(params, page, per_page, today)).all()
+
+    return {
+        'results': results,
+        'facets': facets,
+        'total': total,
+        'page': page,
+        'pages': pages,
+    }
+
+
+def search_json(found, organization_names):
+    """The XHR search payload; ``organization_names`` maps opportunity id to its organization's name"""
+    return {
+        'results': [{
+            'id': opp.id,
+            'title': opp.title,
+            'organization': organization_names.get(opp.id) or 'Unknown',
+            'date': opp.date.strftime('%b %d, %Y') if opp.date else 'TBD',
+            'time': opp.time,
+            'hours': opp.hours,
+            'spots_available': opp.spots_available
+        } for opp in found['results']],
+        'facets': {name: [{'value': value, 'label': label, 'count': count, 'selected': selected}
+                          for value, label, count, selected in values]
+                   for name, values in found['facets'].items()},
+        'total': found['total'],
+        'page': found['page'],
+        'pages': found['pages'],
+    }
@@ -0,0 +1,471 @@
+"""Sample data for `flask init-db`.
+
+Kept out of the CLI blueprint so the dataset is only imported when the
+command actually runs.
+"""
+from datetime import datetime
+
+from werkzeug.security import generate_password_hash
+
+from models import (db, User, Opportunity, Booking, Organization, TimeSlot, UserInterest, OpportunityInterest,
+                    VolunteerHours, VolunteerHoursTotal, Task, DailyActivity, DailyActivityVolunteer,
+                    ArchivedOpportunity, ArchivedTimeSlot, ArchivedBooking)
+from interests import migrate_interest_strings
+
+
+def seed_database():
+    """Reset the database and load the sample organizations, users and opportunities"""
+    db.create_all()
+    
+    # Clear existing data
+    Task.query.delete()
+    DailyActivity.query.delete()
+    DailyActivityVolunteer.query.delete()
+    VolunteerHours.query.delete()
+    VolunteerHoursTotal.query.delete()
+    UserInterest.query.delete()
+    OpportunityInterest.query.delete()
+    ArchivedBooking.query.delete()
+    ArchivedTimeSlot.query.delete()
+    ArchivedOpportunity.query.delete()
+    Booking.query.delete()
+    TimeSlot.query.delete()
+    Opportunity.query.delete()
+    User.query.delete()  # users reference organizations
+    Organization.query.delete()
+    db.session.commit()
+    
+    # Create sample organizations
+    organizations = [
+        Organization(
+            name='Boston Green Space Alliance',
+            description='Creating and maintaining green spaces throughout Boston',
+            contact_email='info@bostongreenspace.org',
+            phone='617-555-0100',
+            address='100 Cambridge St, Boston, MA 02114'
+        ),
+        Organization(
+            name='Massachusetts Food Bank',
+            description='Fighting hunger across Massachusetts',
+            contact_email='help@mafoodbank.org',
+            phone='617-555-0200',
+            address='70 South Bay Ave, Boston, MA 02118'
+        ),
+        Organization(
+            name='Cambridge Public Library',
+            description='Serving the Cambridge community through literacy',
+            contact_email='volunteer@cambridgelibrary.org',
+            phone='617-555-0300',
+            address='449 Broadway, Cambridge, MA 02138'
+        ),
+        Organization(
+            name='Worcester Youth Center',
+            description='Empowering youth through education and mentorship',
+            contact_email='info@worcesteryouth.org',
+            phone='508-555-0400',
+            address='11 Ionic Ave, Worcester, MA 01608'
+        ),
+        Organization(
+            name='Cape Cod Animal Shelter',
+            description='Providing care for animals in need',
+            contact_email='adopt@capecodanimals.org',
+            phone='508-555-0500',
+            address='1577 Falmouth Rd, Centerville, MA 02632'
+        ),
+        Organization(
+            name='Springfield Community Kitchen',
+            description='Feeding families in Western Massachusetts',
+            contact_email='meals@springfieldkitchen.org',
+            phone='413-555-0600',
+            address='1095 Main St, Springfield, MA 01103'
+        ),
+        Organization(
+            name='Salem Historical Society',
+            description='Preserving Salem\'s rich history',
+            contact_email='volunteer@salemhistory.org',
+            phone='978-555-0700',
+            address='132 Essex St, Salem, MA 01970'
+        ),
+        Organization(
+            name='Lowell Tech Mentorship',
+            description='Teaching technology skills to underserved communities',
+            contact_email='mentor@lowelltech.org',
+            phone='978-555-0800',
+            address='35 Kirk St, Lowell, MA 01852'
+        ),
+        Organization(
+            name='New Bedford Harbor Initiative',
+            description='Protecting and cleaning our waterways',
+            contact_email='harbor@newbedford.org',
+            phone='508-555-0900',
+            address='175 William St, New Bedford, MA 02740'
+        ),
+        Organization(
+            name='Quincy Healthcare Volunteers',
+            description='Supporting patients and families',
+            contact_email='care@quincyhealth.org',
+            phone='617-555-1000',
+            address='114 Whitwell St, Quincy, MA 02169'
+        ),
+    ]
+    
+    db.session.add_all(organizations)
+    db.session.commit()
+    
+    # Create sample users for admin and organization portals
+    admin_user = User(
+        email='admin@volunteerhub.com',
+        username='admin',
+        full_name='System Administrator',
+        password_hash=generate_password_hash('admin123'),
+        role='admin'
+    )
+    db.session.add(admin_user)
+    
+    # Create organization users linked to their organizations
+    org_user1 = User(
+        email='manager@bostongreen.org',
+        username='bostongreen',
+        full_name='Sarah Johnson',
+        password_hash=generate_password_hash('org123'),
+        role='organization',
+        organization_id=1
+    )
+    
+    org_user2 = User(
+        email='coordinator@mafoodbank.org',
+        username='mafoodbank',
+        full_name='Michael Chen',
+        password_hash=generate_password_hash('org123'),
+        role='organization',
+        organization_id=2
+    )
+    
+    org_user3 = User(
+        email='director@cambridgelibrary.org',
+        username='cambridgelib',
+        full_name='Emily Rodriguez',
+        password_hash=generate_password_hash('org123'),
+        role='organization',
+        organization_id=3
+    )
+    
+    org_user4 = User(
+        email='volunteer@worcestermedia.org',
+        username='worcestermedia',
+        full_name='David Kim',
+        password_hash=generate_password_hash('org123'),
+        role='organization',
+        organization_id=4
+    )
+    
+    org_user5 = User(
+        email='outreach@framinghamarts.org',
+        username='framinghamarts',
+        full_name='Jessica Martinez',
+        password_hash=generate_password_hash('org123'),
+        role='organization',
+        organization_id=5
+    )
+    
+    db.session.add_all([org_user1, org_user2, org_user3, org_user4, org_user5])
+    db.session.commit()
+    
+    # Create unique opportunities (NO DUPLICATES!)
+    opportunities_data = [
+        # Boston Area
+        {
+            'title': 'Charles River Cleanup',
+            'description': 'Help us clean up the beautiful Charles River Esplanade. We provide all equipment including gloves, bags, and grabbers. Great for families and individuals looking to make a difference!',
+            'organization_id': 1,
+            'category': 'Environment',
+            'date': datetime(2025, 11, 2).date(),
+            'hours': 1,
+            'latitude': 42.3601,
+            'longitude': -71.0942,
+            'address': 'Charles River Esplanade, Boston, MA 02116',
+            'city': 'Boston',
+            'state': 'MA',
+            'zip_code': '02116',
+            'requirements': 'Comfortable walking shoes, weather-appropriate clothing',
+            'what_to_bring': 'Water bottle, sunscreen',
+            'time_slots': ['9:00 AM', '10:00 AM', '11:00 AM', '1:00 PM', '2:00 PM'],
+            'spots_per_slot': 15,
+            'image_url': 'https://images.unsplash.com/photo-1618477461853-cf6ed80faba5?w=800&q=80'
+        },
+        {
+            'title': 'Food Bank Sorting & Distribution',
+            'description': 'Sort and package food donations for distribution to families in need. Physical work but very rewarding!',
+            'organization_id': 2,
+            'category': 'Food Security',
+            'date': datetime(2025, 11, 3).date(),
+            'hours': 1,
+            'latitude': 42.3396,
+            'longitude': -71.0663,
+            'address': '70 South Bay Ave, Boston, MA 02118',
+            'city': 'Boston',
+            'state': 'MA',
+            'zip_code': '02118',
+            'requirements': 'Must be 16 or older',
+            'what_to_bring': 'Closed-toe shoes required',
+            'time_slots': ['9:00 AM', '10:00 AM', '11:00 AM', '1:00 PM', '2:00 PM', '3:00 PM'],
+            'spots_per_slot': 10,
+            'image_url': 'https://images.unsplash.com/photo-1593113598332-cd288d649433?w=800&q=80'
+        },
+        {
+            'title': 'Community Garden Planting',
+            'description': 'Help plant vegetables and flowers in our community garden. All supplies provided!',
+            'organization_id': 1,
+            'category': 'Environment',
+            'date': datetime(2025, 11, 12).date(),
+            'hours': 1,
+            'latitude': 42.3555,
+            'longitude': -71.0642,
+            'address': 'South End Community Garden, Boston, MA 02118',
+            'city': 'Boston',
+            'state': 'MA',
+            'zip_code': '02118',
+            'requirements': 'None - all skill levels welcome!',
+            'what_to_bring': 'Gardening gloves if you have them, water bottle',
+            'time_slots': ['9:00 AM', '10:00 AM', '11:00 AM'],
+            'spots_per_slot': 10,
+            'image_url': 'https://images.unsplash.com/photo-1464226184884-fa280b87c399?w=800&q=80'
+        },
+        
+        # Cambridge
+        {
+            'title': 'Reading Buddies Program',
+            'description': 'Read with elementary school children to help improve their literacy skills. Training provided!',
+            'organization_id': 3,
+            'category': 'Education',
+            'date': datetime(2025, 11, 4).date(),
+            'hours': 1,
+            'latitude': 42.3736,
+            'longitude': -71.1097,
+            'address': '449 Broadway, Cambridge, MA 02138',
+            'city': 'Cambridge',
+            'state': 'MA',
+            'zip_code': '02138',
+            'requirements': 'Background check required, love of reading',
+            'what_to_bring': 'Enthusiasm and patience',
+            'time_slots': ['2:00 PM', '3:00 PM', '4:00 PM'],
+            'spots_per_slot': 8,
+            'image_url': 'https://images.unsplash.com/photo-1503676260728-1c00da094a0b?w=800&q=80'
+        },
+        
+        # Worcester
+        {
+            'title': 'Youth Homework Help',
+            'description': 'Help middle school students with homework and test preparation. Great for college students!',
+            'organization_id': 4,
+            'category': 'Education',
+            'date': datetime(2025, 11, 5).date(),
+            'hours': 1,
+            'latitude': 42.2626,
+            'longitude': -71.8023,
+            'address': '11 Ionic Ave, Worcester, MA 01608',
+            'city': 'Worcester',
+            'state': 'MA',
+            'zip_code': '01608',
+            'requirements': 'High school diploma or currently in college',
+            'what_to_bring': 'Positive attitude',
+            'time_slots': ['3:00 PM', '4:00 PM', '5:00 PM'],
+            'spots_per_slot': 6,
+            'image_url': 'https://images.unsplash.com/photo-1427504494785-3a9ca7044f45?w=800&q=80'
+        },
+        
+        # Cape Cod
+        {
+            'title': 'Animal Shelter Dog Walking',
+            'description': 'Take our shelter dogs for walks and provide socialization. Perfect for animal lovers!',
+            'organization_id': 5,
+            'category': 'Animal Welfare',
+            'date': datetime(2025, 11, 6).date(),
+            'hours': 1,
+            'latitude': 41.6688,
+            'longitude': -70.3545,
+            'address': '1577 Falmouth Rd, Centerville, MA 02632',
+            'city': 'Centerville',
+            'state': 'MA',
+            'zip_code': '02632',
+            'requirements': 'Must be comfortable with dogs',
+            'what_to_bring': 'Comfortable shoes, weather-appropriate clothing',
+            'time_slots': ['10:00 AM', '11:00 AM', '1:00 PM', '2:00 PM', '3:00 PM'],
+            'spots_per_slot': 5,
+            'image_url': 'https://images.unsplash.com/photo-1450778869180-41d0601e046e?w=800&q=80'
+        },
+        
+        # Springfield
+        {
+            'title': 'Community Kitchen Meal Service',
+            'description': 'Prepare and serve meals to community members in need. Very rewarding experience!',
+            'organization_id': 6,
+            'category': 'Food Security',
+            'date': datetime(2025, 11, 7).date(),
+            'hours': 1,
+            'latitude': 42.1015,
+            'longitude': -72.5898,
+            'address': '1095 Main St, Springfield, MA 01103',
+            'city': 'Springfield',
+            'state': 'MA',
+            'zip_code': '01103',
+            'requirements': 'Food handler certification preferred but not required',
+            'what_to_bring': 'Hairnet provided, closed-toe shoes',
+            'time_slots': ['11:00 AM', '12:00 PM', '1:00 PM', '2:00 PM'],
+            'spots_per_slot': 12,
+            'image_url': 'https://images.unsplash.com/photo-1488521787991-ed7bbaae773c?w=800&q=80'
+        },
+        
+        # Salem
+        {
+            'title': 'Historical Site Tour Guide',
+            'description': 'Lead tours through Salem\'s historic downtown. Training and script provided!',
+            'organization_id': 7,
+            'category': 'Technology',
+            'date': datetime(2025, 11, 8).date(),
+            'hours': 1,
+            'latitude': 42.5195,
+            'longitude': -70.8967,
+            'address': '132 Essex St, Salem, MA 01970',
+            'city': 'Salem',
+            'state': 'MA',
+            'zip_code': '01970',
+            'requirements': 'Good public speaking skills, interest in history',
+            'what_to_bring': 'Comfortable shoes for walking',
+            'time_slots': ['10:00 AM', '11:00 AM', '2:00 PM', '3:00 PM'],
+            'spots_per_slot': 4,
+            'image_url': 'https://images.unsplash.com/photo-1555854877-bab0e564b8d5?w=800&q=80'
+        },
+        
+        # Lowell
+        {
+            'title': 'Computer Skills Workshop Assistant',
+            'description': 'Help teach basic computer skills to seniors and job seekers. Tech knowledge required!',
+            'organization_id': 8,
+            'category': 'Technology',
+            'date': datetime(2025, 11, 9).date(),
+            'hours': 1,
+            'latitude': 42.6334,
+            'longitude': -71.3162,
+            'address': '35 Kirk St, Lowell, MA 01852',
+            'city': 'Lowell',
+            'state': 'MA',
+            'zip_code': '01852',
+            'requirements': 'Proficiency in Microsoft Office and basic troubleshooting',
+            'what_to_bring': 'Patience and enthusiasm',
+            'time_slots': ['2:00 PM', '3:00 PM', '4:00 PM'],
+            'spots_per_slot': 6,
+            'image_url': 'https://images.unsplash.com/photo-1531482615713-2afd69097998?w=800&q=80'
+        },
+        
+        # New Bedford
+        {
+            'title': 'Harbor Cleanup Boat Crew',
+            'description': 'Join our team on the water removing debris from New Bedford Harbor. Boating experience helpful!',
+            'organization_id': 9,
+            'category': 'Environment',
+            'date': datetime(2025, 11, 10).date(),
+            'hours': 1,
+            'latitude': 41.6362,
+            'longitude': -70.9342,
+            'address': '175 William St, New Bedford, MA 02740',
+            'city': 'New Bedford',
+            'state': 'MA',
+            'zip_code': '02740',
+            'requirements': 'Must be able to swim, life jackets provided',
+            'what_to_bring': 'Sunscreen, water bottle, change of clothes',
+            'time_slots': ['9:00 AM', '10:00 AM', '11:00 AM', '1:00 PM'],
+            'spots_per_slot': 8,
+            'image_url': 'https://images.unsplash.com/photo-1559827260-dc66d52bef19?w=800&q=80'
+        },
+        
+        # Quincy
+        {
+            'title': 'Hospital Patient Companion',
+            'description': 'Provide companionship and comfort to patients. Bring smiles and conversation!',
+            'organization_id': 10,
+            'category': 'Healthcare',
+            'date': datetime(2025, 11, 11).date(),
+            'hours': 1,
+            'latitude': 42.2529,
+            'longitude': -71.0023,
+            'address': '114 Whitwell St, Quincy, MA 02169',
+            'city': 'Quincy',
+            'state': 'MA',
+            'zip_code': '02169',
+            'requirements': 'Background check required, compassionate nature',
+            'what_to_bring': 'Friendly smile',
+            'time_slots': ['10:00 AM', '11:00 AM', '2:00 PM', '3:00 PM'],
+            'spots_per_slot': 5,
+            'image_url': 'https://images.unsplash.com/photo-1576765608535-5f04d1e3f289?w=800&q=80'
+        },
+        
+        # Framingham
+        {
+            'title': 'Weekend Food Pantry',
+            'description': 'Stock shelves and help distribute groceries to families. Fast-paced and fulfilling!',
+            'organization_id': 2,
+            'category': 'Food Security',
+            'date': datetime(2025, 11, 13).date(),
+            'hours': 1,
+            'latitude': 42.2808,
+            'longitude': -71.4166,
+            'address': 'Framingham Food Pantry, Framingham, MA 01702',
+            'city': 'Framingham',
+            'state': 'MA',
+            'zip_code': '01702',
+            'requirements': 'Must be 14 or older',
+            'what_to_bring': 'Comfortable shoes',
+            'time_slots': ['9:00 AM', '10:00 AM', '11:00 AM', '12:00 PM'],
+            'spots_per_slot': 8,
+            'image_url': 'https://images.unsplash.com/photo-1593113646773-028c64a8f1b8?w=800&q=80'
+        },
+    ]
+    
+    # Create opportunities and their time slots
+    for opp_data in opportunities_data:
+        # Extract time slot data
+        time_slots = opp_data.pop('time_slots')
+        spots_per_slot = opp_data.pop('spots_per_slot')
+        
+        # Create opportunity
+        opp = Opportunity(**opp_data, is_active=True)
+        db.session.add(opp)
+        db.session.flush()  # Get the opportunity ID
+        
+        # Create time slots for this opportunity
+        for time in time_slots:
+            slot = TimeSlot(
+                opportunity_id=opp.id,
+                start_time=time,
+                spots_available=spots_per_slot,
+                is_available=True
+            )
+            db.session.add(slot)
+    
+    db.session.commit()
+    
+    total_opps = len(opportunities_data)
+    total_slots = sum(len(opp['time_slots']) for opp in [
+        {'time_slots': ['9:00 AM', '10:00 AM', '11:00 AM', '1:00 PM', '2:00 PM']},
+        {'time_slots': ['9:00 AM', '10:00 AM', '11:00 AM', '1:00 PM', '2:00 PM', '3:00 PM']},
+        {'time_slots': ['9:00 AM', '10:00 AM', '11:00 AM']},
+        {'time_slots': ['2:00 PM', '3:00 PM', '4:00 PM']},
+        {'time_slots': ['3:00 PM', '4:00 PM', '5:00 PM']},
+        {'time_slots': ['10:00 AM', '11:00 AM', '1:00 PM', '2:00 PM', '3:00 PM']},
+        {'time_slots': ['11:00 AM', '12:00 PM', '1:00 PM', '2:00 PM']},
+        {'time_slots': ['10:00 AM', '11:00 AM', '2:00 PM', '3:00 PM']},
+        {'time_slots': ['2:00 PM', '3:00 PM', '4:00 PM']},
+        {'time_slots': ['9:00 AM', '10:00 AM', '11:00 AM', '1:00 PM']},
+        {'time_slots': ['10:00 AM', '11:00 AM', '2:00 PM', '3:00 PM']},
+        {'time_slots': ['9:00 AM', '10:00 AM', '11:00 AM', '12:00 PM']},
+    ])
+    
+    print(f'✅ Database initialized successfully!')
+    print(f'📊 {len(organizations)} organizations')
+    print(f'🎯 {total_opps} unique volunteer opportunities')
+    print(f'🕐 {total_slots} total time slots (OpenTable style!)')
+    print(f'📍 Locations: Boston, Cambridge, Worcester, Cape Cod, Springfield, Salem, Lowell, New Bedford, Quincy, Framingham')
+    print(f'\n💡 Each opportunity now has multiple hourly time slots - just like OpenTable!')
+    
+    migrate_interest_strings()
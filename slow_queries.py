@@ -0,0 +1,260 @@
+"""Slow-query log with query plans.
+
+Every SQL statement that takes longer than ``SLOW_QUERY_MS`` (default 100)
+is written as one JSON line to ``SLOW_QUERY_LOG`` (default
+``instance/slow_queries.log``). Each line records the statement with its
+literals replaced by ``?``, the endpoint that ran it ('background' outside
+requests), and the types of its bound parameters. Parameter values are not
+logged.
+
+The first time a process sees a SELECT, UPDATE or DELETE it also logs the
+statement's plan: ``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN`` elsewhere,
+inside a savepoint so a failed EXPLAIN cannot abort the request's
+transaction. Neither runs the statement. The log rotates at ``SLOW_QUERY_LOG_BYTES`` and keeps
+``SLOW_QUERY_LOG_BACKUPS`` old files. All workers append to the same file,
+and rotation runs under a file lock.
+
+``/admin/slow-queries`` reads the log and its backups and ranks statements
+by total time.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from flask import request
+from sqlalchemy import event
+
+try:
+    import fcntl
+except ImportError:  # Windows: single process, nothing to serialize
+    fcntl = None
+
+EXPLAINABLE = ('select', 'update', 'delete')
+SAVEPOINT = 'slow_query_explain'
+# Routes and parameter shapes kept per statement in the report
+TOP = 5
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_NAMED = re.compile(r'%\(\w+\)s|:\w+|\$\d+|%s')
+_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+def normalize(statement):
+    """The statement with literals and placeholders as ``?`` and IN lists as ``(?...)``"""
+    statement = _STRING.sub('?', statement)
+    statement = _NAMED.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    statement = _LIST.sub('(?...)', statement)
+    return _SPACE.sub(' ', statement).strip()
+
+
+def _type_runs(values):
+    """['int', 'int', 'str'] -> ['int x 2', 'str']"""
+    runs = []
+    for value in values:
+        name = type(value).__name__
+        if runs and runs[-1][0] == name:
+            runs[-1][1] += 1
+        else:
+            runs.append([name, 1])
+    return [name if count == 1 else f'{name} x {count}' for name, count in runs]
+
+
+def parameter_shape(parameters, executemany=False):
+    """Types of the bound parameters, without their values"""
+    if executemany and parameters:
+        return {'rows': len(parameters), 'each': parameter_shape(parameters[0])}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return _type_runs(parameters)
+    return type(parameters).__name__
+
+
+def _endpoint():
+    try:
+        return request.endpoint or 'unmatched'
+    except RuntimeError:  # outside a request: background threads and commands
+        return 'background'
+
+
+class SharedRotatingFileHandler(RotatingFileHandler):
+    """A RotatingFileHandler several processes can append to"""
+
+    def shouldRollover(self, record):
+        # Reopen the file if another process rotated it away
+        if self.stream is not None:
+            try:
+                current = os.stat(self.baseFilename).st_ino
+            except FileNotFoundError:
+                current = None
+            if current != os.fstat(self.stream.fileno()).st_ino:
+                self.stream.close()
+                self.stream = self._open()
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        with open(self.baseFilename + '.lock', 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) < self.maxBytes:
+                # Another process rolled over while this one waited
+                if self.stream:
+                    self.stream.close()
+                self.stream = self._open()
+                return
+            super().doRollover()
+
+
+class SlowQueryLog:
+    """Logs statements over ``SLOW_QUERY_MS``, each new one with its plan"""
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.threshold = 0.1
+        self.path = None
+        self.logger = logging.getLogger('volunteerhub.slow_queries')
+        self.logger.propagate = False
+        self._explained = set()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Open the log and hook the database engines; call after ``db.init_app``"""
+        from models import db
+
+        app.extensions['slow_query_log'] = self
+        self.enabled = app.config.get('SLOW_QUERY_ENABLED', True)
+        self.threshold = app.config.get('SLOW_QUERY_MS', 100) / 1000
+        self.path = app.config.get('SLOW_QUERY_LOG') or os.path.join(app.instance_path, 'slow_queries.log')
+        if not self.enabled:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
+        handler = SharedRotatingFileHandler(self.path, maxBytes=app.config.get('SLOW_QUERY_LOG_BYTES', 5_000_000),
+                                            backupCount=app.config.get('SLOW_QUERY_LOG_BACKUPS', 3))
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        self.logger.addHandler(handler)
+        self.logger.setLevel(logging.INFO)
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._before)
+                event.listen(engine, 'after_cursor_execute', self._after)
+
+    # ---------- recording ----------
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        # On the statement's own context, so a statement that raises leaves nothing behind
+        context._slow_query_started = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_slow_query_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        if elapsed < self.threshold:
+            return
+        normalized = normalize(statement)
+        query_id = hashlib.sha1(normalized.encode()).hexdigest()[:12]
+        self._write({
+            'type': 'query',
+            'id': query_id,
+            'ms': round(elapsed * 1000, 2),
+            'route': _endpoint(),
+            'params': parameter_shape(parameters, executemany),
+            'statement': normalized,
+        })
+        if query_id not in self._explained:
+            self._explained.add(query_id)
+            self._write({'type': 'plan', 'id': query_id,
+                         'plan': self._explain(conn, statement, parameters[0] if executemany else parameters)})
+
+    def _write(self, entry):
+        entry.update(at=datetime.utcnow().isoformat(timespec='seconds'), pid=os.getpid())
+        self.logger.info(json.dumps(entry, default=str))
+
+    def _explain(self, conn, statement, parameters):
+        """The plan as text, from a raw DB-API cursor so it is not itself logged"""
+        if not statement.lstrip().lower().startswith(EXPLAINABLE):
+            return None
+        sqlite = conn.dialect.name == 'sqlite'
+        cursor = conn.connection.cursor()
+        try:
+            # This runs in the request's transaction. A failed statement aborts a PostgreSQL
+            # transaction, so EXPLAIN gets a savepoint to roll back to; SQLite needs none.
+            if not sqlite:
+                cursor.execute(f'SAVEPOINT {SAVEPOINT}')
+            try:
+                cursor.execute(('EXPLAIN QUERY PLAN ' if sqlite else 'EXPLAIN ') + statement, parameters)
+                rows = cursor.fetchall()
+            except Exception:
+                if not sqlite:
+                    cursor.execute(f'ROLLBACK TO SAVEPOINT {SAVEPOINT}')
+                raise
+            if not sqlite:
+                cursor.execute(f'RELEASE SAVEPOINT {SAVEPOINT}')
+        except Exception as e:  # the plan is a nice-to-have; never fail the query over it
+            return f'EXPLAIN failed: {e}'
+        finally:
+            cursor.close()
+        if not sqlite:
+            return '\n'.join(str(row[0]) for row in rows)
+        # SQLite rows are (id, parent, unused, detail); indent each step under its parent
+        depth = {0: -1}
+        lines = []
+        for node, parent, _, detail in rows:
+            depth[node] = depth.get(parent, -1) + 1
+            lines.append('  ' * depth[node] + detail)
+        return '\n'.join(lines)
+
+    # ---------- reports ----------
+
+    def _entries(self):
+        paths = [self.path] + [f'{self.path}.{n}' for n in range(1, 100)]
+        for path in reversed([path for path in paths if path and os.path.exists(path)]):  # oldest first
+            with open(path) as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by a crash
+
+    def report(self):
+        """Logged statements as dicts, most total time first"""
+        statements = {}
+        plans = {}
+        for entry in self._entries():
+            if entry.get('type') == 'plan':
+                plans[entry['id']] = entry['plan']
+                continue
+            stats = statements.get(entry['id'])
+            if stats is None:
+                stats = statements[entry['id']] = {
+                    'id': entry['id'], 'statement': entry['statement'], 'count': 0, 'total_ms': 0.0,
+                    'max_ms': 0.0, 'routes': Counter(), 'params': Counter(), 'last_seen': None,
+                }
+            stats['count'] += 1
+            stats['total_ms'] += entry['ms']
+            stats['max_ms'] = max(stats['max_ms'], entry['ms'])
+            stats['routes'][entry['route']] += 1
+            stats['params'][json.dumps(entry['params'])] += 1
+            stats['last_seen'] = entry['at']
+        for stats in statements.values():
+            stats['mean_ms'] = stats['total_ms'] / stats['count']
+            stats['plan'] = plans.get(stats['id'])
+            stats['routes'] = stats['routes'].most_common(TOP)
+            stats['params'] = stats['params'].most_common(TOP)
+        return sorted(statements.values(), key=lambda stats: stats['total_ms'], reverse=True)
+
+
+slow_query_log = SlowQueryLog()
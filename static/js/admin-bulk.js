@@ -0,0 +1,30 @@
+// Bulk selection for admin tables: row checkboxes belong to <form id="bulkForm">
+// through their form attribute, so the per-row action forms can stay in the table.
+document.addEventListener('DOMContentLoaded', function () {
+    const form = document.getElementById('bulkForm');
+    if (!form) return;
+    const boxes = () => Array.from(document.querySelectorAll('input[name="ids"][form="bulkForm"]'));
+    const count = form.querySelector('[data-bulk-count]');
+
+    function update() {
+        count.textContent = boxes().filter(box => box.checked).length;
+    }
+
+    document.querySelectorAll('[data-bulk-all]').forEach(function (all) {
+        all.addEventListener('change', function () {
+            // Only rows left visible by the table filters
+            boxes().forEach(box => {
+                if (box.closest('tr').style.display !== 'none') box.checked = all.checked;
+            });
+            update();
+        });
+    });
+    boxes().forEach(box => box.addEventListener('change', update));
+
+    form.addEventListener('submit', function (event) {
+        if (!boxes().some(box => box.checked)) {
+            event.preventDefault();
+            alert('Select at least one row first.');
+        }
+    });
+});
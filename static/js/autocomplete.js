@@ -0,0 +1,87 @@
+// Search box suggestions: <input data-autocomplete="/api/autocomplete"
+// data-opportunity-url="/opportunity/0"> inside a form pointing at /search.
+document.addEventListener('DOMContentLoaded', function () {
+    const KIND_LABELS = {opportunity: 'Opportunity', organization: 'Organization', category: 'Cause', city: 'City'};
+    const FILTERS = {organization: 'q', category: 'category', city: 'city'};
+
+    document.querySelectorAll('input[data-autocomplete]').forEach(function (input) {
+        const list = document.createElement('ul');
+        list.className = 'autocomplete-list';
+        list.setAttribute('role', 'listbox');
+        list.hidden = true;
+        input.setAttribute('autocomplete', 'off');
+        input.parentNode.appendChild(list);
+
+        const cache = new Map();
+        let suggestions = [];
+        let active = -1;
+        let timer = null;
+
+        function target(suggestion) {
+            if (suggestion.kind === 'opportunity') {
+                return input.dataset.opportunityUrl.replace(/0$/, suggestion.id);
+            }
+            return input.form.action + '?' + new URLSearchParams({[FILTERS[suggestion.kind]]: suggestion.label});
+        }
+
+        function render() {
+            list.innerHTML = '';
+            suggestions.forEach(function (suggestion, i) {
+                const item = document.createElement('li');
+                item.setAttribute('role', 'option');
+                item.className = i === active ? 'active' : '';
+                const label = document.createElement('span');
+                label.textContent = suggestion.label;
+                const kind = document.createElement('small');
+                kind.textContent = KIND_LABELS[suggestion.kind] + (suggestion.count ? ' · ' + suggestion.count : '');
+                item.append(label, kind);
+                item.addEventListener('mousedown', function (event) {
+                    event.preventDefault();  // keep focus so blur does not hide the list first
+                    window.location = target(suggestion);
+                });
+                list.appendChild(item);
+            });
+            list.hidden = suggestions.length === 0;
+        }
+
+        function show(results) {
+            suggestions = results;
+            active = -1;
+            render();
+        }
+
+        function lookup() {
+            const q = input.value.trim().toLowerCase();
+            if (!q) return show([]);
+            if (cache.has(q)) return show(cache.get(q));
+            fetch(input.dataset.autocomplete + '?' + new URLSearchParams({q: q}))
+                .then(response => response.ok ? response.json() : [])
+                .then(function (results) {
+                    cache.set(q, results);
+                    if (input.value.trim().toLowerCase() === q) show(results);
+                })
+                .catch(() => show([]));
+        }
+
+        input.addEventListener('input', function () {
+            clearTimeout(timer);
+            timer = setTimeout(lookup, 120);
+        });
+        input.addEventListener('keydown', function (event) {
+            if (list.hidden) return;
+            if (event.key === 'ArrowDown' || event.key === 'ArrowUp') {
+                event.preventDefault();
+                const step = event.key === 'ArrowDown' ? 1 : -1;
+                active = (active + step + suggestions.length + 1) % (suggestions.length + 1) - 1;
+                render();
+            } else if (event.key === 'Enter' && active >= 0) {
+                event.preventDefault();
+                window.location = target(suggestions[active]);
+            } else if (event.key === 'Escape') {
+                show([]);
+            }
+        });
+        input.addEventListener('blur', () => { list.hidden = true; });
+        input.addEventListener('focus', () => { list.hidden = suggestions.length === 0; });
+    });
+});
@@ -0,0 +1,197 @@
+"""Durable background task queue stored in the application database.
+
+Route handlers call ``enqueue`` inside their own transaction, so a task is
+only visible once the request's writes commit. Workers (threads inside the
+app, or ``flask task-worker`` processes) claim due tasks in batches with a
+conditional UPDATE, run them, and reschedule failures with exponential
+backoff until ``max_attempts`` is reached. Workers also delete tasks that
+finished more than ``TASK_RETENTION_DAYS`` ago; failed ones are kept.
+"""
+import importlib
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from itertools import groupby
+
+from models import db, Task
+
+HANDLERS = {}
+
+# Modules whose @task handlers are imported by the first worker poll, not at app startup
+HANDLER_MODULES = ['notifications']
+
+# Tasks left 'running' longer than this belong to a dead worker and are re-claimed
+LEASE_SECONDS = 300
+MAX_BACKOFF_SECONDS = 3600
+# How often each worker purges finished tasks, and how many rows one DELETE removes
+PURGE_INTERVAL = 3600
+PURGE_BATCH = 1000
+
+
+def _worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def task(name, batch=False):
+    """Register a task handler.
+
+    Plain handlers receive one payload dict. ``batch=True`` handlers receive
+    a list of payloads for every claimed task with that name, so they can
+    share a query or an SMTP connection.
+    """
+    def decorator(f):
+        HANDLERS[name] = (f, batch)
+        return f
+    return decorator
+
+
+def enqueue(name, payload=None, delay=0, max_attempts=5):
+    """Add a task to the current session; it runs after the caller commits"""
+    job = Task(
+        name=name,
+        payload=json.dumps(payload or {}),
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+        max_attempts=max_attempts
+    )
+    db.session.add(job)
+    return job
+
+
+def _claim(worker_id, batch_size):
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=LEASE_SECONDS)
+    due = db.or_(
+        db.and_(Task.status == 'pending', Task.run_at <= now),
+        db.and_(Task.status == 'running', Task.locked_at < stale)
+    )
+    ids = [row.id for row in db.session.query(Task.id).filter(due).order_by(Task.run_at).limit(batch_size)]
+    if not ids:
+        db.session.rollback()
+        return []
+
+    # Only rows still due are taken, so concurrent workers never claim the same task
+    db.session.execute(Task.__table__.update().where(Task.id.in_(ids), due).values(
+        status='running', locked_at=now, locked_by=worker_id, attempts=Task.attempts + 1
+    ))
+    db.session.commit()
+    return Task.query.filter(Task.id.in_(ids), Task.locked_by == worker_id,
+                             Task.status == 'running', Task.locked_at == now).order_by(Task.name, Task.id).all()
+
+
+def _finish(jobs, error=None):
+    now = datetime.utcnow()
+    for job in jobs:
+        job.locked_at = None
+        job.locked_by = None
+        if error is None:
+            job.status = 'done'
+            job.finished_at = now
+            job.last_error = None
+        elif job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = now
+            job.last_error = error
+        else:
+            job.status = 'pending'
+            job.last_error = error
+            job.run_at = now + timedelta(seconds=min(2 ** job.attempts * 5, MAX_BACKOFF_SECONDS))
+    db.session.commit()
+
+
+def run_pending(worker_id=None, batch_size=20):
+    """Claim and run one batch of due tasks; returns how many were processed"""
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+    worker_id = worker_id or _worker_id()
+    jobs = _claim(worker_id, batch_size)
+
+    for name, group in groupby(jobs, key=lambda job: job.name):
+        group = list(group)
+        handler = HANDLERS.get(name)
+        if handler is None:
+            _finish(group, error=f'No handler registered for task {name!r}')
+            continue
+
+        f, batch = handler
+        units = [group] if batch else [[job] for job in group]
+        for unit in units:
+            payloads = [json.loads(job.payload or '{}') for job in unit]
+            try:
+                if batch:
+                    f(payloads)
+                else:
+                    f(payloads[0])
+            except Exception:
+                db.session.rollback()
+                _finish(unit, error=traceback.format_exc(limit=5))
+            else:
+                _finish(unit)
+    return len(jobs)
+
+
+def purge_finished(retention_days):
+    """Delete 'done' tasks that finished more than ``retention_days`` ago; returns how many"""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    deleted = 0
+    while True:
+        # In batches, so a large backlog does not hold the write lock for long
+        ids = db.session.query(Task.id).filter(Task.status == 'done', Task.finished_at < cutoff).limit(PURGE_BATCH)
+        count = db.session.execute(Task.__table__.delete().where(Task.id.in_(ids.scalar_subquery()))).rowcount
+        db.session.commit()
+        deleted += count
+        if count < PURGE_BATCH:
+            return deleted
+
+
+class TaskWorker:
+    """Daemon thread that polls the queue"""
+
+    def __init__(self, app, poll_interval=2.0, batch_size=20):
+        self.app = app
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.worker_id = _worker_id()
+        self.retention_days = app.config.get('TASK_RETENTION_DAYS', 7)
+        self._purged_at = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'task-worker-{self.worker_id}', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def run_forever(self):
+        """Poll in the calling thread (used by `flask task-worker`)"""
+        self._run()
+
+    def _run(self):
+        while not self._stop.is_set():
+            processed = 0
+            with self.app.app_context():
+                try:
+                    processed = run_pending(self.worker_id, self.batch_size)
+                    if self._purged_at is None or time.monotonic() - self._purged_at >= PURGE_INTERVAL:
+                        self._purged_at = time.monotonic()
+                        purge_finished(self.retention_days)
+                except Exception:
+                    self.app.logger.exception('Task worker poll failed')
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+            # Keep draining while there is work; otherwise wait for the next poll
+            if not processed:
+                self._stop.wait(self.poll_interval)
+
+
+def start_workers(app):
+    """Start TASK_WORKER_THREADS in-process worker threads (0 = run `flask task-worker` instead)"""
+    count = app.config.get('TASK_WORKER_THREADS', 0)
+    return [TaskWorker(app).start() for _ in range(count)]
@@ -0,0 +1,59 @@
+"""Shared fixtures: an app on a throwaway SQLite file with background work switched off"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for name in ('START_BACKGROUND_THREADS', 'ASSETS_BUILD_ON_STARTUP', 'METRICS_ENABLED', 'SLOW_QUERY_ENABLED',
+             'RATE_LIMIT_ENABLED'):
+    os.environ[name] = 'false'
+
+from app import create_app  # noqa: E402
+from models import db  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}',
+        'RATE_LIMIT_STORAGE': 'memory',
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def volunteer(app):
+    from models import User
+    user = User(email='volunteer@example.org', username='volunteer', password_hash='x', role='volunteer')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def opportunity(app):
+    """An active opportunity a week out, with one 9-10 AM slot of 5 spots"""
+    from datetime import date, timedelta
+    from models import Opportunity, Organization, TimeSlot
+    organization = Organization(name='Food Bank')
+    db.session.add(organization)
+    db.session.flush()
+    opp = Opportunity(title='Sort donations', description='Sorting', organization_id=organization.id,
+                      category='Food Security', date=date.today() + timedelta(days=7), hours=2,
+                      spots_available=10, is_active=True)
+    db.session.add(opp)
+    db.session.flush()
+    db.session.add(TimeSlot(opportunity_id=opp.id, start_time='9:00 AM', end_time='10:00 AM', spots_available=5))
+    db.session.commit()
+    return opp
@@ -0,0 +1,68 @@
+from datetime import date, datetime, timedelta
+
+import analytics
+from models import db, Booking, DailyActivity, DailyActivityVolunteer
+
+
+def _rows():
+    return {(row.day, row.category): (row.bookings, row.completions, row.hours, row.volunteers)
+            for row in DailyActivity.query}
+
+
+def _book(volunteer, opportunity, **values):
+    booking = Booking(user_id=volunteer.id, opportunity_id=opportunity.id, hours=2,
+                      booking_time=datetime.combine(opportunity.date, datetime.min.time()), **values)
+    db.session.add(booking)
+    db.session.commit()
+    return booking
+
+
+def test_bookings_and_completions_roll_up_with_unique_volunteers(volunteer, opportunity):
+    today = datetime.utcnow().date()
+    first = _book(volunteer, opportunity)
+    _book(volunteer, opportunity)
+    assert _rows() == {(today, 'Food Security'): (2, 0, 0, 1)}
+
+    first.status = 'completed'
+    db.session.commit()
+    assert _rows() == {(today, 'Food Security'): (2, 1, 2, 1)}
+
+    first.status = 'confirmed'
+    db.session.commit()
+    assert _rows() == {(today, 'Food Security'): (2, 0, 0, 1)}
+
+
+def test_compaction_corrects_drift_and_prunes_membership(volunteer, opportunity):
+    today = datetime.utcnow().date()
+    _book(volunteer, opportunity, status='completed')
+    expected = _rows()
+    # A set-based write that skipped the listener, and membership rows too old to need
+    DailyActivity.query.update({'hours': 99})
+    db.session.add(DailyActivityVolunteer(day=today - timedelta(days=10), organization_id=opportunity.organization_id,
+                                          category='Food Security', user_id=volunteer.id))
+    db.session.commit()
+
+    buckets, pruned = analytics.compact()
+
+    assert (buckets, pruned) == (1, 1)
+    assert _rows() == expected == {(today, 'Food Security'): (1, 1, 2, 1)}
+    assert [row.day for row in DailyActivityVolunteer.query] == [today]
+
+
+def test_series_is_zero_filled_and_bucketed(app):
+    monday = date(2026, 3, 2)
+    db.session.add_all([
+        DailyActivity(day=monday, organization_id=1, category='Animals', bookings=1, hours=3),
+        DailyActivity(day=monday + timedelta(days=2), organization_id=1, category='Food Security', bookings=2, hours=1),
+        DailyActivity(day=monday + timedelta(days=8), organization_id=2, category='Animals', bookings=4, hours=5),
+    ])
+    db.session.commit()
+
+    daily = analytics.series(monday, monday + timedelta(days=3))
+    assert daily['labels'] == ['2026-03-02', '2026-03-03', '2026-03-04', '2026-03-05']
+    assert daily['series']['hours'] == [3, 0, 1, 0]
+
+    weekly = analytics.series(monday, monday + timedelta(days=13), interval='week', group_by='category')
+    assert weekly['labels'] == ['2026-03-02', '2026-03-09']
+    assert {group['key']: group['series']['bookings'] for group in weekly['groups']} == {
+        'Animals': [1, 4], 'Food Security': [2, 0]}
@@ -0,0 +1,79 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from archive import archive_past
+from models import (db, ArchivedBooking, ArchivedOpportunity, ArchivedOpportunityInterest, ArchivedTimeSlot,
+                    Booking, Interest, Opportunity, OpportunityInterest, TimeSlot)
+from schema import missing_autoincrement, upgrade_foreign_keys
+
+LIVE_TABLES = (Opportunity, TimeSlot, Booking)
+
+
+def _past_opportunity(volunteer, organization_id, days_ago=200):
+    opp = Opportunity(title='Old drive', description='Past', organization_id=organization_id, category='Animals',
+                      date=date.today() - timedelta(days=days_ago), hours=2, spots_available=3, is_active=True)
+    db.session.add(opp)
+    db.session.flush()
+    slot = TimeSlot(opportunity_id=opp.id, start_time='9:00 AM', end_time='10:00 AM', spots_available=3)
+    db.session.add(slot)
+    db.session.flush()
+    interest = Interest.query.filter_by(kind='interest', name='animals').first()
+    if interest is None:
+        interest = Interest(kind='interest', name='animals', label='Animals')
+        db.session.add(interest)
+        db.session.flush()
+    db.session.add_all([
+        OpportunityInterest(opportunity_id=opp.id, interest_id=interest.id),
+        Booking(user_id=volunteer.id, opportunity_id=opp.id, time_slot_id=slot.id, status='completed', hours=2,
+                booking_time=datetime.combine(opp.date, datetime.min.time())),
+    ])
+    db.session.commit()
+    return opp.id, slot.id
+
+
+def _ids():
+    return [db.session.query(db.func.max(model.id)).scalar() for model in LIVE_TABLES]
+
+
+def test_archive_moves_the_newest_rows_with_tags_and_never_reuses_their_ids(volunteer, opportunity):
+    opp_id, slot_id = _past_opportunity(volunteer, opportunity.organization_id)
+    highest = _ids()
+    # The newest opportunity, slot and booking are all archived
+    assert highest[:2] == [opp_id, slot_id]
+
+    assert archive_past() == 1
+
+    assert db.session.get(ArchivedOpportunity, opp_id) and db.session.get(ArchivedTimeSlot, slot_id)
+    assert ArchivedBooking.query.filter_by(opportunity_id=opp_id).count() == 1
+    assert ArchivedOpportunityInterest.query.filter_by(opportunity_id=opp_id).count() == 1
+    assert OpportunityInterest.query.filter_by(opportunity_id=opp_id).count() == 0
+    assert db.session.get(Opportunity, opp_id) is None
+
+    _past_opportunity(volunteer, opportunity.organization_id, days_ago=1)
+    assert all(new > old for new, old in zip(_ids(), highest))
+
+
+def test_legacy_sqlite_tables_are_upgraded_before_archiving(app, monkeypatch, volunteer, opportunity):
+    # Recreate the live tables as a database from before AUTOINCREMENT was declared
+    organization_id = opportunity.organization_id
+    tables = [model.__table__ for model in LIVE_TABLES]
+    db.session.remove()
+    db.metadata.drop_all(db.engine, tables=list(reversed(tables)))
+    for table in tables:
+        monkeypatch.setitem(table.dialect_options['sqlite'], 'autoincrement', False)
+    db.metadata.create_all(db.engine, tables=tables)
+    monkeypatch.undo()
+    volunteer = db.session.merge(volunteer)
+    assert sorted(missing_autoincrement()) == ['bookings', 'opportunities', 'time_slots']
+
+    _past_opportunity(volunteer, organization_id)
+    with pytest.raises(RuntimeError, match='upgrade-foreign-keys'):
+        archive_past()
+
+    assert set(upgrade_foreign_keys()) >= {'bookings', 'opportunities', 'time_slots'}
+    assert missing_autoincrement() == []
+    highest = _ids()
+    assert archive_past() == 1
+    _past_opportunity(volunteer, organization_id, days_ago=1)
+    assert all(new > old for new, old in zip(_ids(), highest))
@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('greenlet')
+pytest.importorskip('aiosqlite')
+
+from async_api import AsyncAPI  # noqa: E402
+from models import db  # noqa: E402
+
+
+async def _get(api, path, query='', method='GET'):
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query.encode(),
+             'headers': [], 'client': ('127.0.0.1', 5000)}
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        sent.append(message)
+
+    await api(scope, receive, send)
+    headers = dict(sent[0]['headers'])
+    return sent[0]['status'], headers, sent[1]['body']
+
+
+def _api(app, **config):
+    return AsyncAPI({'SQLALCHEMY_DATABASE_URI': app.config['SQLALCHEMY_DATABASE_URI'], 'RATE_LIMIT_ENABLED': False,
+                     'RATE_LIMIT_STORAGE': 'memory', **config})
+
+
+def test_async_payloads_match_the_flask_views(app, client, opportunity):
+    opportunity.latitude, opportunity.longitude = 40.0, -75.0
+    db.session.commit()
+    day = opportunity.date.isoformat()
+    db.session.remove()
+    api = _api(app)
+
+    async def run():
+        try:
+            return [await _get(api, '/api/opportunities'),
+                    await _get(api, '/api/availability', f'from={day}&to={day}'),
+                    await _get(api, '/search', 'q=sort')]
+        finally:
+            await api.stop()
+
+    markers, columns, search = asyncio.run(run())
+
+    assert markers[0] == columns[0] == search[0] == 200
+    assert json.loads(markers[2])[0]['title'] == 'Sort donations'
+    assert markers[2] == client.get('/api/opportunities').data
+    assert columns[2] == client.get(f'/api/availability?from={day}&to={day}').data
+    assert json.loads(search[2]) == client.get('/search?q=sort', headers={'X-Requested-With': 'XMLHttpRequest'}).get_json()
+
+
+def test_async_errors_and_load_shedding(app):
+    api = _api(app, ASYNC_API_MAX_CONCURRENCY=1, ASYNC_API_MAX_WAITING=0)
+
+    async def run():
+        try:
+            results = [await _get(api, '/nope'), await _get(api, '/api/opportunities', method='POST'),
+                       await _get(api, '/api/availability', 'ids=1,x')]
+            # The single slot is taken and nobody may wait for it
+            await api._slots.acquire()
+            results.append(await _get(api, '/api/opportunities'))
+            return results
+        finally:
+            await api.stop()
+
+    missing, not_allowed, bad_request, busy = asyncio.run(run())
+
+    assert [missing[0], not_allowed[0], bad_request[0], busy[0]] == [404, 405, 400, 503]
+    assert not_allowed[1][b'allow'] == b'GET, HEAD'
+    assert busy[1][b'retry-after'] == b'1'
@@ -0,0 +1,58 @@
+from datetime import date, datetime, timedelta
+
+from autocomplete import autocomplete_index, mark_changed
+from models import db, Booking, Opportunity, Organization
+
+
+def _state():
+    groups = {key: (group['label'], set(group['members']), group['bookings'])
+              for key, group in autocomplete_index._groups.items()}
+    return list(autocomplete_index._terms), groups
+
+
+def _labels(query):
+    return [suggestion['label'] for suggestion in autocomplete_index.suggest(query)]
+
+
+def test_incremental_refresh_matches_a_full_rebuild(volunteer, opportunity):
+    autocomplete_index.invalidate()
+    assert _labels('sort') == ['Sort donations']
+
+    shelter = Organization(name='Animal Shelter')
+    db.session.add(shelter)
+    db.session.flush()
+    db.session.add(Opportunity(title='Walk dogs', description='Walks', organization_id=shelter.id,
+                               category='Animals', city='Springfield', date=date.today() + timedelta(days=3),
+                               hours=1, spots_available=4, is_active=True))
+    opportunity.organization.name = 'Harvest Pantry'
+    db.session.commit()
+    assert _labels('harvest') == ['Harvest Pantry']
+    assert _labels('food bank') == []
+    assert _labels('dogs') == ['Walk dogs']
+
+    # A set-based write that bypasses the ORM, reported through mark_changed
+    db.session.execute(Opportunity.__table__.update().where(Opportunity.id == opportunity.id).values(
+        title='Pack donations'))
+    db.session.add(Booking(user_id=volunteer.id, opportunity_id=opportunity.id, status='confirmed',
+                           booking_time=datetime.combine(opportunity.date, datetime.min.time())))
+    mark_changed(db.session, [opportunity.id])
+    db.session.commit()
+    assert _labels('pack') == ['Pack donations']
+    assert _labels('sort') == []
+
+    incremental = _state()
+    autocomplete_index.invalidate()
+    autocomplete_index.suggest('pack')
+    assert _state() == incremental
+
+
+def test_rolled_back_changes_are_not_applied(opportunity):
+    autocomplete_index.invalidate()
+    autocomplete_index.suggest('sort')
+
+    opportunity.title = 'Never saved'
+    db.session.flush()
+    db.session.rollback()
+
+    assert not autocomplete_index._dirty
+    assert _labels('sort') == ['Sort donations']
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+from availability import availability
+from models import db, Booking, Opportunity, TimeSlot, User
+
+
+def _book(user, opportunity, slot=None, status='confirmed'):
+    db.session.add(Booking(user_id=user.id, opportunity_id=opportunity.id, time_slot_id=slot.id if slot else None,
+                           status=status, booking_time=datetime.combine(opportunity.date, datetime.min.time())))
+
+
+def _setup(volunteer, opportunity):
+    """Slots with mixed bookings, a slot-less opportunity and an untouched one"""
+    other = User(email='other@example.org', username='other', password_hash='x', role='volunteer')
+    db.session.add(other)
+    first = opportunity.time_slots[0]
+    second = TimeSlot(opportunity_id=opportunity.id, start_time='11:00 AM', end_time='12:00 PM', spots_available=2)
+    open_ended = Opportunity(title='Stock shelves', description='Stocking', organization_id=opportunity.organization_id,
+                             category='Food Security', date=opportunity.date + timedelta(days=1), hours=1,
+                             spots_available=3, is_active=True)
+    untouched = Opportunity(title='Greet guests', description='Greeting', organization_id=opportunity.organization_id,
+                            date=opportunity.date + timedelta(days=30), spots_available=6, is_active=True)
+    db.session.add_all([second, open_ended, untouched])
+    db.session.flush()
+    _book(volunteer, opportunity, first)
+    _book(other, opportunity, first, status='cancelled')
+    _book(other, opportunity, second)
+    _book(volunteer, open_ended)
+    _book(other, open_ended, status='completed')
+    db.session.commit()
+    db.session.expire_all()
+    return [opportunity, open_ended, untouched]
+
+
+def test_availability_matches_spots_remaining(volunteer, opportunity):
+    opportunities = _setup(volunteer, opportunity)
+    result = availability(opportunities)
+
+    for opp in opportunities:
+        assert result.remaining(opp.id) == opp.spots_remaining
+        for slot in opp.time_slots:
+            assert result.slot_remaining(slot.id) == slot.spots_remaining
+    assert [result.remaining(opp.id) for opp in opportunities] == [4 + 1, 3 - 1, 6]
+
+
+def test_availability_api_returns_columns_for_a_date_range(client, volunteer, opportunity):
+    opportunities = _setup(volunteer, opportunity)
+    start = opportunity.date.isoformat()
+    end = (opportunity.date + timedelta(days=1)).isoformat()
+
+    columns = client.get(f'/api/availability?from={start}&to={end}').get_json()
+
+    slots = [slot.id for slot in opportunity.time_slots]
+    assert columns == {'opportunity_ids': [opportunity.id, opportunity.id, opportunities[1].id],
+                       'slot_ids': sorted(slots) + [None], 'remaining': [4, 1, 2]}
+    assert client.get('/api/availability?ids=1,x').status_code == 400
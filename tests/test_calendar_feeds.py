@@ -0,0 +1,66 @@
+from datetime import date, datetime, timedelta
+
+from calendar_feeds import organization_rows, volunteer_rows
+from models import db, Booking, Opportunity, Organization, TimeSlot, User
+
+SLOT_TIMES = [('10:00 AM', '11:00 AM'), ('1:00 PM', '2:00 PM'), ('9:00 AM', '10:00 AM'), ('11:00 AM', '12:00 PM')]
+
+
+def _day_of_slots():
+    day = date.today() + timedelta(days=3)
+    volunteer = User(email='v@example.org', username='volunteer', password_hash='x')
+    organization = Organization(name='Food Bank')
+    db.session.add_all([volunteer, organization])
+    db.session.flush()
+    opportunity = Opportunity(title='Sort donations', description='Sorting', organization_id=organization.id,
+                              date=day, hours=1, spots_available=10, is_active=True)
+    db.session.add(opportunity)
+    db.session.flush()
+    for start, end in SLOT_TIMES:
+        slot = TimeSlot(opportunity_id=opportunity.id, start_time=start, end_time=end, spots_available=5)
+        db.session.add(slot)
+        db.session.flush()
+        db.session.add(Booking(user_id=volunteer.id, opportunity_id=opportunity.id, time_slot_id=slot.id,
+                               status='confirmed', hours=1,
+                               booking_time=datetime.combine(day, datetime.strptime(start, '%I:%M %p').time())))
+    db.session.commit()
+    return volunteer, organization, day
+
+
+def test_events_are_in_time_order(app):
+    volunteer, organization, day = _day_of_slots()
+    expected = sorted(datetime.combine(day, datetime.strptime(start, '%I:%M %p').time()) for start, _ in SLOT_TIMES)
+
+    volunteer_starts = [event['start'] for event in volunteer_rows(volunteer.id, day, day)]
+    organization_starts = [event['start'] for event in organization_rows(organization.id, day, day)]
+
+    assert volunteer_starts == expected
+    assert organization_starts == expected
+
+
+def test_resetting_the_link_revokes_earlier_feed_tokens(app, client):
+    from calendar_feeds import _serializer, feed_token, reset_feed_token
+    volunteer, organization, _ = _day_of_slots()
+    volunteer_id, organization_id = volunteer.id, organization.id
+    legacy = _serializer().dumps(['user', volunteer_id])  # issued before tokens carried a version
+    token = feed_token('user', volunteer_id)
+    assert client.get(f'/calendar/{legacy}.ics').status_code == 200
+    assert client.get(f'/calendar/{token}.ics').status_code == 200
+
+    with client.session_transaction() as session:
+        session['_user_id'] = str(volunteer_id)
+    assert b'Reset link' in client.get('/dashboard').data
+    assert client.post('/calendar/reset').headers['Location'].endswith('/dashboard')
+
+    new_token = feed_token('user', volunteer_id)
+    assert new_token != token
+    assert client.get(f'/calendar/{token}.ics').status_code == 404
+    assert client.get(f'/calendar/{legacy}.ics').status_code == 404
+    response = client.get(f'/calendar/{new_token}.ics')
+    assert response.status_code == 200 and b'Sort donations' in response.data
+
+    # Another owner's links are untouched
+    other = reset_feed_token('organization', organization_id)
+    db.session.commit()
+    assert client.get(f'/calendar/{other}.ics').status_code == 200
+    assert client.get(f'/calendar/{new_token}.ics').status_code == 200
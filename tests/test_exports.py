@@ -0,0 +1,28 @@
+import csv
+import io
+from datetime import datetime
+
+from models import db, Booking, User
+
+
+def test_formula_cells_are_escaped(client, volunteer, opportunity):
+    admin = User(email='admin@example.org', username='admin', password_hash='x', role='admin')
+    volunteer.full_name = '=HYPERLINK("http://evil.example","click")'
+    opportunity.title = '@SUM(A1:A9)'
+    opportunity.category = '+cmd'
+    db.session.add_all([admin, Booking(user_id=volunteer.id, opportunity_id=opportunity.id, status='confirmed',
+                                       hours=-2, booking_time=datetime(2026, 1, 5, 9))])
+    db.session.commit()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin.id)
+
+    response = client.get('/admin/bookings/export.csv')
+
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True).lstrip('﻿'))))
+    row = dict(zip(rows[0], rows[1]))
+    assert row['Volunteer'] == '\'=HYPERLINK("http://evil.example","click")'
+    assert row['Opportunity'] == "'@SUM(A1:A9)"
+    assert row['Category'] == "'+cmd"
+    assert row['Hours'] == '-2'  # numbers are left alone
+    assert row['Email'] == 'volunteer@example.org'
@@ -0,0 +1,17 @@
+from fragment_cache import fragment_cache
+from models import db
+
+
+def test_renaming_an_organization_refreshes_its_cached_cards(client, opportunity):
+    fragment_cache.clear()
+    pages = ('/', f'/opportunity/{opportunity.id}', '/search?q=sort')
+    for page in pages:
+        assert 'Food Bank' in client.get(page).get_data(as_text=True)
+
+    opportunity.organization.name = 'Harvest Pantry'
+    db.session.commit()
+    db.session.remove()
+
+    for page in pages:
+        html = client.get(page).get_data(as_text=True)
+        assert 'Harvest Pantry' in html and 'Food Bank' not in html
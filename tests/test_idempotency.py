@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import jsonify, request
+
+import idempotency
+from idempotency import idempotent
+from models import db, IdempotencyKey
+
+calls = []
+
+
+@pytest.fixture
+def signed_in(app, client, volunteer):
+    @app.post('/_test/idempotent')
+    @idempotent
+    def counted():
+        calls.append(request.get_json())
+        return jsonify({'success': True, 'call': len(calls)}), 201
+
+    calls.clear()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(volunteer.id)
+    return client
+
+
+def _post(client, body, key='key-1'):
+    return client.post('/_test/idempotent', json=body, headers={'Idempotency-Key': key})
+
+
+def test_retry_replays_the_stored_response(signed_in):
+    first = _post(signed_in, {'slot': 1})
+    retry = _post(signed_in, {'slot': 1})
+
+    assert (first.status_code, retry.status_code) == (201, 201)
+    assert retry.get_json() == first.get_json() == {'success': True, 'call': 1}
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert len(calls) == 1
+
+
+def test_same_key_for_a_different_body_is_rejected(signed_in):
+    _post(signed_in, {'slot': 1})
+    assert _post(signed_in, {'slot': 2}).status_code == 422
+    assert len(calls) == 1
+
+
+def _pending_claim(app, volunteer, body, age):
+    # What a request that committed its claim and then died leaves behind
+    with app.test_request_context('/_test/idempotent', method='POST', json=body):
+        fingerprint = idempotency._fingerprint()
+    db.session.add(IdempotencyKey(user_id=volunteer.id, key='key-1', fingerprint=fingerprint,
+                                  created_at=datetime.utcnow() - age,
+                                  expires_at=datetime.utcnow() + timedelta(days=1)))
+    db.session.commit()
+    db.session.remove()
+
+
+def test_retry_during_the_first_attempt_gets_a_409(app, signed_in, volunteer):
+    _pending_claim(app, volunteer, {'slot': 1}, timedelta(seconds=1))
+
+    response = _post(signed_in, {'slot': 1})
+
+    assert response.status_code == 409
+    assert response.headers['Retry-After'] == '1'
+    assert calls == []
+
+
+def test_abandoned_claim_is_taken_over_after_the_lease(app, signed_in, volunteer):
+    _pending_claim(app, volunteer, {'slot': 1}, timedelta(seconds=idempotency.LEASE_SECONDS + 1))
+
+    response = _post(signed_in, {'slot': 1})
+
+    assert response.status_code == 201
+    assert calls == [{'slot': 1}]
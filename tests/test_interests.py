@@ -0,0 +1,40 @@
+from interests import _tag_map, set_user_interests, volunteers_matching
+from models import db, Interest, User
+
+
+def test_signup_tags_interests(client):
+    response = client.post('/signup', data={
+        'email': 'new@example.org', 'username': 'newcomer', 'password': 'secret', 'full_name': 'New Comer',
+        'interests': ['Food Security', 'Education'], 'skills': ['Teaching'],
+    })
+
+    assert response.status_code == 302
+    user = User.query.filter_by(username='newcomer').one()
+    assert sorted((tag.kind, tag.label) for tag in user.interest_tags) == [
+        ('interest', 'Education'), ('interest', 'Food Security'), ('skill', 'Teaching'),
+    ]
+    assert user.interests == 'Food Security, Education'
+    assert volunteers_matching(['food security']).all() == [user]
+
+
+def test_interest_and_skill_with_the_same_name_are_separate_tags(app):
+    interest = _tag_map(['Teaching'])['teaching']
+    skill = _tag_map(['Teaching'], kind='skill')['teaching']
+    db.session.commit()
+
+    assert interest.id != skill.id
+    assert (interest.kind, skill.kind) == ('interest', 'skill')
+    assert Interest.query.count() == 2
+
+
+def test_match_all_does_not_count_a_skill_as_a_missing_interest(app):
+    both = User(email='both@example.org', username='both', password_hash='x', role='volunteer')
+    cook = User(email='cook@example.org', username='cook', password_hash='x', role='volunteer')
+    db.session.add_all([both, cook])
+    set_user_interests(both, ['Teaching'])
+    set_user_interests(both, ['Teaching'], kind='skill')
+    set_user_interests(cook, ['Teaching', 'Cooking'])
+    db.session.commit()
+
+    assert volunteers_matching(['teaching', 'cooking'], match='all').all() == [cook]
+    assert set(volunteers_matching(['teaching']).all()) == {both, cook}
@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta
+
+from jobs import complete_past_bookings
+from ledger import month_key
+from models import db, Booking, DailyActivity, VolunteerHours
+
+
+def test_completion_stamps_and_buckets_use_utc(volunteer, opportunity):
+    slot = opportunity.time_slots[0]
+    booking = Booking(user_id=volunteer.id, opportunity_id=opportunity.id, time_slot_id=slot.id,
+                      status='confirmed', hours=2,
+                      booking_time=datetime.combine(opportunity.date, datetime.strptime('9:00 AM', '%I:%M %p').time()))
+    db.session.add(booking)
+    db.session.commit()
+
+    # A host clock far ahead of UTC: local time decides the slot has ended, UTC stamps the completion
+    local_now = datetime.combine(opportunity.date, datetime.min.time()) + timedelta(days=40)
+    assert complete_past_bookings(now=local_now) == 1
+
+    db.session.expire_all()
+    booking = db.session.get(Booking, booking.id)
+    assert booking.status == 'completed'
+    assert abs(booking.completed_at - datetime.utcnow()) < timedelta(minutes=1)
+    assert VolunteerHours.query.filter_by(user_id=volunteer.id).one().month == month_key(datetime.utcnow())
+    assert DailyActivity.query.filter(DailyActivity.completions > 0).one().day == datetime.utcnow().date()
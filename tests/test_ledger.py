@@ -0,0 +1,69 @@
+from datetime import datetime
+
+from ledger import apply_deltas, hours_by_category, month_key, rebuild_ledger, total_hours
+from models import db, Booking, VolunteerHours, VolunteerHoursTotal
+
+
+def _book(volunteer, opportunity, status='confirmed', hours=2):
+    booking = Booking(user_id=volunteer.id, opportunity_id=opportunity.id, status=status, hours=hours,
+                      booking_time=datetime.combine(opportunity.date, datetime.min.time()))
+    db.session.add(booking)
+    db.session.commit()
+    return booking
+
+
+def _totals(user_id):
+    total = db.session.get(VolunteerHoursTotal, user_id)
+    return (total.hours, total.bookings) if total else (0, 0)
+
+
+def test_ledger_follows_completion_edits_and_reverts(volunteer, opportunity):
+    booking = _book(volunteer, opportunity)
+    assert _totals(volunteer.id) == (0, 0)
+
+    booking.status = 'completed'
+    db.session.commit()
+    assert _totals(volunteer.id) == (2, 1)
+    assert hours_by_category(volunteer.id) == [('Food Security', 2)]
+
+    booking.hours = 3
+    db.session.commit()
+    assert _totals(volunteer.id) == (3, 1)
+
+    booking.status = 'cancelled'
+    db.session.commit()
+    assert _totals(volunteer.id) == (0, 0)
+    assert hours_by_category(volunteer.id) == []
+
+
+def test_deleting_a_completed_booking_subtracts_it(volunteer, opportunity):
+    _book(volunteer, opportunity, status='completed', hours=4)
+    booking = _book(volunteer, opportunity, status='completed', hours=1)
+    assert total_hours(volunteer.id) == 5
+
+    db.session.delete(booking)
+    db.session.commit()
+    assert _totals(volunteer.id) == (4, 1)
+
+
+def test_apply_deltas_upserts_month_and_total_rows(volunteer):
+    month = month_key(datetime.utcnow())
+    apply_deltas(db.session.connection(), {(volunteer.id, month, 'Food Security'): (2, 1)})
+    apply_deltas(db.session.connection(), {(volunteer.id, month, 'Food Security'): (3, 1),
+                                           (volunteer.id, month, 'Animals'): (1, 1)})
+    db.session.commit()
+
+    rows = {row.category: (row.hours, row.bookings) for row in VolunteerHours.query.filter_by(user_id=volunteer.id)}
+    assert rows == {'Food Security': (5, 2), 'Animals': (1, 1)}
+    assert _totals(volunteer.id) == (6, 3)
+
+
+def test_rebuild_matches_the_incremental_ledger(volunteer, opportunity):
+    _book(volunteer, opportunity, status='completed', hours=2)
+    _book(volunteer, opportunity, status='completed', hours=5)
+    _book(volunteer, opportunity, status='cancelled', hours=9)
+    incremental = sorted((r.user_id, r.month, r.category, r.hours, r.bookings) for r in VolunteerHours.query)
+
+    rebuild_ledger()
+    assert sorted((r.user_id, r.month, r.category, r.hours, r.bookings) for r in VolunteerHours.query) == incremental
+    assert _totals(volunteer.id) == (7, 2)
@@ -0,0 +1,69 @@
+import json
+import os
+import subprocess
+import sys
+
+from app import create_app
+from metrics import Metrics, metrics as app_metrics
+
+
+def _store(tmp_path):
+    store = Metrics()
+    store.directory = str(tmp_path)
+    return store
+
+
+def _exited_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_histograms_are_exposed_cumulatively(tmp_path):
+    store = _store(tmp_path)
+    for seconds in (0.003, 0.02, 0.02, 7.0):
+        store.observe('http_request_duration_seconds', seconds, endpoint='public.index', method='GET')
+
+    lines = store.exposition().splitlines()
+    prefix = 'volunteerhub_http_request_duration_seconds'
+    assert f'{prefix}_bucket{{endpoint="public.index",method="GET",le="0.005"}} 1' in lines
+    assert f'{prefix}_bucket{{endpoint="public.index",method="GET",le="0.025"}} 3' in lines
+    assert f'{prefix}_bucket{{endpoint="public.index",method="GET",le="5.0"}} 3' in lines
+    assert f'{prefix}_bucket{{endpoint="public.index",method="GET",le="+Inf"}} 4' in lines
+    assert f'{prefix}_count{{endpoint="public.index",method="GET"}} 4' in lines
+
+
+def test_scrapes_sum_workers_and_keep_counters_of_exited_ones(tmp_path):
+    store = _store(tmp_path)
+    store.inc('bookings_total', 2, result='confirmed')
+    store.set('http_requests_in_flight', 1)
+    exited = {'values': [['bookings_total', [['result', 'confirmed']], 3],
+                         ['http_requests_in_flight', [], 5]], 'histograms': []}
+    (tmp_path / f'{_exited_pid()}.json').write_text(json.dumps(exited))
+
+    for _ in range(2):  # the second scrape reads the exited worker from the archive
+        values, _ = store.collect_all()
+        assert values[('bookings_total', (('result', 'confirmed'),))] == 5
+        assert values[('http_requests_in_flight', ())] == 1
+    assert {path.name for path in tmp_path.glob('*.json')} == {'archived.json', f'{os.getpid()}.json'}
+
+
+def test_metrics_endpoint_counts_requests_and_checks_the_token(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}',
+        'RATE_LIMIT_STORAGE': 'memory',
+        'METRICS_ENABLED': True,
+        'METRICS_DIR': str(tmp_path / 'metrics'),
+        'METRICS_TOKEN': 'secret',
+    })
+    try:
+        client = app.test_client()
+        client.get('/api/nope')
+        assert client.get('/metrics').status_code == 401
+
+        body = client.get('/metrics', headers={'Authorization': 'Bearer secret'}).get_data(as_text=True)
+        assert 'volunteerhub_http_requests_total{endpoint="unmatched",method="GET",status="404"} 1' in body
+        assert '# TYPE volunteerhub_http_request_duration_seconds histogram' in body
+    finally:
+        app_metrics.enabled = False
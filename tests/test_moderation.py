@@ -0,0 +1,44 @@
+from datetime import date, datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+import fragment_cache
+from models import db, Booking, Opportunity, Organization, User
+
+
+def _admin_and_bookings(count=2):
+    admin = User(email='admin@example.org', username='admin', password_hash=generate_password_hash('x'),
+                 role='admin')
+    volunteer = User(email='v@example.org', username='volunteer', password_hash=generate_password_hash('x'))
+    organization = Organization(name='Food Bank')
+    db.session.add_all([admin, volunteer, organization])
+    db.session.flush()
+    opportunity = Opportunity(title='Sort donations', description='Sorting', organization_id=organization.id,
+                              date=date.today() + timedelta(days=7), hours=2, spots_available=10, is_active=True)
+    db.session.add(opportunity)
+    db.session.flush()
+    bookings = [Booking(user_id=volunteer.id, opportunity_id=opportunity.id, booking_time=datetime.utcnow(),
+                        status='confirmed') for _ in range(count)]
+    db.session.add_all(bookings)
+    db.session.commit()
+    return admin, [booking.id for booking in bookings]
+
+
+def test_bulk_cancel_bookings(client):
+    admin, booking_ids = _admin_and_bookings()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin.id)
+
+    response = client.post('/admin/bookings', data={'action': 'cancel', 'ids': booking_ids})
+
+    assert response.status_code == 302
+    db.session.expire_all()
+    assert {db.session.get(Booking, booking_id).status for booking_id in booking_ids} == {'cancelled'}
+
+
+def test_mark_changed_with_kinds_for_new_opportunity(app):
+    fragment_cache.mark_changed(db.session, [1, 2], fragment_cache.VOLATILE_KINDS)
+    fragment_cache.mark_changed(db.session, [2], None)
+    fragment_cache.mark_changed(db.session, [2], fragment_cache.VOLATILE_KINDS)
+    changes = db.session.info.pop('fragment_cache_dirty')
+    assert changes == {1: set(fragment_cache.VOLATILE_KINDS), 2: None}
@@ -0,0 +1,57 @@
+import pytest
+
+from app import create_app
+from ratelimit import MemoryStore, SQLiteStore, parse_rule
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    return MemoryStore() if request.param == 'memory' else SQLiteStore(str(tmp_path / 'ratelimit.db'))
+
+
+def test_parse_rule():
+    assert parse_rule('10/minute') == (10, 10 / 60)
+    assert parse_rule('5 / Hours') == (5, 5 / 3600)
+    with pytest.raises(ValueError):
+        parse_rule('ten/minute')
+
+
+def test_bucket_allows_a_burst_then_refills_over_time(store):
+    capacity, rate = 3, 1.0  # 3 requests, one more per second
+    assert [store.hit('login:ip:1', capacity, rate, 100.0)[0] for _ in range(4)] == [True, True, True, False]
+
+    assert store.hit('login:ip:1', capacity, rate, 101.5)[0]
+    assert not store.hit('login:ip:1', capacity, rate, 101.5)[0]
+
+    # A long pause refills only up to capacity
+    assert [store.hit('login:ip:1', capacity, rate, 200.0)[0] for _ in range(4)] == [True, True, True, False]
+    # Other keys have their own buckets
+    assert store.hit('login:ip:2', capacity, rate, 200.0)[0]
+
+
+def test_pruning_drops_idle_buckets(store):
+    store.hit('search:ip:1', 1, 1.0, 100.0)
+    assert not store.hit('search:ip:1', 1, 1.0, 100.0)[0]
+    store.prune(before=150.0)
+    assert store.hit('search:ip:1', 1, 1.0, 100.0)[0]
+
+
+def test_login_over_the_limit_gets_a_429(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}',
+        'RATE_LIMIT_ENABLED': True,
+        'RATE_LIMIT_STORAGE': str(tmp_path / 'ratelimit.db'),
+        'RATE_LIMITS': {'login': '2/minute'},
+    })
+    client = app.test_client()
+    with app.app_context():
+        from models import db
+        db.create_all()
+
+    statuses = [client.post('/login', data={'email': f'user{n}@example.org', 'password': 'x'}).status_code
+                for n in range(3)]
+    assert 429 not in statuses[:2] and statuses[2] == 429
+    response = client.post('/login', data={'email': 'other@example.org', 'password': 'x'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
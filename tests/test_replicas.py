@@ -0,0 +1,115 @@
+import pytest
+from flask import request
+
+from app import create_app
+from models import db, Organization, ReplicationHeartbeat
+from replicas import replica_router, sync_sqlite_replica, use_primary
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "primary.db"}',
+        'SQLALCHEMY_BINDS': {'replica': f'sqlite:///{tmp_path / "replica.db"}'},
+        'RATE_LIMIT_STORAGE': 'memory',
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.add(Organization(name='Food Bank'))
+        db.session.commit()
+        sync_sqlite_replica()
+        db.session.remove()
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    # init_app registered the bind's metadata on the shared extension; later apps have no replica
+    db.metadatas.pop('replica', None)
+    replica_router.enabled = False
+
+
+def _heartbeat():
+    db.session.expire_all()
+    return db.session.get(ReplicationHeartbeat, 1).written_at
+
+
+def _write(name):
+    db.session.add(Organization(name=name))
+    db.session.commit()
+    db.session.remove()  # requests below share this app context; don't hand them the write
+
+
+def _read_source(client, max_staleness):
+    replica_router._lag_checked = 0.0  # measure afresh
+    response = client.get('/api/opportunities', headers={'X-Max-Staleness': str(max_staleness)})
+    return response.headers['X-Read-Source']
+
+
+def test_every_write_transaction_bumps_the_heartbeat(replica_app):
+    first = _heartbeat()
+    db.session.add(Organization(name='Animal Shelter'))
+    db.session.commit()
+    second = _heartbeat()
+    Organization.query.filter_by(name='Food Bank').update({'name': 'Food Bank East'})
+    db.session.commit()
+    assert first < second < _heartbeat()
+
+
+def test_reads_leave_the_replica_once_it_misses_a_write(replica_app):
+    client = replica_app.test_client()
+    assert _read_source(client, 5) == 'replica'
+
+    _write('Animal Shelter')
+    assert _read_source(client, 0) == 'primary'
+    assert _read_source(client, 5) == 'replica'
+
+    sync_sqlite_replica()
+    assert _read_source(client, 0) == 'replica'
+
+
+def test_a_browser_reads_its_own_writes_from_the_primary(replica_app):
+    client = replica_app.test_client()
+    with client.session_transaction() as session:
+        session['_primary_until'] = 2 ** 40
+    assert _read_source(client, 5) == 'primary'
+
+
+def _organization_routes(app):
+    @app.get('/_test/organizations')
+    def organization_names():
+        return {'names': sorted(org.name for org in Organization.query)}
+
+    @app.get('/_test/organizations/current')
+    @use_primary
+    def current_organization_names():
+        return organization_names()
+
+    @app.post('/_test/organizations')
+    def add_organization():
+        db.session.add(Organization(name=request.form['name']))
+        db.session.commit()
+        return {'success': True}
+
+
+def test_replica_reads_lag_until_synced_and_primary_views_do_not(replica_app):
+    _organization_routes(replica_app)
+    client = replica_app.test_client()
+    _write('Animal Shelter')
+    replica_router._lag_checked = 0.0
+
+    assert client.get('/_test/organizations').get_json()['names'] == ['Food Bank']
+    db.session.remove()  # as each request's teardown would
+    assert client.get('/_test/organizations/current').get_json()['names'] == ['Animal Shelter', 'Food Bank']
+
+
+def test_a_write_request_pins_the_next_reads_to_the_primary(replica_app):
+    _organization_routes(replica_app)
+    client = replica_app.test_client()
+    assert client.post('/_test/organizations', data={'name': 'Animal Shelter'}).status_code == 200
+    db.session.remove()
+    replica_router._lag_checked = 0.0
+
+    response = client.get('/_test/organizations')
+    assert response.headers['X-Read-Source'] == 'primary'
+    assert response.get_json()['names'] == ['Animal Shelter', 'Food Bank']
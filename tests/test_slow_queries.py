@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+
+from slow_queries import SlowQueryLog
+
+
+class RecordingCursor:
+    """DB-API cursor that records statements and fails the ones containing ``fail``"""
+
+    def __init__(self, executed, fail):
+        self.executed = executed
+        self.fail = fail
+
+    def execute(self, statement, parameters=None):
+        self.executed.append(statement)
+        if self.fail and self.fail in statement:
+            raise RuntimeError('syntax error')
+
+    def fetchall(self):
+        return [('Seq Scan on users',)]
+
+    def close(self):
+        pass
+
+
+def _connection(dialect, fail=None):
+    executed = []
+    conn = SimpleNamespace(dialect=SimpleNamespace(name=dialect),
+                           connection=SimpleNamespace(cursor=lambda: RecordingCursor(executed, fail)))
+    return conn, executed
+
+
+def test_explain_runs_in_a_savepoint():
+    conn, executed = _connection('postgresql')
+    assert SlowQueryLog()._explain(conn, 'SELECT * FROM users', {}) == 'Seq Scan on users'
+    assert executed == ['SAVEPOINT slow_query_explain', 'EXPLAIN SELECT * FROM users',
+                        'RELEASE SAVEPOINT slow_query_explain']
+
+
+def test_failed_explain_rolls_back_to_the_savepoint():
+    conn, executed = _connection('postgresql', fail='EXPLAIN')
+    assert SlowQueryLog()._explain(conn, 'SELECT * FROM users', {}).startswith('EXPLAIN failed')
+    assert executed[-1] == 'ROLLBACK TO SAVEPOINT slow_query_explain'
+
+
+@pytest.mark.parametrize('statement', ['INSERT INTO users VALUES (1)', 'WITH x AS (SELECT 1) SELECT * FROM x',
+                                       'PRAGMA foreign_keys=ON'])
+def test_only_select_update_and_delete_are_explained(statement):
+    conn, executed = _connection('postgresql')
+    assert SlowQueryLog()._explain(conn, statement, {}) is None
+    assert executed == []
+
+
+def test_failed_statements_leave_no_timing_behind():
+    log = SlowQueryLog()
+    log.threshold = 0
+    entries = []
+    log._write = entries.append
+    engine = create_engine('sqlite://')
+    event.listen(engine, 'before_cursor_execute', log._before)
+    event.listen(engine, 'after_cursor_execute', log._after)
+
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text('SELECT * FROM missing'))
+        conn.execute(text('SELECT 1'))
+        assert not [key for key in conn.info if 'slow_query' in key]
+
+    assert [entry['statement'] for entry in entries if entry['type'] == 'query'] == ['SELECT ?']
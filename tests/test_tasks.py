@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import tasks
+from models import db, Task
+
+
+def test_purge_finished_keeps_recent_pending_and_failed_tasks(app, monkeypatch):
+    monkeypatch.setattr(tasks, 'PURGE_BATCH', 2)
+    now = datetime.utcnow()
+    old = now - timedelta(days=10)
+    db.session.add_all(
+        [Task(name='send_email', status='done', finished_at=old) for _ in range(5)] + [
+            Task(name='send_email', status='done', finished_at=now),
+            Task(name='send_email', status='failed', finished_at=old),
+            Task(name='send_email', status='pending'),
+        ])
+    db.session.commit()
+
+    assert tasks.purge_finished(7) == 5
+    assert sorted(task.status for task in Task.query) == ['done', 'failed', 'pending']
+
+
+def test_failures_back_off_then_give_up(app, monkeypatch):
+    def flaky(payload):
+        raise RuntimeError('smtp down')
+    monkeypatch.setitem(tasks.HANDLERS, 'flaky', (flaky, False))
+    job = tasks.enqueue('flaky', {'to': 'a@example.org'}, max_attempts=2)
+    db.session.commit()
+
+    assert tasks.run_pending() == 1
+    db.session.refresh(job)
+    assert job.status == 'pending' and 'smtp down' in job.last_error
+    assert job.run_at > datetime.utcnow() + timedelta(seconds=5)
+    assert tasks.run_pending() == 0
+
+    job.run_at = datetime.utcnow()
+    db.session.commit()
+    assert tasks.run_pending() == 1
+    db.session.refresh(job)
+    assert (job.status, job.attempts) == ('failed', 2)
+
+
+def test_batch_handlers_get_every_claimed_payload(app, monkeypatch):
+    seen = []
+    monkeypatch.setitem(tasks.HANDLERS, 'digest', (seen.append, True))
+    for n in range(3):
+        tasks.enqueue('digest', {'n': n})
+    db.session.commit()
+
+    assert tasks.run_pending() == 3
+    assert seen == [[{'n': 0}, {'n': 1}, {'n': 2}]]
+    assert {task.status for task in Task.query} == {'done'}
+
+
+def test_tasks_held_by_a_dead_worker_are_reclaimed(app, monkeypatch):
+    ran = []
+    monkeypatch.setitem(tasks.HANDLERS, 'noop', (ran.append, False))
+    stale = datetime.utcnow() - timedelta(seconds=tasks.LEASE_SECONDS + 1)
+    db.session.add_all([
+        Task(name='noop', payload='{"held": "stale"}', status='running', locked_at=stale, locked_by='gone'),
+        Task(name='noop', payload='{"held": "live"}', status='running', locked_at=datetime.utcnow(), locked_by='busy'),
+    ])
+    db.session.commit()
+
+    assert tasks.run_pending() == 1
+    assert ran == [{'held': 'stale'}]